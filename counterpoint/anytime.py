@@ -0,0 +1,107 @@
+import threading
+
+class CancellationToken (object):
+    """ Stops an interruptible search (see `Generator.iter_interruptible`), from any thread.
+    """
+
+    def __init__ (self):
+        self.event = threading.Event()
+
+    def cancel (self):
+        """ Asks the searches holding this token to stop as soon as they next check it.
+        """
+        self.event.set()
+
+    @property
+    def cancelled (self):
+        """ Whether `cancel` has been called.
+        """
+        return self.event.is_set()
+
+class SearchState (object):
+    """ The progress of an interruptible search, kept up to date as it runs and passed back in to resume it.
+
+    The search visits candidate paths in `itertools.product` order, so everything before `frontier` has been decided
+    (either yielded or ruled out) and `coverage` is the fraction of all candidate paths that lie before it.
+
+    Attributes:
+        frontier (tuple of int): The candidate indices placed when the search stopped, followed by the index of the
+            next candidate to try after them, or None if the search has not started or is exhausted.
+        exhaustive (bool): Whether the search has run to the end, so every valid path has been found.
+        coverage (float): The fraction of the candidate paths decided so far.
+        nodes (int): The number of search nodes checked, over every run.
+        found (int): The number of valid paths found, over every run.
+        sizes (tuple of int): The number of candidates at each position of the problem, or None before the search
+            starts. A state can only resume a search through domains of the same sizes.
+        stored (bool): Whether the valid paths were looked up in a solution store instead of searched, so no nodes
+            were checked and none of the budget was spent.
+
+    """
+
+    def __init__ (self):
+        self.nexts = None # One past the index placed at each position, then the next index to try (see `frontier`).
+        self.exhaustive = False
+        self.nodes = 0
+        self.found = 0
+        self.sizes = None
+        self.stored = False
+
+    @property
+    def frontier (self):
+        if self.nexts is None:
+            return None
+        return tuple(i - 1 for i in self.nexts[:-1]) + self.nexts[-1:]
+
+    @frontier.setter
+    def frontier (self, frontier):
+        self.nexts = tuple(i + 1 for i in frontier[:-1]) + frontier[-1:] if frontier is not None else None
+
+    @property
+    def coverage (self):
+        if self.exhaustive:
+            return 1.0
+        frontier = self.frontier
+        if frontier is None:
+            return 0.0
+        before, total = 0, 1
+        for j, size in enumerate(self.sizes): # The rank of the frontier among the candidate paths.
+            before = before * size + (frontier[j] if j < len(frontier) else 0)
+            total *= size
+        return before / total if total else 1.0
+
+    def finish (self):
+        """ Marks the search as exhausted.
+        """
+        self.nexts = None
+        self.exhaustive = True
+
+    def as_dict (self):
+        """ Gets the state as plain data (e.g. to save as JSON).
+
+        Returns:
+            dict: The attributes of the state.
+
+        """
+        return {'frontier': list(self.frontier) if self.frontier is not None else None,
+            'exhaustive': self.exhaustive, 'coverage': self.coverage, 'nodes': self.nodes, 'found': self.found,
+            'sizes': list(self.sizes) if self.sizes is not None else None, 'stored': self.stored}
+
+    @staticmethod
+    def from_dict (data):
+        """ Restores a state saved with `SearchState.as_dict`.
+
+        Args:
+            data (dict): The saved state.
+
+        Returns:
+            SearchState: The state.
+
+        """
+        state = SearchState()
+        state.frontier = tuple(data['frontier']) if data['frontier'] is not None else None
+        state.exhaustive = data['exhaustive']
+        state.nodes = data['nodes']
+        state.found = data['found']
+        state.sizes = tuple(data['sizes']) if data['sizes'] is not None else None
+        state.stored = data.get('stored', False) # Not saved by earlier versions.
+        return state
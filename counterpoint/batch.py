@@ -0,0 +1,183 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from counterpoint.generator import Generator
+from counterpoint.keys import Key
+from counterpoint.midi import Midi
+from counterpoint.musicxml import MusicXML
+
+EXTENSIONS = ('.xml', '.musicxml', '.mxl')
+
+class Batch (object):
+    """ Generates counterpoints for many cantus firmi at once, without displaying anything.
+
+    Inputs are searched and written in compact form, so simple MusicXML files are processed without importing `music21`.
+    """
+
+    @staticmethod
+    def find_inputs (source):
+        """ Finds the MusicXML files to process.
+
+        Args:
+            source (str): A directory, whose MusicXML files are all processed, or a glob pattern.
+
+        Returns:
+            list of str: The paths of the input files, sorted.
+
+        """
+        if os.path.isdir(source):
+            return sorted(os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(EXTENSIONS) and os.path.isfile(os.path.join(source, name)))
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+    @staticmethod
+    def output_names (paths):
+        """ Names the outputs of each input file after its base name, prefixed with its directories (relative to those
+        of the other inputs) when two inputs in different directories share a base name.
+
+        Args:
+            paths (list of str): The paths of the input files.
+
+        Returns:
+            list of str: The name of the outputs of each input.
+
+        Raises:
+            ValueError: If two inputs would still get the same name.
+
+        """
+        names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+        shared = set(name for name in names if names.count(name) > 1)
+        if shared:
+            root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+            names = [os.path.relpath(os.path.splitext(os.path.abspath(path))[0], root).replace(os.sep, '_')
+                if name in shared else name for name, path in zip(names, paths)]
+        for name in set(names):
+            if names.count(name) > 1:
+                raise ValueError(f"Several inputs would be written as '{name}'.")
+        return names
+
+    @staticmethod
+    def process (path, output_directory, species=2, solutions=1, seed=None, archive=False, key=None, name=None):
+        """ Generates counterpoints for one cantus firmus file and writes each one, with the cantus firmus, to MIDI.
+
+        Never raises: a failure is reported in the summary so that the rest of the batch carries on.
+
+        Args:
+            path (str): The MusicXML cantus firmus.
+            output_directory (str): The directory to write `<name>_<i>.mid` files (or the `<name>.zip` of them) to.
+            species (int): The species of counterpoint (1 or 2).
+            solutions (int): The number of distinct counterpoints to draw, uniformly at random, for the file; all of
+                them are written if there are no more.
+            seed (int): The seed for the draws (combined with the file name), or None for unseeded draws.
+            archive (bool): Whether to write the MIDI files of the file into one zip archive instead.
+            key (str): The key to keep the counterpoints in (e.g. 'D dorian'), 'auto' to detect it from the cantus
+                firmus, or None to allow chromatic notes (see `Generator.get_line_problem`).
+            name (str): The name of the outputs (see `Batch.output_names`), or None for the base name of `path`.
+
+        Returns:
+            dict: The `input` path, the number of valid counterpoints `found`, the `outputs` written, the `elapsed`
+                seconds and the `error`, if any.
+
+        """
+        start = time.perf_counter()
+        summary = {'input': path, 'found': None, 'outputs': [], 'error': None}
+        try:
+            cf = MusicXML.load_line(path)
+            if not cf:
+                raise ValueError("The file contains no notes.")
+            problem = Generator.get_line_problem(cf, species, key)
+            name = name if name is not None else os.path.splitext(os.path.basename(path))[0]
+            draw_seed = f"{seed}:{name}" if seed is not None else None
+            summary['found'], paths = Generator.sample_paths(problem, solutions, draw_seed, distinct=True)
+            cf = [(midi, length) for midi, diatonic, length in cf]
+            cps = [Midi.path_voice(problem, indices) for indices in paths]
+            if archive:
+                output = os.path.join(output_directory, f"{name}.zip")
+                Midi.write_archive(output, name, cf, cps)
+                summary['outputs'].append(output)
+            else:
+                summary['outputs'] = Midi.write_many(output_directory, name, cf, cps)
+        except Exception as e:
+            summary['error'] = f"{type(e).__name__}: {e}"
+        summary['elapsed'] = time.perf_counter() - start
+        return summary
+
+    @staticmethod
+    def run (paths, output_directory, species=2, solutions=1, workers=None, seed=None, archive=False, key=None):
+        """ Processes cantus firmus files on a pool of worker processes.
+
+        Args:
+            paths (list of str): The MusicXML cantus firmi.
+            output_directory (str): The directory to write MIDI files to (created if missing).
+            species (int): The species of counterpoint (1 or 2).
+            solutions (int): The number of distinct counterpoints to write per file.
+            workers (int): The number of worker processes, or None for one per core.
+            seed (int): The seed for the draws, or None for unseeded draws.
+            archive (bool): Whether to write the MIDI files of each input into one zip archive.
+            key (str): The key to keep the counterpoints in, 'auto' to detect it for each input, or None.
+
+        Yields:
+            dict: The summary of each file (see `Batch.process`), in the order of `paths`.
+
+        Raises:
+            ValueError: If the outputs of two inputs cannot be told apart (see `Batch.output_names`).
+
+        """
+        names = Batch.output_names(paths)
+        os.makedirs(output_directory, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = [executor.submit(Batch.process, path, output_directory, species, solutions, seed, archive,
+                key, name) for path, name in zip(paths, names)]
+            for path, future in zip(paths, futures):
+                try:
+                    yield future.result()
+                except Exception as e: # The worker itself died (e.g. out of memory).
+                    yield {'input': path, 'found': None, 'outputs': [], 'error': f"{type(e).__name__}: {e}",
+                        'elapsed': None}
+
+def main (argv=None):
+    parser = argparse.ArgumentParser(description="Generate counterpoints for a batch of MusicXML cantus firmi.")
+    parser.add_argument('source', help="A directory of MusicXML files, or a glob pattern.")
+    parser.add_argument('output', help="The directory to write MIDI files and summary.json to.")
+    parser.add_argument('--species', type=int, choices=[1, 2], default=2)
+    parser.add_argument('--solutions', type=int, default=1, help="Distinct counterpoints to write per cantus firmus.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core).")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible draws.")
+    parser.add_argument('--archive', action='store_true', help="Write each input's MIDI files into one zip archive.")
+    parser.add_argument('--key', default=None,
+        help="Keep counterpoints in a key (e.g. 'D dorian'), or 'auto' to detect each cantus firmus's key.")
+    args = parser.parse_args(argv)
+
+    paths = Batch.find_inputs(args.source)
+    if not paths:
+        print(f"Error: No MusicXML files match '{args.source}'.")
+        return 1
+    try:
+        Batch.output_names(paths)
+        if args.key is not None and args.key != 'auto':
+            Key.parse(args.key) # Checked once here rather than failing every file.
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    summaries = []
+    for summary in Batch.run(paths, args.output, args.species, args.solutions, args.workers, args.seed,
+            args.archive, args.key):
+        summaries.append(summary)
+        if summary['error'] is not None:
+            print(f"FAILED {summary['input']}: {summary['error']}")
+        else:
+            print(f"ok     {summary['input']}: {summary['found']} counterpoints, wrote {len(summary['outputs'])} "
+                f"in {summary['elapsed']:.2f}s")
+    with open(os.path.join(args.output, 'summary.json'), 'w') as f:
+        json.dump(summaries, f, indent=2)
+    failures = sum(1 for summary in summaries if summary['error'] is not None)
+    print(f"{len(summaries) - failures} succeeded, {failures} failed.")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from counterpoint.compact import Compact
+from counterpoint.counting import SolutionCounter
+from counterpoint.generator import Generator
+from counterpoint.vectorized import Vectorized
+
+# Semitones above the tonic of each scale degree.
+MODES = {
+    'major': [0, 2, 4, 5, 7, 9, 11],
+    'minor': [0, 2, 3, 5, 7, 8, 10],
+    'dorian': [0, 2, 3, 5, 7, 9, 10],
+}
+
+# The (tonic, mode) of each synthetic cantus firmus, covering several keys and ranges.
+KEYS = [('C4', 'major'), ('G3', 'major'), ('D4', 'dorian'), ('A3', 'minor'), ('F4', 'major'), ('E4', 'minor')]
+
+ENGINES = ['list', 'iter', 'vectorized', 'count', 'parallel']
+
+# The modules whose import time is measured, and whether each may import `music21`.
+STARTUP_MODULES = [('counterpoint.generator', False), ('counterpoint.batch', False), ('counterpoint.midi', False),
+    ('counterpoint.musicxml', False), ('music21', True)]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Where the `counterpoint` package is imported from.
+
+# Times one import in a fresh interpreter, printing its seconds and whether it imported `music21`.
+STARTUP_SCRIPT = ("import sys, time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start, 'music21' in sys.modules)")
+
+class OutOfTime (Exception):
+    """ Raised inside a benchmarked search when its time budget runs out.
+    """
+
+class CountingCheck (object):
+    """ Wraps a rule check to count the search nodes it is called on and to stop the search at a deadline.
+    """
+
+    def __init__ (self, check, deadline):
+        self.check = check
+        self.deadline = deadline
+        self.nodes = 0
+
+    def __call__ (self, path, j):
+        self.nodes += 1
+        if self.nodes % 4096 == 0 and time.perf_counter() > self.deadline:
+            raise OutOfTime()
+        return self.check(path, j)
+
+class Benchmark (object):
+    """ Measures generation throughput across cantus firmus lengths, keys, species and engines.
+    """
+
+    @staticmethod
+    def synthetic_cantus_firmus (length, tonic='C4', mode='major', seed=0):
+        """ Generates a plausible cantus firmus: mostly stepwise, no repeated notes, ending on the tonic from above.
+
+        Args:
+            length (int): The number of notes (at least 3).
+            tonic (str): The name of the tonic with its octave (e.g. 'C4').
+            mode (str): The mode, a key of `MODES`.
+            seed (int): The seed of the melody.
+
+        Returns:
+            list of music21.note.Note: The cantus firmus, in whole notes.
+
+        """
+        rng = random.Random(f"{length}:{tonic}:{mode}:{seed}")
+        tonic_midi, tonic_diatonic = Compact.from_name(tonic)
+
+        def note (degree):
+            octave, step = divmod(degree, 7)
+            return Compact.to_note(tonic_midi + 12 * octave + MODES[mode][step], tonic_diatonic + degree, 4.0)
+
+        degrees = [0]
+        while len(degrees) < length - 2:
+            move = rng.choice([-1, -1, 1, 1, -2, 2, 3, -3])
+            degree = degrees[-1] + move
+            last = len(degrees) == length - 3 # The last free note must lead to the supertonic without repeating it.
+            if -2 <= degree <= 7 and not (last and (degree == 1 or abs(degree - 1) > 2)):
+                degrees.append(degree)
+        degrees += [1, 0] # Close on the supertonic and the tonic.
+        return [note(degree) for degree in degrees[:length]]
+
+    @staticmethod
+    def peak_rss_kb ():
+        """ Gets the peak resident set size of this process in kilobytes.
+        """
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == 'darwin' else peak # macOS reports bytes, Linux kilobytes.
+
+    @staticmethod
+    def run_case (case):
+        """ Runs one benchmark case. Meant to run in a fresh process so that its peak memory is its own.
+
+        Args:
+            case (dict): The `engine`, `species`, `length`, `tonic`, `mode`, solution `limit`, time `budget` in seconds
+                and number of `workers`.
+
+        Returns:
+            dict: `case` with the measurements added: `elapsed` seconds, `solutions` found, `solutions_per_second`,
+                `nodes` visited (where known), `time_to_first` solution, whether the search was `exhaustive`,
+                `peak_rss_kb` and `skipped` with a reason if the engine does not suit the case.
+
+        """
+        result = dict(case)
+        cf = Benchmark.synthetic_cantus_firmus(case['length'], case['tonic'], case['mode'])
+        problem = Generator.get_problem(cf, case['species'])
+        engine, limit = case['engine'], case['limit']
+        start = time.perf_counter()
+        deadline = start + case['budget']
+        solutions, nodes, first, exhaustive = 0, None, None, True
+
+        if engine == 'list':
+            total = SolutionCounter(Generator.get_domains(problem), Generator.get_check(problem)).total
+            if total > limit:
+                result['skipped'] = f"{total} solutions is more than the limit of {limit}"
+                return result
+            start = time.perf_counter()
+            species_above = Generator.firstspeciesabove if case['species'] == 1 else Generator.secondspeciesabove
+            solutions = len(species_above(cf))
+        elif engine in ['iter', 'parallel']:
+            if engine == 'iter':
+                check = CountingCheck(Generator.get_check(problem), deadline)
+                paths = Generator.iter_backtrack(Generator.get_domains(problem), check)
+            else:
+                paths = Generator.iter_search(problem, workers=case['workers'])
+            try:
+                for path in itertools.islice(paths, limit):
+                    Compact.to_notes(problem, path)
+                    solutions += 1
+                    if first is None:
+                        first = time.perf_counter() - start
+                    if time.perf_counter() > deadline:
+                        raise OutOfTime()
+                exhaustive = next(paths, None) is None
+            except OutOfTime:
+                exhaustive = False
+            if engine == 'iter':
+                nodes = check.nodes
+        elif engine == 'vectorized':
+            size = 1
+            for candidates in problem.midi:
+                size *= len(candidates)
+            if size > case['budget'] * 2e6: # Roughly what can be validated within the budget.
+                result['skipped'] = f"{size} candidate paths is too many to validate within the budget"
+                return result
+            for path in Vectorized.iter_valid_paths(problem):
+                solutions += 1
+                if first is None:
+                    first = time.perf_counter() - start
+            nodes = size
+        elif engine == 'count':
+            solutions = SolutionCounter(Generator.get_domains(problem), Generator.get_check(problem)).total
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+
+        elapsed = time.perf_counter() - start
+        result.update({
+            'elapsed': elapsed,
+            'solutions': solutions,
+            'solutions_per_second': solutions / elapsed if elapsed > 0 else None,
+            'nodes': nodes,
+            'time_to_first': first,
+            'exhaustive': exhaustive,
+            'peak_rss_kb': Benchmark.peak_rss_kb(),
+        })
+        return result
+
+    @staticmethod
+    def startup (modules=STARTUP_MODULES, repeats=5):
+        """ Measures how long importing each module takes in a fresh interpreter, which every CLI invocation pays.
+
+        Args:
+            modules (list of tuple): The name of each module and whether it may import `music21`.
+            repeats (int): The number of fresh interpreters to time each import in; the fastest is reported.
+
+        Returns:
+            list of dict: The `module`, its best import time in `seconds`, whether it imported `music21` and whether
+                that was `allowed`.
+
+        """
+        results = []
+        for module, allowed in modules:
+            times = []
+            for i in range(repeats):
+                output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT.format(module=module)], cwd=ROOT,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout.split()
+                times.append(float(output[0]))
+            results.append({'module': module, 'seconds': min(times), 'music21': output[1] == 'True',
+                'allowed': allowed})
+        return results
+
+    @staticmethod
+    def cases (lengths, species, engines, limit, budget, workers):
+        """ Lists the benchmark cases: every engine and species for every length, cycling through `KEYS`.
+        """
+        for length, s, engine in itertools.product(lengths, species, engines):
+            tonic, mode = KEYS[length % len(KEYS)]
+            yield {'engine': engine, 'species': s, 'length': length, 'tonic': tonic, 'mode': mode,
+                'limit': limit, 'budget': budget, 'workers': workers}
+
+    @staticmethod
+    def run (cases, startup_repeats=5):
+        """ Runs benchmark cases, each in a fresh process, and the startup benchmark.
+
+        Args:
+            cases (iterable of dict): The cases (see `Benchmark.run_case`).
+            startup_repeats (int): The number of times to time each import (see `Benchmark.startup`), or 0 to skip it.
+
+        Returns:
+            dict: The environment the benchmark ran in, the result of each case and the import times.
+
+        """
+        import music21
+        with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+            results = pool.map(Benchmark.run_case, list(cases), chunksize=1)
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'music21': music21.__version__,
+            'platform': platform.platform(),
+            'results': results,
+            'startup': Benchmark.startup(repeats=startup_repeats) if startup_repeats else [],
+        }
+
+    @staticmethod
+    def compare (baseline, current):
+        """ Compares the solutions per second of two benchmark runs case by case.
+
+        Args:
+            baseline (dict): The earlier run, as returned by `Benchmark.run`.
+            current (dict): The later run.
+
+        Returns:
+            list of tuple: The case key and the ratio of current to baseline throughput for every case in both runs.
+
+        """
+        def key (result):
+            return (result['engine'], result['species'], result['length'], result['tonic'], result['mode'])
+
+        before = dict((key(result), result) for result in baseline['results'])
+        ratios = []
+        for result in current['results']:
+            old = before.get(key(result))
+            if old and old.get('solutions_per_second') and result.get('solutions_per_second'):
+                ratios.append((key(result), result['solutions_per_second'] / old['solutions_per_second']))
+        return ratios
+
+def main (argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark counterpoint generation throughput.")
+    parser.add_argument('--lengths', type=int, nargs='+', default=list(range(4, 17, 2)))
+    parser.add_argument('--species', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES)
+    parser.add_argument('--limit', type=int, default=10000, help="Most solutions to enumerate per case.")
+    parser.add_argument('--budget', type=float, default=10.0, help="Seconds allowed per case.")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON results.")
+    parser.add_argument('--compare', help="An earlier JSON results file to compare throughput against.")
+    parser.add_argument('--startup-repeats', type=int, default=5, help="Fresh interpreters to time each import in.")
+    args = parser.parse_args(argv)
+
+    report = Benchmark.run(Benchmark.cases(args.lengths, args.species, args.engines, args.limit, args.budget,
+        args.workers), args.startup_repeats)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    for result in report['results']:
+        if 'skipped' in result:
+            print(f"{result['engine']:>10} species {result['species']} length {result['length']:>2}: "
+                f"skipped ({result['skipped']})")
+        else:
+            print(f"{result['engine']:>10} species {result['species']} length {result['length']:>2}: "
+                f"{result['solutions']} solutions in {result['elapsed']:.3f}s, peak {result['peak_rss_kb']} KB")
+    for result in report['startup']:
+        warning = " (imports music21!)" if result['music21'] and not result['allowed'] else ""
+        print(f"import {result['module']}: {result['seconds'] * 1000:.1f}ms{warning}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for case, ratio in Benchmark.compare(baseline, report):
+            print(f"{' '.join(map(str, case))}: {ratio:.2f}x")
+        before = dict((result['module'], result['seconds']) for result in baseline.get('startup', []))
+        for result in report['startup']:
+            if result['module'] in before:
+                print(f"import {result['module']}: {result['seconds'] / before[result['module']]:.2f}x the time")
+    if any(result['music21'] and not result['allowed'] for result in report['startup']):
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+class LRUCache (object):
+    """ A bounded mapping that evicts its least recently used entry when full, counting hits and misses.
+
+    Attributes:
+        maxsize (int): The most entries kept at once.
+        hits (int): The number of lookups that found an entry.
+        misses (int): The number of lookups that did not.
+
+    """
+
+    def __init__ (self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def get (self, key, compute):
+        """ Gets the value for a key, computing and storing it on a miss.
+
+        Args:
+            key (hashable): The key to look up.
+            compute (callable): Called with no arguments to produce the value on a miss.
+
+        Returns:
+            object: The cached or newly computed value.
+
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            value = compute()
+            self.entries[key] = value
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False) # Evict the least recently used entry.
+            return value
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def clear (self):
+        """ Removes every entry and resets the hit and miss counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info (self):
+        """ Gets the cache statistics.
+
+        Returns:
+            dict: The `hits`, `misses`, current `size` and `maxsize` of the cache.
+
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
+
+    def __len__ (self):
+        return len(self.entries)
@@ -0,0 +1,397 @@
+REST = -1 # The MIDI and diatonic number used for a rest.
+
+STEPS = 'CDEFGAB'
+STEP_SEMITONES = [0, 2, 4, 5, 7, 9, 11] # Semitones above C of each natural step.
+
+# The semitones added to a perfect or major interval (see `STEP_SEMITONES`) by each quality, as music21 spells them.
+PERFECT_QUALITIES = {'P': 0, 'p': 0, 'A': 1, 'd': -1}
+MAJOR_QUALITIES = {'M': 0, 'm': -1, 'A': 1, 'd': -2}
+
+CANONICAL = (60, 29) # The compact pitch (C4) that canonical cantus firmi start on.
+
+# Big leap types, as plain ints (see `Generator.BigLeapType`).
+NOT_BIG_LEAP, BIG_LEAP, FIFTH, OCTAVE_UP, OCTAVE_DOWN = range(5)
+
+# The big leap type of each leap in semitones, where it is not `NOT_BIG_LEAP`.
+LEAP_TYPES = dict([(d, BIG_LEAP) for d in [6, 9, 10, 11, -6, -8, -9, -10, -11]]
+    + [(8, FIFTH), (12, OCTAVE_UP), (-12, OCTAVE_DOWN)])
+
+TRITONE = 6 # The semitones of a tritone outline.
+OUTLINE_START = (0, 0) # The state of the outline automaton (see `Compact.outline`) before the first move.
+
+class Problem (object):
+    """ A counterpoint search problem in compact integer form.
+
+    Every pitch is a pair of ints: its MIDI number and its diatonic step number (`C4` is 29, as
+    `music21.pitch.Pitch.diatonicNoteNum`). Together they pin down the spelling, so no `music21` objects are needed
+    until a solution is turned back into notes.
+
+    Attributes:
+        species (int): The species of counterpoint (1 or 2).
+        cf_midi (tuple of int): The MIDI numbers of the cantus firmus.
+        cf_diatonic (tuple of int): The diatonic step numbers of the cantus firmus.
+        midi (list of tuple of int): The MIDI numbers of the candidates at each position of the counterpoint.
+        diatonic (list of tuple of int): The diatonic step numbers of the candidates at each position.
+        lengths (list of float): The quarter length of the notes at each position.
+
+    """
+    __slots__ = ('species', 'cf_midi', 'cf_diatonic', 'midi', 'diatonic', 'lengths')
+
+    def __init__ (self, species, cf_midi, cf_diatonic, midi, diatonic, lengths):
+        self.species = species
+        self.cf_midi = cf_midi
+        self.cf_diatonic = cf_diatonic
+        self.midi = midi
+        self.diatonic = diatonic
+        self.lengths = lengths
+
+    def cf_indices (self):
+        """ Gets the index of the cantus firmus note under each position of the counterpoint.
+
+        Returns:
+            list of int: The cantus firmus index of each position (`j // species`).
+
+        """
+        return [j // self.species for j in range(len(self.midi))]
+
+    def domains (self):
+        """ Gets the candidate indices for each position, as searched by `Generator.iter_backtrack`.
+
+        Returns:
+            list of range: The indices into `midi` and `diatonic` of the candidates at each position.
+
+        """
+        return [range(len(candidates)) for candidates in self.midi]
+
+    def transposed (self, semitones, steps):
+        """ Gets this problem transposed by an interval.
+
+        Every rule depends only on intervals, and candidates are built from intervals above the cantus firmus, so the
+        transposed problem has the same valid paths; only the spelling of its notes changes.
+
+        Args:
+            semitones (int): The semitones in the interval (negative to transpose down).
+            steps (int): The diatonic steps in the interval.
+
+        Returns:
+            Problem: The transposed problem. Rests stay rests.
+
+        """
+        def shift (pitches, by):
+            return tuple(p if p == REST else p + by for p in pitches)
+
+        return Problem(self.species, shift(self.cf_midi, semitones), shift(self.cf_diatonic, steps),
+            [shift(candidates, semitones) for candidates in self.midi],
+            [shift(candidates, steps) for candidates in self.diatonic], self.lengths)
+
+    def canonical (self):
+        """ Gets this problem transposed so that its cantus firmus starts on `CANONICAL` (see `Compact.canonical`).
+        """
+        semitones, steps = Compact.canonical_shift(self.cf_midi[0], self.cf_diatonic[0])
+        return self.transposed(semitones, steps)
+
+class Compact (object):
+    """ Converts between `music21` notes and compact pitches, and checks the counterpoint rules on compact pitches.
+
+    The rules mirror their `Generator` counterparts (e.g. `Compact.big_leap_type` and `Generator.big_leap_type`) but
+    take plain ints.
+    """
+
+    @staticmethod
+    def from_note (note):
+        """ Converts a note to a compact pitch.
+
+        Args:
+            note (music21.note.GeneralNote): The note or rest to convert.
+
+        Returns:
+            tuple of int: The MIDI number and diatonic step number of `note` (both `REST` for a rest).
+
+        """
+        if note.isRest:
+            return REST, REST
+        return int(note.pitch.ps), note.pitch.diatonicNoteNum
+
+    @staticmethod
+    def from_name (name):
+        """ Converts a note name with octave (e.g. 'B-3', as `music21.note.Note.nameWithOctave`) to a compact pitch.
+
+        Args:
+            name (str): The name of the note, with '#' for sharps and '-' for flats.
+
+        Returns:
+            tuple of int: The MIDI number and diatonic step number of the note.
+
+        Raises:
+            ValueError: If the name is not a step, then only sharps or only flats, then an octave.
+
+        """
+        step = STEPS.find(name[0].upper()) if name else -1
+        accidental = name[1:].rstrip('0123456789')
+        octave = name[1 + len(accidental):]
+        if step < 0 or not octave or accidental not in ('#' * len(accidental), '-' * len(accidental)):
+            raise ValueError(f"Unknown note name: {name}")
+        octave = int(octave)
+        alter = accidental.count('#') - accidental.count('-')
+        return 12 * (octave + 1) + STEP_SEMITONES[step] + alter, 7 * octave + step + 1
+
+    @staticmethod
+    def to_note (midi, diatonic, length):
+        """ Converts a compact pitch to a new note.
+
+        Args:
+            midi (int): The MIDI number of the pitch.
+            diatonic (int): The diatonic step number of the pitch.
+            length (float): The quarter length of the note.
+
+        Returns:
+            music21.note.GeneralNote: The spelled note, or a rest if `midi` is `REST`.
+
+        """
+        import music21 # Only needed to build notes, so the search can run without it.
+        if midi == REST:
+            return music21.note.Rest(quarterLength=length)
+        octave, step = divmod(diatonic - 1, 7)
+        alter = midi - 12 * (octave + 1) - STEP_SEMITONES[step]
+        accidental = '#' * alter if alter > 0 else '-' * -alter
+        return music21.note.Note(STEPS[step] + accidental + str(octave), quarterLength=length)
+
+    @staticmethod
+    def interval (name):
+        """ Converts a music21 interval description string (e.g. 'm3' or 'p5') to a compact interval.
+
+        Args:
+            name (str): The quality ('P' or 'p', 'M', 'm', 'A' or 'd') and generic size of the interval.
+
+        Returns:
+            tuple of int: The semitones and diatonic steps of the interval.
+
+        Raises:
+            ValueError: If `name` is not a simple interval description.
+
+        """
+        quality, size = name[:1], int(name[1:])
+        octaves, step = divmod(size - 1, 7)
+        qualities = PERFECT_QUALITIES if step in (0, 3, 4) else MAJOR_QUALITIES
+        if size < 1 or quality not in qualities:
+            raise ValueError(f"Unsupported interval: {name}")
+        return 12 * octaves + STEP_SEMITONES[step] + qualities[quality], size - 1
+
+    @staticmethod
+    def above (midi, diatonic, interval):
+        """ Gets the compact pitch at an interval above a compact pitch (see `Generator.get_above_note`).
+
+        Args:
+            midi (int): The MIDI number of the start pitch.
+            diatonic (int): The diatonic step number of the start pitch.
+            interval (str): The music21 interval description string (e.g. 'm3').
+
+        Returns:
+            tuple of int: The MIDI number and diatonic step number of the end pitch.
+
+        """
+        semitones, steps = Compact.interval(interval)
+        return midi + semitones, diatonic + steps
+
+    @staticmethod
+    def line (notes):
+        """ Converts notes to the compact form of a line.
+
+        Args:
+            notes (iterable of music21.note.GeneralNote): The notes and rests.
+
+        Returns:
+            list of tuple: The MIDI number, diatonic step number (both `REST` for a rest) and quarter length of each.
+
+        """
+        return [Compact.from_note(note) + (float(note.quarterLength),) for note in notes]
+
+    @staticmethod
+    def from_lines (species, cf, candidates):
+        """ Converts a cantus firmus and the candidates at each position of its counterpoint, as lines, to a problem.
+
+        Args:
+            species (int): The species of counterpoint (1 or 2).
+            cf (list of tuple): The cantus firmus (see `Compact.line`).
+            candidates (list of list of tuple): The candidates for each position of the counterpoint, in the same form.
+
+        Returns:
+            Problem: The problem in compact form.
+
+        """
+        return Problem(species,
+            tuple(p[0] for p in cf), tuple(p[1] for p in cf),
+            [tuple(p[0] for p in pitches) for pitches in candidates],
+            [tuple(p[1] for p in pitches) for pitches in candidates],
+            [pitches[0][2] for pitches in candidates])
+
+    @staticmethod
+    def from_domains (species, cf, domains):
+        """ Converts a cantus firmus and the candidate notes at each position of its counterpoint to a problem.
+
+        Args:
+            species (int): The species of counterpoint (1 or 2).
+            cf (list of music21.note.Note): The cantus firmus.
+            domains (list of list of music21.note.GeneralNote): The candidates for each position of the counterpoint.
+
+        Returns:
+            Problem: The problem in compact form.
+
+        """
+        return Compact.from_lines(species, Compact.line(cf), [Compact.line(candidates) for candidates in domains])
+
+    @staticmethod
+    def canonical_shift (midi, diatonic):
+        """ Gets the interval that transposes a compact pitch to `CANONICAL`.
+
+        Args:
+            midi (int): The MIDI number of the pitch.
+            diatonic (int): The diatonic step number of the pitch.
+
+        Returns:
+            tuple of int: The semitones and diatonic steps of the interval.
+
+        """
+        return CANONICAL[0] - midi, CANONICAL[1] - diatonic
+
+    @staticmethod
+    def canonical (cf):
+        """ Gets the transposition-invariant form of a cantus firmus: its intervals from its first note and its rhythm.
+
+        Cantus firmi with the same canonical form are transpositions of each other (with the same spelled intervals,
+        and so the same mode), and their counterpoints are transpositions of each other too.
+
+        Args:
+            cf (list of tuple): The cantus firmus (see `Compact.line`).
+
+        Returns:
+            tuple: The (semitones, diatonic steps, quarter length) of each note relative to the first.
+
+        """
+        m0, d0 = cf[0][0], cf[0][1]
+        return tuple((m - m0, d - d0, length) for m, d, length in cf)
+
+    @staticmethod
+    def to_notes (problem, path):
+        """ Converts a path of candidate indices through a problem to new notes.
+
+        Args:
+            problem (Problem): The problem that was searched.
+            path (tuple of int): The index of the chosen candidate at each position.
+
+        Returns:
+            tuple of music21.note.GeneralNote: The counterpoint.
+
+        """
+        return tuple(Compact.to_note(problem.midi[j][i], problem.diatonic[j][i], problem.lengths[j])
+            for j, i in enumerate(path))
+
+    @staticmethod
+    def is_same_note (xm, xd, ym, yd):
+        """ Returns true if two compact pitches are the same spelled note (see `Generator.is_same_note`).
+        """
+        return xm == ym and xd == yd
+
+    @staticmethod
+    def is_parallel (steps, semitones, mm, md, nm, nd, xm, xd, ym, yd):
+        """ Returns true if `m`, `n` and `x`, `y` are both at the interval given (see `Generator.is_parallel_fifth`).
+
+        Args:
+            steps (int): The diatonic steps in the interval (4 for a fifth).
+            semitones (int): The semitones in the interval (7 for a perfect fifth).
+            mm, md, nm, nd (int): The MIDI and diatonic numbers of the first pair.
+            xm, xd, ym, yd (int): The MIDI and diatonic numbers of the second pair.
+
+        Returns:
+            bool: True if both pairs are at the interval, otherwise false.
+
+        """
+        return (nm != REST and nd - md == steps and nm - mm == semitones
+            and yd - xd == steps and ym - xm == semitones)
+
+    @staticmethod
+    def is_parallel_fifth (mm, md, nm, nd, xm, xd, ym, yd):
+        """ Returns true if `m`, `n` and `x`, `y` are each a perfect fifth apart (see `Generator.is_parallel_fifth`).
+        """
+        return Compact.is_parallel(4, 7, mm, md, nm, nd, xm, xd, ym, yd)
+
+    @staticmethod
+    def is_parallel_octave (mm, md, nm, nd, xm, xd, ym, yd):
+        """ Returns true if `m`, `n` and `x`, `y` are each a perfect octave apart (see `Generator.is_parallel_octave`).
+        """
+        return Compact.is_parallel(7, 12, mm, md, nm, nd, xm, xd, ym, yd)
+
+    @staticmethod
+    def big_leap_type (xm, ym):
+        """ Returns the type of big leap between two MIDI numbers (see `Generator.big_leap_type`).
+
+        Args:
+            xm (int): The MIDI number of the first note.
+            ym (int): The MIDI number of the second note.
+
+        Returns:
+            int: The type of big leap between the two notes (may be `NOT_BIG_LEAP`).
+
+        """
+        if xm == REST or ym == REST:
+            return NOT_BIG_LEAP
+        return LEAP_TYPES.get(ym - xm, NOT_BIG_LEAP)
+
+    @staticmethod
+    def is_special_leap (xm, ym):
+        """ Returns true if the leap between two MIDI numbers is a special leap (see `Generator.is_special_leap`).
+        """
+        return Compact.big_leap_type(xm, ym) in (FIFTH, OCTAVE_UP, OCTAVE_DOWN)
+
+    @staticmethod
+    def recover (leap, xm, ym):
+        """ Returns true if it is possible to recover from a big leap with the step from `xm` to `ym` (see
+        `Generator.recover`).
+        """
+        half_steps = ym - xm
+        return ((leap == FIFTH and -6 < half_steps < 0)
+            or (leap == OCTAVE_UP and -12 < half_steps < 0)
+            or (leap == OCTAVE_DOWN and 0 < half_steps < 12))
+
+    @staticmethod
+    def ifinharmonic (cfm, m):
+        """ Returns true if a MIDI number is dissonant against a cantus firmus MIDI number (see
+        `Generator.ifinharmonic`).
+        """
+        return abs(m - cfm) in (1, 2, 6, 10, 11)
+
+    @staticmethod
+    def approleftstep (bm, m, am):
+        """ Returns true if `m` is approached from `bm` and left to `am` by step (see `Generator.approleftstep`).
+        """
+        return bm != REST and abs(m - bm) in (1, 2) and abs(am - m) in (1, 2)
+
+    @staticmethod
+    def outline (state, am, bm):
+        """ Advances the melodic outline automaton by the move from one MIDI number to the next.
+
+        The state is the direction of the current run of moves (1 up, -1 down, 0 for repeated notes and moves to or
+        from a rest) and the semitones it spans so far, capped at `TRITONE + 1`. A run outlines a tritone if it moves
+        in one direction and spans exactly `TRITONE`; that is known once the run ends.
+
+        Args:
+            state (tuple of int): The state before the move (`OUTLINE_START` before the first move).
+            am (int): The MIDI number moved from (`REST` for a rest).
+            bm (int): The MIDI number moved to (`REST` for a rest).
+
+        Returns:
+            tuple: The state after the move, and true if the move ended a run that outlines a tritone.
+
+        """
+        step = 0 if am == REST or bm == REST else bm - am
+        direction = (step > 0) - (step < 0)
+        if direction != state[0]:
+            return (direction, min(abs(step), TRITONE + 1)), Compact.outlines_tritone(state)
+        return (direction, min(state[1] + abs(step), TRITONE + 1)), False
+
+    @staticmethod
+    def outlines_tritone (state):
+        """ Returns true if the run in an outline automaton state (see `Compact.outline`) would outline a tritone were
+        it to end there.
+        """
+        return state[0] != 0 and state[1] == TRITONE
@@ -0,0 +1,91 @@
+from collections import deque
+
+from counterpoint.counting import SolutionCounter
+
+class DomainFilter (object):
+    """ Removes the candidates that cannot take part in any valid path, by arc consistency, before searching.
+
+    Works for rule checks that only look back two positions (see `counterpoint.counting.SolutionCounter`), so the check
+    at position `j` is a constraint on positions `j - 2` to `j`: adjacent positions, and in second species the
+    downbeats on either side of an upbeat. A candidate is kept only if every constraint it takes part in allows some
+    combination of it with candidates still kept at the other positions. Constraints whose positions lose candidates
+    are revised again, AC-3 style, until nothing changes.
+
+    Filtering never removes a candidate of a valid path, and keeps the order of the candidates, so every search through
+    the filtered domains finds the same paths in the same order, with fewer branches. If a domain is emptied, there is
+    no valid path, and every domain is emptied with it.
+
+    Attributes:
+        domains (list of list): The candidates kept at each position, in their original order.
+        before (list of int): The number of candidates at each position before filtering.
+        after (list of int): The number of candidates kept at each position.
+        checks (int): The number of calls to the rule check.
+
+    """
+
+    def __init__ (self, domains, check):
+        """ Filters a list of domains.
+
+        Args:
+            domains (list of list): The candidates for each position of the path, as searched by
+                `Generator.iter_backtrack`.
+            check (callable): Called as `check(path, j)` after position `j` of `path` is placed.
+
+        Raises:
+            ValueError: If `check` reads further back than `path[j - 2]` (see `SolutionCounter.check_window`).
+
+        """
+        SolutionCounter.check_window(check)
+        domains = [list(candidates) for candidates in domains]
+        length = len(domains)
+        self.before = [len(candidates) for candidates in domains]
+        self.checks = 0
+        path = [None] * length
+
+        # `tables[j]` holds the combinations of candidates at positions `j - 2` to `j` (from 0) accepted at `j`. Only
+        # combinations whose first positions are accepted at `j - 1` can be part of a valid path.
+        tables = []
+        for j in range(length):
+            start = max(j - 2, 0)
+            prefixes = set(values[len(values) - (j - start):] for values in tables[j - 1]) if j else [()]
+            table = []
+            for prefix in prefixes:
+                path[start:j] = prefix
+                for candidate in domains[j]:
+                    path[j] = candidate
+                    self.checks += 1
+                    if check(path, j):
+                        table.append(tuple(prefix) + (candidate,))
+            tables.append(table)
+            path[start:j + 1] = [None] * (j + 1 - start)
+
+        kept = [set(candidates) for candidates in domains]
+        queue = deque(range(length))
+        queued = [True] * length
+        while queue:
+            j = queue.popleft()
+            queued[j] = False
+            start = max(j - 2, 0)
+            tables[j] = [values for values in tables[j]
+                if all(value in kept[k] for k, value in zip(range(start, j + 1), values))]
+            for offset, k in enumerate(range(start, j + 1)):
+                supported = set(values[offset] for values in tables[j])
+                if len(supported) == len(kept[k]):
+                    continue
+                kept[k] = supported
+                for other in range(k, min(k + 3, length)): # The constraints that position `k` takes part in.
+                    if other != j and not queued[other]:
+                        queue.append(other)
+                        queued[other] = True
+
+        if any(not candidates for candidates in kept):
+            kept = [set() for candidates in kept]
+        self.domains = [[candidate for candidate in candidates if candidate in kept[j]]
+            for j, candidates in enumerate(domains)]
+        self.after = [len(candidates) for candidates in self.domains]
+
+    @property
+    def consistent (self):
+        """ Whether every domain kept a candidate; if not, there is no valid path.
+        """
+        return all(self.after)
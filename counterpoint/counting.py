@@ -0,0 +1,170 @@
+import random
+
+WINDOW = 3 # The number of positions, ending at the one just placed, that a rule check may read to be counted.
+
+class SolutionCounter (object):
+    """ Counts the valid paths through a problem by dynamic programming and samples them uniformly at random.
+
+    Works for rule checks that only look back two positions, i.e. `check(path, j)` reads nothing before `path[j - 2]`
+    (see `SolutionCounter.check_window`).
+    The state after placing position `j` is then the candidates at `j - 1` and `j`, so counting takes
+    O(L * D ** 3) checks for L positions of up to D candidates instead of enumerating every solution.
+
+    Attributes:
+        total (int): The number of valid paths.
+
+    """
+
+    def __init__ (self, domains, check):
+        """ Counts the valid paths through a list of domains.
+
+        Args:
+            domains (list of list): The candidates for each position of the path, as searched by
+                `Generator.iter_backtrack`.
+            check (callable): Called as `check(path, j)` after position `j` of `path` is placed.
+
+        Raises:
+            ValueError: If `check` reads further back than `path[j - 2]`.
+
+        """
+        SolutionCounter.check_window(check)
+        self.domains = [list(candidates) for candidates in domains]
+        self.check = check
+        length = len(self.domains)
+        path = [None] * length
+
+        # `self.counts[j][(a, b)]` is the number of valid completions after placing `a` at `j - 1` and `b` at `j`.
+        self.counts = [None] * length
+        if length == 0:
+            self.total = 0
+            return
+        self.counts[-1] = dict.fromkeys(self.states(length - 1), 1)
+        for j in range(length - 2, -1, -1):
+            counts = {}
+            for a, b in self.states(j):
+                if j >= 1:
+                    path[j - 1] = a
+                path[j] = b
+                total = 0
+                for c in self.domains[j + 1]:
+                    path[j + 1] = c
+                    if (b, c) in self.counts[j + 1] and check(path, j + 1):
+                        total += self.counts[j + 1][(b, c)]
+                if total:
+                    counts[(a, b)] = total
+            self.counts[j] = counts
+        path[0] = None
+        self.total = sum(count for (a, b), count in self.counts[0].items() if self.accepts_first(b))
+
+    @staticmethod
+    def check_window (check):
+        """ Makes sure a rule check reads no further back than `path[j - 2]`, as counting and filtering assume.
+
+        Checks that do not declare a `window` (see `counterpoint.rules.RuleSet`) are taken to read no further.
+
+        Args:
+            check (callable): The rule check.
+
+        Raises:
+            ValueError: If `check` reads more than the last `WINDOW` positions.
+
+        """
+        window = getattr(check, 'window', WINDOW)
+        if window is None or window > WINDOW:
+            names = sorted(set(rule.name for rule in getattr(check, 'rules', [])
+                if rule.window is None or rule.window > WINDOW))
+            raise ValueError(f"Rules that read further back than the last {WINDOW} positions can only be searched "
+                f"exhaustively: {', '.join(names) or 'the rule check'}")
+
+    def states (self, j):
+        """ Gets every pair of candidates for positions `j - 1` and `j` (`None` stands in before position 0).
+        """
+        before = self.domains[j - 1] if j >= 1 else [None]
+        return [(a, b) for a in before for b in self.domains[j]]
+
+    def accepts_first (self, candidate):
+        """ Returns true if `candidate` passes the rule check at position 0.
+        """
+        return self.check([candidate] + [None] * (len(self.domains) - 1), 0)
+
+    def sample (self, rng=None):
+        """ Draws a valid path uniformly at random.
+
+        Each position is drawn with probability proportional to the number of valid completions it leaves.
+
+        Args:
+            rng (random.Random): The random number generator to draw from (a new unseeded one if None).
+
+        Returns:
+            tuple: A valid path, or None if there are none.
+
+        """
+        if self.total == 0:
+            return None
+        rng = rng if rng is not None else random.Random()
+        choices = [(key, count) for key, count in self.counts[0].items() if self.accepts_first(key[1])]
+        state = self.pick(choices, rng)
+        path = [state[1]]
+        for j in range(1, len(self.domains)):
+            full = path + [None] * (len(self.domains) - len(path))
+            choices = []
+            for c in self.domains[j]:
+                full[j] = c
+                count = self.counts[j].get((state[1], c))
+                if count and self.check(full, j):
+                    choices.append(((state[1], c), count))
+            state = self.pick(choices, rng)
+            path.append(state[1])
+        return tuple(path)
+
+    def path (self, index):
+        """ Gets the valid path at a position of the search order, without enumerating the ones before it.
+
+        Args:
+            index (int): The position of the path among the valid paths, in the order `Generator.iter_backtrack`
+                finds them (from 0 to `total - 1`).
+
+        Returns:
+            tuple: The valid path.
+
+        Raises:
+            IndexError: If `index` is out of range.
+
+        """
+        if not 0 <= index < self.total:
+            raise IndexError(f"Path {index} out of range for {self.total} valid paths.")
+        path = [None] * len(self.domains)
+        for j, candidates in enumerate(self.domains):
+            for c in candidates:
+                path[j] = c
+                count = self.counts[j].get((path[j - 1] if j else None, c))
+                if count and self.check(path, j):
+                    if index < count:
+                        break
+                    index -= count
+        return tuple(path)
+
+    def sample_distinct (self, count, rng=None):
+        """ Draws distinct valid paths uniformly at random (without replacement).
+
+        Args:
+            count (int): The number of paths to draw; all of them are drawn if there are no more than `count`.
+            rng (random.Random): The random number generator to draw from (a new unseeded one if None).
+
+        Returns:
+            list of tuple: The drawn paths, in search order.
+
+        """
+        rng = rng if rng is not None else random.Random()
+        indices = rng.sample(range(self.total), min(count, self.total))
+        return [self.path(index) for index in sorted(indices)]
+
+    @staticmethod
+    def pick (choices, rng):
+        """ Picks a key from a list of (key, weight) pairs with probability proportional to its weight.
+        """
+        target = rng.randrange(sum(weight for key, weight in choices))
+        for key, weight in choices:
+            if target < weight:
+                return key
+            target -= weight
@@ -0,0 +1,73 @@
+from collections import Counter
+
+class Diagnostics (object):
+    """ Collects diagnostics about rejected partial counterpoints during a search.
+
+    Searches take `diagnostics=None` by default, which costs one comparison per rejection and never touches the
+    filesystem. Passing a `Diagnostics` counts rejections per rule and, if a trace path is given, writes every
+    `trace_every`-th rejection of each rule to that file through a buffered writer.
+
+    Attributes:
+        rejections (collections.Counter): The number of rejections of each rule.
+
+    """
+
+    def __init__ (self, trace_path=None, trace_every=1, buffer_size=1 << 16):
+        """ Creates a diagnostics sink.
+
+        Args:
+            trace_path (str): The file to write sampled rejection traces to, or None to only count.
+            trace_every (int): The sampling interval: a trace line is written for every `trace_every`-th rejection of
+                each rule.
+            buffer_size (int): The size in bytes of the trace write buffer.
+
+        """
+        self.rejections = Counter()
+        self.trace_every = trace_every
+        self.trace = open(trace_path, 'w', buffering=buffer_size) if trace_path is not None else None
+
+    def reject (self, rule, problem, path, j):
+        """ Records that a rule rejected a partial counterpoint.
+
+        Args:
+            rule (str): The name of the rule (e.g. 'parallel_fifth').
+            problem (counterpoint.compact.Problem): The problem being searched.
+            path (list of int): The candidate indices of the partial counterpoint.
+            j (int): The position at which the rule was broken.
+
+        """
+        self.rejections[rule] += 1
+        if self.trace is not None and self.rejections[rule] % self.trace_every == 0:
+            midi = ' '.join(str(problem.midi[k][path[k]]) for k in range(j + 1))
+            self.trace.write(f"{rule}\t{j}\t{midi}\n")
+
+    def merge (self, rejections):
+        """ Adds rejection counts collected elsewhere (e.g. in a worker process).
+
+        Args:
+            rejections (dict): The number of rejections of each rule.
+
+        """
+        self.rejections.update(rejections)
+
+    def as_dict (self):
+        """ Gets the rejection counts.
+
+        Returns:
+            dict: The number of rejections of each rule.
+
+        """
+        return dict(self.rejections)
+
+    def close (self):
+        """ Flushes and closes the trace file, if there is one.
+        """
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.close()
@@ -1,25 +1,44 @@
 from __future__ import division
 
-import music21
-import numpy
+import heapq
+import math
 import random
-import sys
-from random import randint
+import time
 import itertools
-import math
-import os
-from pprint import pprint
+from collections import deque
 from functools import partial
-from inspect import getmembers
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto, unique
 
+from counterpoint.anytime import SearchState
+from counterpoint.cache import LRUCache
+from counterpoint.compact import Compact, CANONICAL, OUTLINE_START, REST
+from counterpoint.consistency import DomainFilter
+from counterpoint.counting import SolutionCounter
+from counterpoint.diagnostics import Diagnostics
+from counterpoint.keys import Key
+from counterpoint.musicxml import MusicXML
+from counterpoint.rules import RuleSet
+from counterpoint.scoring import Scorer
+from counterpoint.stats import Stats
+
+# The intervals above the cantus firmus that counterpoint candidates are drawn from.
+HARMONIC_INTERVALS = ['m3', 'M3', 'p4', 'p5', 'm6', 'M6', 'p8']
+ALL_INTERVALS = ['p1', 'm2', 'M2', 'm3', 'M3', 'p4', 'A4', 'p5', 'm6', 'M6', 'm7', 'M7', 'p8']
+
 class Generator (object):
     """ Provides counterpoint generation functions.
+
+    `music21` is only imported by the functions that parse, build or render notes, so searching compact problems (see
+    `Generator.get_line_problem`) and writing them with `counterpoint.midi.Midi` never loads it.
     """
 
+    above_note_cache = LRUCache(4096) # End note names keyed on (start note name with octave, interval string).
+    problem_cache = LRUCache(256) # Canonical problems keyed on (species, canonical cantus firmus).
+
     @staticmethod
     def get_input (path):
-        """ Converts a MusicXML file to a list of notes.
+        """ Converts a MusicXML file to a list of notes (see `counterpoint.musicxml.MusicXML.load`).
 
         Args:
             path (str): The path of the file to load.
@@ -28,14 +47,15 @@ class Generator (object):
             list of music21.note.Note: A list of all notes in the file at `path`.
 
         """
-        score = music21.converter.parse(path)
-        notes = score.flat.notes # Flatten piece, get notes iterator.
-        return list(notes) # Using `list` consumes the whole iterator.
+        return MusicXML.load(path)
 
     @staticmethod
     def get_above_note (note, interval):
         """ Computes the end note above a start note from a music21 interval description string (e.g. 'm3').
 
+        Transpositions are memoized in `Generator.above_note_cache`. Each call returns a new note with the duration of
+        `note`, so callers can change it without affecting the cache.
+
         Args:
             note (music21.note.Note): The start note.
             interval (str): The music21 interval description string (e.g. 'm3').
@@ -44,9 +64,16 @@ class Generator (object):
             music21.note.Note: The end note at the specified interval above `note`.
 
         """
-        interval = music21.interval.Interval(interval)
-        interval.noteStart = note # This assignment modifies `interval.noteEnd`.
-        return interval.noteEnd
+        import music21
+
+        def transpose ():
+            transposition = music21.interval.Interval(interval)
+            transposition.noteStart = note # This assignment modifies `transposition.noteEnd`.
+            return transposition.noteEnd.nameWithOctave
+
+        # Only the name of the end note is cached, so every call can hand out a new note that is safe to modify.
+        name = Generator.above_note_cache.get((note.nameWithOctave, interval), transpose)
+        return music21.note.Note(name, quarterLength=note.quarterLength)
 
     @staticmethod
     def get_above_notes (note, intervals):
@@ -75,7 +102,7 @@ class Generator (object):
             list of music21.note.Note: A list of possibilities for the first note of the counterpoint.
 
         """
-        return note + Generator.get_above_notes(note, ['p5', 'p8'])
+        return [note] + Generator.get_above_notes(note, ['p5', 'p8'])
 
     @staticmethod
     def get_above_fifth (root):
@@ -140,7 +167,7 @@ class Generator (object):
             list of music21.note.Note: A list of the notes which are harmonic to `root`.
 
         """
-        return Generator.get_above_notes(root, ['m3', 'M3',' p4', 'p5', 'm6', 'M6', 'p8'])
+        return Generator.get_above_notes(root, HARMONIC_INTERVALS)
 
     @staticmethod
     def is_same_note (x, y):
@@ -180,7 +207,8 @@ class Generator (object):
             bool: True if `interval` consists of `distance` semitones, otherwise false.
 
         """
-        interval == music21.interval.ChromaticInterval(distance)
+        import music21
+        return interval == music21.interval.ChromaticInterval(distance)
 
     @staticmethod
     def is_chromatic_distance_in (interval, distances):
@@ -195,7 +223,7 @@ class Generator (object):
 
         """
         # The `any` function is equivalent to folding using `or` with 'false' as the initialiser.
-        any(map(partial(Generator.is_chromatic_distance, interval), distances))
+        return any(map(partial(Generator.is_chromatic_distance, interval), distances))
 
     @staticmethod
     def big_leap_type (x, y):
@@ -209,6 +237,7 @@ class Generator (object):
             BigLeapType: The type of big leap between the two notes (may be NOT_BIG_LEAP).
 
         """
+        import music21
         if x.isRest or y.isRest: # TODO: Examine semantics here carefully.
             return Generator.BigLeapType.NOT_BIG_LEAP
         interval = music21.interval.notesToChromatic(x, y)
@@ -248,6 +277,7 @@ class Generator (object):
             int: The number of half steps in the interval between the two notes.
 
         """
+        import music21
         interval = music21.interval.Interval(x, y)
         return interval.cents / 100
 
@@ -306,26 +336,26 @@ class Generator (object):
 
     @staticmethod
     def is_exposed_tritone (notes):
-        """ Checks for an exposed tritone in a list of notes.
+        """ Checks for an exposed tritone in a list of notes: a run of moves in one direction that adds up to exactly
+        six semitones.
+
+        Runs the outline automaton (see `counterpoint.compact.Compact.outline`) along the notes, one move at a time,
+        stopping at the first outline.
 
         Args:
-            notes (list of music21.note.Note): The list of notes to check.
+            notes (list of music21.note.GeneralNote): The list of notes to check.
 
         Returns:
             bool: True if the note list contains an exposed tritone, otherwise false.
 
         """
-        note_pairs = Generator.pairwise(notes) # Pair up notes with their neighbours.
-        directions = map(lambda p : Generator.get_direction(p[0], p[1]), note_pairs) # Get direction of each skip.
-        direction_pairs = Generator.pairwise(directions) # Pair up directions with their neighbours.
-
-        # Calculate cumulative sum of the magnitude of each interval.
-        interval_magnitudes = map(lambda p : Generator.get_interval_magnitude(p[0], p[1]), note_pairs)
-        cumulative_magnitudes = numpy.cumsum(interval_magnitudes)
-
-        # Zip directions and interval magnitudes together into data points and decide.
-        points = zip(direction_pairs, cumulative_magnitudes)
-        return list(map(lambda p : p[1] == 6 and abs(p[0][1] - p[0][0]) >= 2, points))[-1]
+        midi = [Compact.from_note(note)[0] for note in notes]
+        state = OUTLINE_START
+        for am, bm in Generator.pairwise(midi):
+            state, exposed = Compact.outline(state, am, bm)
+            if exposed:
+                return True
+        return Compact.outlines_tritone(state)
 
     @staticmethod
     def recover (leap, x, y):
@@ -358,6 +388,7 @@ class Generator (object):
             bool: True if `x` and `y` are at the interval specified, otherwise false.
 
         """
+        import music21
         return music21.interval.notesToInterval(x, y) == music21.interval.Interval(interval)
 
     @staticmethod
@@ -400,106 +431,525 @@ class Generator (object):
         return allpath
 
     @staticmethod
-    def firstspeciesabove(cf):
-        answer=[]
-        possibilities=[]
-        temp=[]
-        possibilities.append(Generator.get_upper_first_note(cf[0]))
-        for n in range(1,len(cf)-2):
-            possibilities.append(Generator.get_above_harmonic(cf[n]))
-        temp.append(Generator.get_above_major_sixth(cf[-2]))
-        possibilities.append(temp)
-        possibilities.append(Generator.get_above_harmonic(cf[-1]))
-        allpossibilities=Generator.getallpath(possibilities)
-
-        c=0
-
-        f = open('test4log', 'w')
-        for plist in allpossibilities:
-            flag=False
-            c=c+1
-            print("running index:" +str(c))
-            print("running answer"+str(plist))
-
-            if Generator.is_exposed_tritone(plist):
-                f.write('tritone')
-                break
-
-            for i in range(1,len(cf)-1):
-                note=plist[i]
-                notebefore=plist[i-1]
-                noteafter=plist[i+1]
-                if Generator.is_same_note(notebefore, note):
-                    f.write('Repeat note skipping:'+str(c))
-                    f.write(' \n')
-                if Generator.is_parallel_fifth(cf[i-1], notebefore, cf[i], note):
-                    f.write('parallelfifth skipping:'+str(c))
-                    f.write(' \n')
-                if Generator.is_parallel_octave(cf[i-1], notebefore, cf[i], note):
-                    f.write('paralleloctave skipping:'+str(c))
-                    f.write(' \n')
-                if Generator.big_leap_type(notebefore, note)==Generator.BigLeapType.BIG_LEAP:
-                    f.write('Leap is too big skipping:'+str(c))
-                    f.write(' \n')
-                if Generator.is_special_leap(notebefore, note):
-                    # print("special leaps detected:"+str(Generator.big_leap_type(notebefore, note)))
-                    if not Generator.recover(Generator.bigleap(notebefore, note), note, noteafter):
-                        f.write('no recovery, break:'+str(c))
-                        f.write(' \n')
-
-                if Generator.is_same_note(notebefore, note):
-                    flag=True
-                    break
-                if Generator.is_parallel_fifth(cf[i-1], notebefore, cf[i], note):
-                    flag=True
+    def iter_backtrack (domains, check):
+        """ Searches depth-first for the paths through a list of domains that satisfy a rule check, yielding each one.
+
+        The path is extended one position at a time and `check` is called as soon as each position is placed, so a
+        rule violation cuts off every path sharing that prefix instead of being found once per complete path. Only the
+        current path and one iterator per position are held in memory.
+
+        Args:
+            domains (list of list): The candidates for each position of the path.
+            check (callable): Called as `check(path, j)` after position `j` of `path` is placed. Returns true if no
+                rule decidable from `path[0..j]` is violated, otherwise false.
+
+        Yields:
+            tuple: Each accepted path, in the same order as `itertools.product(*domains)`.
+
+        """
+        if not domains:
+            return
+        path = []
+        stack = [iter(domains[0])] # One iterator over the remaining candidates per placed position.
+        while stack:
+            j = len(stack) - 1
+            if len(path) > j: # Resuming position `j`, so drop the candidate tried there last.
+                path.pop()
+            for candidate in stack[j]:
+                path.append(candidate)
+                if check(path, j):
                     break
-                if Generator.is_parallel_octave(cf[i-1], notebefore, cf[i], note):
-                    flag=True
+                path.pop()
+            else: # Position `j` is exhausted, backtrack.
+                stack.pop()
+                continue
+            if j + 1 == len(domains):
+                yield tuple(path)
+            else:
+                stack.append(iter(domains[j + 1]))
+
+    @staticmethod
+    def top_k (problem, k, check=None, scorer=None):
+        """ Finds the highest-scoring valid paths through a problem by depth-first branch and bound.
+
+        Children are tried best first (by their gain plus `counterpoint.scoring.Scorer.remaining`), and a branch is cut
+        off as soon as its score so far plus that admissible bound cannot beat the k-th best path found, so only a
+        small part of the space is enumerated. Like `Generator.iter_backtrack`, only the current path is held in memory,
+        besides the k best paths.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            k (int): The number of paths to find.
+            check (callable): The rule check (see `Generator.iter_backtrack`), or None for `Generator.get_check` over
+                the filtered domains of `Generator.get_domains`.
+            scorer (counterpoint.scoring.Scorer): The scoring model, or None for the default weights.
+
+        Returns:
+            list of tuple: The score and candidate indices of the `k` best valid paths (fewer if there are not that
+                many), best first; ties are broken in `itertools.product` order.
+
+        """
+        domains = Generator.get_domains(problem) if check is None else problem.domains()
+        check = check if check is not None else Generator.get_check(problem)
+        scorer = scorer if scorer is not None else Scorer(problem)
+        n = len(problem.midi)
+        if k <= 0 or n == 0:
+            return []
+        best = [] # A min-heap of (score, negated path), so the worst of the best paths is on top.
+        slack = 1e-9 # Allows for rounding in the bounds.
+
+        def children (j, previous):
+            remaining = scorer.remaining[j]
+            keys = [(scorer.local(j, previous, b) + remaining[b], b) for b in domains[j]]
+            keys.sort(key=lambda key: -key[0]) # Stable, so ties stay in `itertools.product` order.
+            return iter(keys)
+
+        path, scores = [], [0.0] # The score of each prefix of `path`.
+        stack = [children(0, None)]
+        while stack:
+            j = len(stack) - 1
+            if len(path) > j:
+                path.pop()
+                scores.pop()
+            optimism = scores[j] + scorer.monotony_bound[j] + scorer.end_bound
+            placed = False
+            for key, candidate in stack[j]:
+                if len(best) == k and optimism + key + slack < best[0][0]:
+                    break # The remaining candidates have lower keys, so none of them can do better.
+                path.append(candidate)
+                if check(path, j):
+                    score = scores[j] + scorer.gain(path, j)
+                    bound = score + scorer.remaining[j][candidate] + scorer.end_bound
+                    if len(best) < k or bound + slack >= best[0][0]:
+                        placed = True
+                        break
+                path.pop()
+            if not placed: # Position `j` is exhausted or cut off, backtrack.
+                stack.pop()
+                continue
+            if j + 1 == n:
+                entry = (score, tuple(-i for i in path))
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+                scores.append(score)
+            else:
+                scores.append(score)
+                stack.append(children(j + 1, candidate))
+        return sorted(((score, tuple(-i for i in negated)) for score, negated in best), key=lambda r: (-r[0], r[1]))
+
+    @staticmethod
+    def beam_search (problem, width, k=1, check=None, scorer=None):
+        """ Finds high-scoring valid paths through a problem by beam search, for problems too big to search exactly.
+
+        Only the `width` best partial paths are kept after each position, ranked by their score so far plus
+        `counterpoint.scoring.Scorer.remaining`. Every hard rule is still checked as each position is placed, and a
+        `counterpoint.counting.SolutionCounter`, built first over domains filtered by
+        `counterpoint.consistency.DomainFilter`, rules out partial paths that no valid completion can follow
+        (e.g. ones that cannot reach the cadence), so the beam never runs dry while valid paths exist. The beam holds
+        O(width * L) candidate indices, besides the O(L * D ** 2) completion counts for up to D candidates per position,
+        and the search takes time linear in the number of positions L.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            width (int): The number of partial paths to keep at each position.
+            k (int): The number of paths to return.
+            check (callable): The rule check (see `Generator.iter_backtrack`), or None for `Generator.get_check`.
+                Besides the rules it is given, the filtering and completion counts assume it reads no further back than
+                `path[j - 2]`.
+            scorer (counterpoint.scoring.Scorer): The scoring model, or None for the default weights.
+
+        Returns:
+            list of tuple: The score and candidate indices of the best `k` paths in the final beam, best first; not
+                necessarily the best paths overall (see `Generator.top_k`).
+
+        Raises:
+            ValueError: If `check` reads further back than `path[j - 2]` (e.g. with the `exposed_tritone` rule); use
+                `Generator.top_k` instead.
+
+        """
+        check = check if check is not None else Generator.get_check(problem)
+        scorer = scorer if scorer is not None else Scorer(problem)
+        n = len(problem.midi)
+        domains = DomainFilter(problem.domains(), check).domains
+        counter = SolutionCounter(domains, check)
+        if counter.total == 0 or width <= 0:
+            return []
+        path = [None] * n
+        beam = [(0.0, ())] # The score so far and the candidate indices of each partial path.
+        for j in range(n):
+            expanded = []
+            for score, prefix in beam:
+                path[:j] = prefix
+                previous = prefix[-1] if j else None
+                for candidate in domains[j]:
+                    if (previous, candidate) not in counter.counts[j]:
+                        continue # No valid completion follows.
+                    path[j] = candidate
+                    if check(path, j):
+                        gain = scorer.gain(path, j)
+                        expanded.append((score + gain, prefix + (candidate,)))
+            remaining = scorer.remaining[j]
+            # Stable on ties, so the beam stays in `itertools.product` order.
+            beam = heapq.nlargest(width, expanded, key=lambda entry: entry[0] + remaining[entry[1][-1]])
+            path[j] = None
+        return sorted(beam, key=lambda entry: (-entry[0], entry[1]))[:k]
+
+    @staticmethod
+    def iter_interruptible (domains, check, state, deadline=None, token=None, check_every=256):
+        """ Searches like `Generator.iter_backtrack`, but stops at a deadline or on cancellation and can be resumed.
+
+        `state` is kept up to date after every path yielded and when the search stops, so a caller that stops reading
+        early can also resume from it. Passing it back in (or a copy restored with
+        `counterpoint.anytime.SearchState.from_dict`) resumes the search where it left off, without repeating paths.
+
+        Args:
+            domains (list of list): The candidates for each position of the path.
+            check (callable): Called as `check(path, j)` after position `j` of `path` is placed.
+            state (counterpoint.anytime.SearchState): The progress of the search, updated in place.
+            deadline (float): The `time.perf_counter()` time to stop at, or None for no deadline.
+            token (counterpoint.anytime.CancellationToken): A token to stop the search with, or None.
+            check_every (int): The number of search nodes between checks of the deadline and token. At least this
+                many nodes are checked before the deadline is honoured, so a resumed search always makes progress.
+
+        Yields:
+            tuple: Each accepted path after the frontier of `state`, in the same order as `itertools.product(*domains)`.
+
+        Raises:
+            ValueError: If `state` belongs to a search through domains of other sizes.
+
+        """
+        sizes = tuple(len(candidates) for candidates in domains)
+        if state.sizes is not None and state.sizes != sizes:
+            raise ValueError("The search state belongs to a different problem.")
+        state.sizes = sizes
+        if state.exhaustive or not all(sizes): # An empty domain leaves no path to search.
+            state.finish()
+            return
+
+        def stopping ():
+            return (deadline is not None and time.perf_counter() > deadline) or (token is not None and token.cancelled)
+
+        # `nexts[j]` is the index of the next candidate to try at position `j`: one past the one placed, for `j < d`.
+        nexts = list(state.nexts or (0,))
+        path = [domains[j][i - 1] for j, i in enumerate(nexts[:-1])]
+        d = len(path)
+        if token is not None and token.cancelled:
+            state.nexts = tuple(nexts)
+            return
+        base, nodes = state.nodes, 0
+        while True:
+            candidates = domains[d]
+            for i in range(nexts[d], sizes[d]):
+                if nodes and nodes % check_every == 0 and stopping():
+                    nexts[d] = i
+                    state.nodes = base + nodes
+                    state.nexts = tuple(nexts)
+                    return
+                nodes += 1
+                path.append(candidates[i])
+                if check(path, d):
+                    nexts[d] = i + 1
                     break
-                if Generator.big_leap_type(notebefore, note)==Generator.BigLeapType.BIG_LEAP:
-                    flag=True
+                path.pop()
+            else: # Position `d` is exhausted, backtrack.
+                if d == 0:
                     break
-                if Generator.is_special_leap(notebefore, note):
-                    if not Generator.recover(Generator.bigleap(notebefore, note), note, noteafter):
-                        flag=True
-                        break
+                nexts.pop()
+                path.pop()
+                d -= 1
+                continue
+            if d + 1 == len(domains):
+                state.found += 1
+                state.nodes = base + nodes
+                state.nexts = tuple(nexts)
+                yield tuple(path)
+                path.pop()
+            else:
+                nexts.append(0)
+                d += 1
+        state.nodes = base + nodes
+        state.finish()
+
+    @staticmethod
+    def backtrack (domains, check):
+        """ Gets every path through a list of domains that satisfies a rule check (see `iter_backtrack`).
+
+        Args:
+            domains (list of list): The candidates for each position of the path.
+            check (callable): Called as `check(path, j)` after position `j` of `path` is placed.
+
+        Returns:
+            list of tuple: Every accepted path, in the same order as `itertools.product(*domains)`.
+
+        """
+        return list(Generator.iter_backtrack(domains, check))
+
+    @staticmethod
+    def search_subtree (problem, prefix, count_rejections=False, profile=False, domains=None):
+        """ Finds every valid path through a problem that starts with a given prefix.
+
+        This is the unit of work sent to worker processes by `Generator.iter_parallel`; its arguments and result are
+        plain ints so they are cheap to pass between processes.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            prefix (tuple of int): The candidate indices of the first positions, already checked against the rules.
+            count_rejections (bool): Whether to count rejections per rule.
+            profile (bool): Whether to collect profiling statistics.
+            domains (list of list of int): The candidate indices at each position (see `Generator.get_domains`), or
+                None to filter them here.
+
+        Returns:
+            tuple: The candidate indices of each valid path, in `itertools.product` order, the number of rejections
+                of each rule (empty unless `count_rejections` is set) and the statistics (None unless `profile` is set).
+
+        """
+        diagnostics = Diagnostics() if count_rejections else None
+        stats = Stats() if profile else None
+        domains = domains if domains is not None else Generator.get_domains(problem)
+        domains = [[i] for i in prefix] + domains[len(prefix):]
+        check = Generator.get_check(problem, diagnostics, stats=stats)
+        depth = len(prefix)
+        paths = Generator.backtrack(domains, lambda path, j: j < depth or check(path, j)) # The prefix is already valid.
+        return paths, diagnostics.as_dict() if diagnostics is not None else {}, stats.as_dict() if profile else None
+
+    @staticmethod
+    def iter_parallel (problem, workers, depth=None, diagnostics=None, stats=None):
+        """ Searches a problem on several processes, splitting the search tree by the candidates at its first positions.
+
+        Subtrees are submitted in order, and besides the one being yielded, at most `2 * workers` of them are in flight
+        (running, queued or finished but not yet yielded) at a time. Each worker returns the paths of its subtree at
+        once, so memory is bounded by the largest subtrees in flight instead of the number of solutions, and the paths
+        of a subtree are yielded as soon as it and the ones before it finish.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            workers (int): The number of worker processes.
+            depth (int): The number of positions that each subproblem fixes. If None, the smallest depth giving at
+                least four valid prefixes per worker is used.
+            diagnostics (counterpoint.diagnostics.Diagnostics): Where to add the rejection counts from the workers, or
+                None. Traces are not written for rejections inside workers.
+            stats (counterpoint.stats.Stats): Where to add the profiling statistics from the workers, or None.
+
+        Yields:
+            tuple of int: The candidate indices of each valid path, in the same order as a single-process search.
+
+        """
+        domains = Generator.get_domains(problem, stats)
+        check = Generator.get_check(problem)
+        if depth is None:
+            depth = 1
+            while depth < len(domains) - 1 and len(Generator.backtrack(domains[:depth], check)) < 4 * workers:
+                depth += 1
+        # Rules only look back, so prefixes can be checked on their own.
+        prefixes = Generator.backtrack(domains[:depth], Generator.get_check(problem, diagnostics, stats=stats))
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        futures = deque()
+        pending = iter(prefixes)
+        count_rejections, profile = diagnostics is not None, stats is not None
+
+        def submit (count):
+            for prefix in itertools.islice(pending, count):
+                futures.append(executor.submit(Generator.search_subtree, problem, prefix, count_rejections, profile,
+                    domains))
+
+        try:
+            submit(2 * workers)
+            while futures: # Collect in submission order so the output does not depend on scheduling.
+                paths, rejections, statistics = futures.popleft().result()
+                submit(1)
+                if diagnostics is not None:
+                    diagnostics.merge(rejections)
+                if stats is not None:
+                    stats.merge(statistics)
+                for path in paths:
+                    yield path
+        finally:
+            for future in futures: # Don't finish the remaining subproblems if the caller stops early.
+                future.cancel()
+            executor.shutdown(wait=False) # Nor wait for the running ones, whose paths are no longer wanted.
+
+    @staticmethod
+    def iter_search (problem, diagnostics=None, workers=None, stats=None, store=None, budget=None, token=None,
+            state=None):
+        """ Yields the candidate indices of each valid path through a problem, on one process or several.
+
+        Given a `budget`, `token` or `state`, the search is interruptible (see `Generator.iter_interruptible`): it runs
+        in this process, stops when the budget runs out or the token is cancelled, and reports its progress in `state`.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            diagnostics (counterpoint.diagnostics.Diagnostics): Where rejections are recorded, or None.
+            workers (int): The number of worker processes, or None to search in this process.
+            stats (counterpoint.stats.Stats): Where the search is profiled, or None.
+            store (counterpoint.store.SolutionStore): Where solutions are looked up before searching, and stored after
+                a search runs to the end, or None. Nothing is recorded to `diagnostics` or `stats` on a hit. An
+                interruptible search only looks solutions up, and only when starting afresh; a hit yields every path
+                whatever the budget, and marks `state` as exhaustive and `stored` without adding to its nodes.
+            budget (float): The seconds the search may run for once the domains are filtered, or None for no limit. Each
+                run checks at least `check_every` nodes (see `Generator.iter_interruptible`), so resuming always makes
+                progress.
+            token (counterpoint.anytime.CancellationToken): A token to stop the search with, or None.
+            state (counterpoint.anytime.SearchState): Where the progress of an interruptible search is kept, or None.
+                Pass a stopped search's state to resume it.
+
+        Returns:
+            iterator of tuple of int: The candidate indices of each valid path, in `itertools.product` order.
+
+        Raises:
+            ValueError: If an interruptible search is asked to run on several workers.
+
+        """
+        if budget is not None or token is not None or state is not None:
+            if workers is not None and workers > 1:
+                raise ValueError("An interruptible search runs in one process.")
+            state = state if state is not None else SearchState()
+            domains = Generator.get_domains(problem, stats)
+            deadline = time.perf_counter() + budget if budget is not None else None # The budget is for searching.
+            if store is not None and state.frontier is None and not state.exhaustive:
+                paths = store.get(problem)
+                if paths is not None:
+                    state.sizes = tuple(len(candidates) for candidates in domains)
+                    state.found += len(paths)
+                    state.stored = True
+                    state.finish()
+                    return iter(paths)
+            return Generator.iter_interruptible(domains, Generator.get_check(problem, diagnostics, stats=stats), state,
+                deadline, token)
+        if store is not None:
+            paths = store.get(problem)
+            if paths is not None:
+                return iter(paths)
+            return Generator.iter_storing(problem, store, Generator.iter_search(problem, diagnostics, workers, stats))
+        if workers is not None and workers > 1:
+            return Generator.iter_parallel(problem, workers, diagnostics=diagnostics, stats=stats)
+        return Generator.iter_backtrack(Generator.get_domains(problem, stats),
+            Generator.get_check(problem, diagnostics, stats=stats))
+
+    @staticmethod
+    def iter_storing (problem, store, paths):
+        """ Passes on the valid paths through a problem, storing them all once they run out.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            store (counterpoint.store.SolutionStore): Where to store the paths.
+            paths (iterator of tuple of int): Every valid path through `problem`.
+
+        Yields:
+            tuple of int: Each path of `paths`. If the caller stops early, nothing is stored.
+
+        """
+        found = []
+        for path in paths:
+            found.append(path)
+            yield path
+        store.put(problem, found)
+
+    @staticmethod
+    def first_species_domains (cf):
+        """ Gets the candidate notes for each position of a first species counterpoint above a cantus firmus.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+
+        Returns:
+            list of list of music21.note.Note: The candidates for each position of the counterpoint.
+
+        """
+        possibilities = [Generator.get_upper_first_note(cf[0])]
+        for n in range(1, len(cf) - 2):
+            possibilities.append(Generator.get_above_harmonic(cf[n]))
+        possibilities.append([Generator.get_above_major_sixth(cf[-2])])
+        possibilities.append(Generator.get_above_harmonic(cf[-1]))
+        return possibilities
+
+    @staticmethod
+    def above_line (pitch, intervals, length):
+        """ Gets the compact notes at intervals above a compact pitch (see `Generator.get_above_notes`).
+
+        Args:
+            pitch (tuple): The MIDI number and diatonic step number of the start pitch, and possibly more.
+            intervals (list of str): A list of music21 interval description strings (e.g. 'm3').
+            length (float): The quarter length of the notes.
+
+        Returns:
+            list of tuple: The MIDI number, diatonic step number and quarter length of each note.
+
+        """
+        return [Compact.above(pitch[0], pitch[1], interval) + (length,) for interval in intervals]
+
+    @staticmethod
+    def first_species_candidates (cf):
+        """ Gets the candidates for each position of a first species counterpoint above a cantus firmus in compact form.
+
+        Mirrors `Generator.first_species_domains` without building notes.
+
+        Args:
+            cf (list of tuple): The cantus firmus (see `counterpoint.compact.Compact.line`).
+
+        Returns:
+            list of list of tuple: The (MIDI number, diatonic step number, quarter length) candidates for each position.
 
-            if not flag:
-                if Generator.is_same_note(plist[-2], plist[-1]):
-                    f.write('Repeat note skipping lastnote:'+str(c))
-                    f.write(' \n')
-                if Generator.is_parallel_fifth(cf[-2], plist[-2], cf[-1], plist[-1]):
-                    f.write('parallelfifth skipping lastnote:'+str(c))
-                    f.write(' \n')
-                if Generator.is_parallel_octave(cf[-2], plist[-2], cf[-1], plist[-1]):
-                    f.write('paralleloctave skipping lastnote:'+str(c))
-                    f.write(' \n')
-                if Generator.big_leap_type(plist[-2], plist[-1])==Generator.BigLeapType.BIG_LEAP:
-                    f.write('Leap is too big skipping lastnote:'+str(c))
-                    f.write(' \n')
-                if Generator.is_special_leap(plist[-2], plist[-1]):
-                    f.write('no recovery, break lastnote:'+str(c))
-                    f.write(' \n')
-
-                if Generator.is_same_note(plist[-2], plist[-1]):
-                    flag=True
-                if Generator.is_parallel_fifth(cf[-2], plist[-2], cf[-1], plist[-1]):
-                    flag=True
-                if Generator.is_parallel_octave(cf[-2], plist[-2], cf[-1], plist[-1]):
-                    flag=True
-                if Generator.big_leap_type(plist[-2], plist[-1])==Generator.BigLeapType.BIG_LEAP:
-                    flag=True
-
-            if not flag:
-                answer.append(plist)
-        f.close()
-
-        f = open('test4first', 'w')
-        for an in answer:
-            f.write(str(an))
-            f.write(' \n')
-        f.close()
-        return answer
+        """
+        above = Generator.above_line
+        possibilities = [[cf[0]] + above(cf[0], ['p5', 'p8'], cf[0][2])]
+        for n in range(1, len(cf) - 2):
+            possibilities.append(above(cf[n], HARMONIC_INTERVALS, cf[n][2]))
+        possibilities.append(above(cf[-2], ['M6'], cf[-2][2]))
+        possibilities.append(above(cf[-1], HARMONIC_INTERVALS, cf[-1][2]))
+        return possibilities
+
+    @staticmethod
+    def first_species_problem (cf):
+        """ Builds the compact search problem for a first species counterpoint above a cantus firmus.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+
+        Returns:
+            counterpoint.compact.Problem: The problem in compact form.
+
+        """
+        line = Compact.line(cf)
+        return Compact.from_lines(1, line, Generator.first_species_candidates(line))
+
+    @staticmethod
+    def iter_first_species (cf, diagnostics=None, workers=None, stats=None, store=None, budget=None, token=None,
+            state=None, key=None):
+        """ Yields each valid first species counterpoint above a cantus firmus as soon as it is found.
+
+        The search runs on compact pitches; notes are only built for the counterpoints that are yielded.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            diagnostics (counterpoint.diagnostics.Diagnostics): Where rejections are recorded, or None.
+            workers (int): The number of worker processes to search on, or None to search in this process.
+            stats (counterpoint.stats.Stats): Where the search and the problem cache are profiled, or None.
+            store (counterpoint.store.SolutionStore): The persistent solution cache to use, or None.
+            budget (float): The seconds to search for before returning what was found, or None for no limit.
+            token (counterpoint.anytime.CancellationToken): A token to stop the search with, or None.
+            state (counterpoint.anytime.SearchState): Where the progress of the search is reported (whether it was
+                exhaustive, its coverage and its frontier), or None. Pass a stopped search's state to resume it.
+            key (counterpoint.keys.Key or str): The key to keep the counterpoint in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Yields:
+            tuple of music21.note.Note: Each valid counterpoint.
+
+        """
+        if stats is not None:
+            stats.watch('problem', Generator.problem_cache)
+        problem = Generator.get_problem(cf, 1, key)
+        for path in Generator.iter_search(problem, diagnostics, workers, stats, store, budget, token, state):
+            yield Compact.to_notes(problem, path)
+
+    @staticmethod
+    def firstspeciesabove(cf, diagnostics=None, stats=None, store=None, budget=None, token=None, state=None, key=None):
+        return list(Generator.iter_first_species(cf, diagnostics, stats=stats, store=store, budget=budget, token=token,
+            state=state, key=key))
 
     @staticmethod
     def clone_note (note):
@@ -512,25 +962,20 @@ class Generator (object):
             music21.note.Note: The cloned note.
 
         """
+        import music21
         return music21.note.Note(str(note.nameWithOctave))
 
     @staticmethod
     def getupperfirstnote2(n):
+        import music21
         notelist=[]
 
         notelist.append(music21.note.Rest(quarterLength=2.0))
 
-        interval = music21.interval.Interval('p5')
-        interval.noteStart = n
-        i=interval.noteEnd
-        i.quarterLength = 2
-        notelist.append(i)
-
-        interval = music21.interval.Interval('p8')
-        interval.noteStart = n
-        i=interval.noteEnd
-        i.quarterLength = 2
-        notelist.append(i)
+        for interval in ['p5', 'p8']:
+            i = Generator.get_above_note(n, interval)
+            i.quarterLength = 2
+            notelist.append(i)
 
         pitch = n.nameWithOctave
         note2 = music21.note.Note(str(pitch))
@@ -571,16 +1016,17 @@ class Generator (object):
 
     @staticmethod
     def get_all_above_notes (note):
-        notes = Generator.get_above_notes(note, ['p1', 'm2', 'M2', 'm3', 'M3', 'p4', 'A4', 'p5', 'm6', 'M6', 'm7', 'M7', 'p8'])
+        notes = Generator.get_above_notes(note, ALL_INTERVALS)
         return Generator.set_quarter_lengths(2, notes)
 
     @staticmethod
     def get_all_above_harmonic (note):
-        notes = Generator.get_above_notes(note, ['m3', 'M3', 'p4', 'p5', 'm6', 'M6', 'p8'])
+        notes = Generator.get_above_notes(note, HARMONIC_INTERVALS)
         return Generator.set_quarter_lengths(2, notes)
 
     @staticmethod
     def ifinharmonic(cf, note):
+        import music21
         interval=music21.interval.notesToChromatic(cf, note)
         if (interval==music21.interval.ChromaticInterval(1) or interval==music21.interval.ChromaticInterval(-1) or
             interval==music21.interval.ChromaticInterval(2) or interval==music21.interval.ChromaticInterval(-2) or
@@ -594,6 +1040,7 @@ class Generator (object):
 
     @staticmethod
     def approleftstep(notebefore, note, noteafter):
+        import music21
         if notebefore.isRest:
             return False
 
@@ -612,154 +1059,434 @@ class Generator (object):
         return decision
 
     @staticmethod
-    def secondspeciesabove(cf):
-        o=0
-        answer=[]
-        possibilities=[]
+    def second_species_domains (cf):
+        """ Gets the candidate notes for each position of a second species counterpoint above a cantus firmus.
+
+        Position `2 * k` is the downbeat and `2 * k + 1` the upbeat over `cf[k]`; the final position is a single note
+        over the last note of the cantus firmus.
 
-        possibilities.append(Generator.getupperfirstnote2(cf[0]))
-        for n in range(1,2*(len(cf))-4):
-            # print("The nth note: "+str(n))
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+
+        Returns:
+            list of list of music21.note.Note: The candidates for each position of the counterpoint.
+
+        """
+        o = 0
+        possibilities = [Generator.getupperfirstnote2(cf[0])]
+        for n in range(1, 2 * len(cf) - 4):
             if n % 2 == 1:
-                possibilities.append(Generator.get_all_above_notes(cf[o]))
-                o=o+1
+                possibilities.append(list(Generator.get_all_above_notes(cf[o])))
+                o = o + 1
             else:
-                possibilities.append(Generator.get_all_above_harmonic(cf[o]))
+                possibilities.append(list(Generator.get_all_above_harmonic(cf[o])))
+        possibilities.append([Generator.get_above_fifth(cf[-2])])
+        possibilities.append(Generator.get_above_sixth(cf[-2]))
+        possibilities.append([Generator.get_above_octave(cf[-1])])
+        return possibilities
 
-        temp=[]
-        temp.append(Generator.get_above_fifth(cf[-2]))
-        possibilities.append(temp)
+    @staticmethod
+    def second_species_candidates (cf):
+        """ Gets the candidates for each position of a second species counterpoint above a cantus firmus in compact
+        form.
 
-        possibilities.append(Generator.get_above_sixth(cf[-2]))
+        Mirrors `Generator.second_species_domains` without building notes.
 
-        temp=[]
-        temp.append(Generator.get_above_octave(cf[-1]))
-        possibilities.append(temp)
-        allpossibilities=Generator.getallpath(possibilities)
-
-        c=0
-        f = open('test4secondlog', 'w')
-
-        for plist in allpossibilities:
-            flag=False
-            c=c+1
-            print("running index:" +str(c))
-            print("running answer"+str(plist))
-
-            if Generator.is_exposed_tritone(plist):
-                f.write('tritone')
-                break
-
-            for i in range(1,2*len(cf)-2):
-                note=plist[i]
-                notebefore=plist[i-1]
-                notebefore2=plist[i-2]
-                noteafter=plist[i+1]
-                o=int(math.floor(i/2))
-
-                if Generator.is_same_note(notebefore, note):
-                    f.write('Repeat note skipping')
-                    f.write(' \n')
-                if i % 2 ==0:
-                    if Generator.is_parallel_fifth(cf[o-1], notebefore2, cf[o], note):
-                        f.write('parallelfifth skipping')
-                        f.write(' \n')
-                    if Generator.is_parallel_octave(cf[o-1], notebefore2, cf[o], note):
-                        f.write('paralleloctave skipping')
-                        f.write(' \n')
-                if Generator.ifinharmonic(cf[o],note):
-                    if not Generator.approleftstep(notebefore, note, noteafter):
-                        f.write('not approching by step')
-                        f.write(' \n')
-                if Generator.big_leap_type(notebefore, note)==Generator.BigLeapType.BIG_LEAP:
-                    f.write('Leap is too big skipping')
-                    f.write(' \n')
-                if Generator.is_special_leap(notebefore, note):
-                    if not Generator.recover(Generator.bigleap(notebefore, note), note, noteafter):
-                        f.write('no recovery, break')
-                        f.write(' \n')
-
-                if Generator.is_same_note(notebefore, note):
-                    flag=True
-                    break
-                if i % 2 ==0:
-                    if Generator.is_parallel_fifth(cf[o-1], notebefore2, cf[o], note):
-                        flag=True
-                        break
-                    if Generator.is_parallel_octave(cf[o-1], notebefore2, cf[o], note):
-                        flag=True
-                        break
-                if Generator.ifinharmonic(cf[o],note):
-                    if not Generator.approleftstep(notebefore, note, noteafter):
-                        flag=True
-                        break
-                if Generator.big_leap_type(notebefore, note)==Generator.BigLeapType.BIG_LEAP:
-                    flag=True
+        Args:
+            cf (list of tuple): The cantus firmus (see `counterpoint.compact.Compact.line`).
+
+        Returns:
+            list of list of tuple: The (MIDI number, diatonic step number, quarter length) candidates for each position.
+
+        """
+        above = Generator.above_line
+        possibilities = [[(REST, REST, 2.0)] + above(cf[0], ['p5', 'p8', 'p1'], 2.0)]
+        o = 0
+        for n in range(1, 2 * len(cf) - 4):
+            if n % 2 == 1:
+                possibilities.append(above(cf[o], ALL_INTERVALS, 2.0))
+                o = o + 1
+            else:
+                possibilities.append(above(cf[o], HARMONIC_INTERVALS, 2.0))
+        possibilities.append(above(cf[-2], ['p5'], cf[-2][2]))
+        possibilities.append(above(cf[-2], ['m6', 'M6'], cf[-2][2]))
+        possibilities.append(above(cf[-1], ['p8'], cf[-1][2]))
+        return possibilities
+
+    @staticmethod
+    def second_species_problem (cf):
+        """ Builds the compact search problem for a second species counterpoint above a cantus firmus.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+
+        Returns:
+            counterpoint.compact.Problem: The problem in compact form.
+
+        """
+        line = Compact.line(cf)
+        return Compact.from_lines(2, line, Generator.second_species_candidates(line))
+
+    @staticmethod
+    def iter_second_species (cf, diagnostics=None, workers=None, stats=None, store=None, budget=None, token=None,
+            state=None, key=None):
+        """ Yields each valid second species counterpoint above a cantus firmus as soon as it is found.
+
+        The search runs on compact pitches; notes are only built for the counterpoints that are yielded.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            diagnostics (counterpoint.diagnostics.Diagnostics): Where rejections are recorded, or None.
+            workers (int): The number of worker processes to search on, or None to search in this process.
+            stats (counterpoint.stats.Stats): Where the search and the problem cache are profiled, or None.
+            store (counterpoint.store.SolutionStore): The persistent solution cache to use, or None.
+            budget (float): The seconds to search for before returning what was found, or None for no limit.
+            token (counterpoint.anytime.CancellationToken): A token to stop the search with, or None.
+            state (counterpoint.anytime.SearchState): Where the progress of the search is reported (whether it was
+                exhaustive, its coverage and its frontier), or None. Pass a stopped search's state to resume it.
+            key (counterpoint.keys.Key or str): The key to keep the counterpoint in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Yields:
+            tuple of music21.note.GeneralNote: Each valid counterpoint.
+
+        """
+        if stats is not None:
+            stats.watch('problem', Generator.problem_cache)
+        problem = Generator.get_problem(cf, 2, key)
+        for path in Generator.iter_search(problem, diagnostics, workers, stats, store, budget, token, state):
+            yield Compact.to_notes(problem, path)
+
+    @staticmethod
+    def secondspeciesabove(cf, diagnostics=None, stats=None, store=None, budget=None, token=None, state=None, key=None):
+        return list(Generator.iter_second_species(cf, diagnostics, stats=stats, store=store, budget=budget, token=token,
+            state=state, key=key))
+
+    @staticmethod
+    def get_problem (cf, species, key=None, leading_tone=True):
+        """ Builds the compact search problem for a counterpoint of the given species above a cantus firmus.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            key (counterpoint.keys.Key or str): The key to keep the counterpoint in, or None (see
+                `Generator.get_line_problem`).
+            leading_tone (bool): Whether to allow the leading tone at the cadence when a key is given.
+
+        Returns:
+            counterpoint.compact.Problem: The problem in compact form (see `Generator.get_line_problem`).
+
+        """
+        return Generator.get_line_problem(Compact.line(cf), species, key, leading_tone)
+
+    @staticmethod
+    def get_line_problem (cf, species, key=None, leading_tone=True):
+        """ Builds the compact search problem for a counterpoint of the given species above a compact cantus firmus,
+        without `music21`.
+
+        Given a key, only the candidates in the key are kept (see `counterpoint.keys.Key.restrict`), which takes out
+        the chromatic notes that the intervals above the cantus firmus would otherwise offer.
+
+        Args:
+            cf (list of tuple): The cantus firmus (see `counterpoint.compact.Compact.line`).
+            species (int): The species of counterpoint (1 or 2).
+            key (counterpoint.keys.Key or str): The key to keep the counterpoint in, its name (e.g. 'D dorian'),
+                'auto' to detect it from the cantus firmus (see `counterpoint.keys.Key.detect`), or None to allow
+                chromatic notes.
+            leading_tone (bool): Whether to allow the raised sixth and seventh degrees at the cadence when a key is
+                given.
+
+        Returns:
+            counterpoint.compact.Problem: The problem in compact form.
+
+        Raises:
+            ValueError: If the species is not supported, or a key is given and no valid counterpoint stays in it (in
+                either species).
+
+        Problems are built once per canonical form (see `counterpoint.compact.Compact.canonical`), memoized in
+        `Generator.problem_cache`, and transposed to the key of `cf`, so transposed cantus firmi share the work of
+        building candidates. Candidate indices mean the same in every transposition, so solutions can be shared too.
+
+        """
+        if species not in (1, 2):
+            raise ValueError(f"Unsupported species: {species}")
+        pattern = Compact.canonical(cf)
+        semitones, steps = Compact.canonical_shift(cf[0][0], cf[0][1])
+        given = Key.resolve(key, cf)
+        key = given.transposed(semitones, steps) if given is not None else None # Keys are cached with the pattern.
+
+        def build ():
+            canonical = [(CANONICAL[0] + m, CANONICAL[1] + d, length) for m, d, length in pattern]
+            candidates = Generator.first_species_candidates if species == 1 else Generator.second_species_candidates
+            candidates = candidates(canonical)
+            if key is None:
+                return Compact.from_lines(species, canonical, candidates)
+            candidates = key.restrict(candidates, leading_tone)
+            problem = Compact.from_lines(species, canonical, candidates) if all(candidates) else None
+            if problem is None or not DomainFilter(problem.domains(), Generator.get_check(problem)).consistent:
+                allowance = ("even with the raised sixth and seventh degrees at the cadence" if leading_tone else
+                    "(leading_tone=True allows the raised sixth and seventh degrees at the cadence)")
+                raise ValueError(f"No counterpoint above the cantus firmus stays in the key of {given} {allowance}; "
+                    "choose another key, or key=None to allow chromatic notes.")
+            return problem
+
+        cache_key = (species, pattern) if key is None else (species, pattern, key, leading_tone)
+        problem = Generator.problem_cache.get(cache_key, build)
+        return problem.transposed(-semitones, -steps)
+
+    @staticmethod
+    def get_check (problem, diagnostics=None, rules=None, stats=None):
+        """ Gets the rule check for a problem, as called by `Generator.iter_backtrack`.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            diagnostics (counterpoint.diagnostics.Diagnostics): Where rejections are recorded, or None.
+            rules (list of str): The names of the rules to enforce, or None for the defaults (see
+                `counterpoint.rules.REGISTRY`).
+            stats (counterpoint.stats.Stats): Where rule evaluations and search nodes are profiled, or None.
+
+        Returns:
+            counterpoint.rules.RuleSet: The rule check for the species of `problem`.
+
+        """
+        return RuleSet(problem, rules, diagnostics, stats=stats)
+
+    @staticmethod
+    def get_domains (problem, stats=None):
+        """ Gets the candidate indices at each position of a problem that can take part in a valid path under the
+        default rules (see `counterpoint.consistency.DomainFilter`), as searched by every engine.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            stats (counterpoint.stats.Stats): Where the domain sizes before and after filtering are recorded, or None.
+
+        Returns:
+            list of list of int: The indices into `problem.midi` and `problem.diatonic` of the candidates kept at each
+                position, in order; all empty if there is no valid path.
+
+        """
+        domains = DomainFilter(problem.domains(), Generator.get_check(problem))
+        if stats is not None:
+            stats.record_domains(domains.before, domains.after)
+        return domains.domains
+
+    @staticmethod
+    def count_counterpoints (cf, species=2, key=None):
+        """ Counts the valid counterpoints above a cantus firmus without enumerating them.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            key (counterpoint.keys.Key or str): The key to keep the counterpoints in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Returns:
+            int: The number of valid counterpoints.
+
+        """
+        problem = Generator.get_problem(cf, species, key)
+        return SolutionCounter(Generator.get_domains(problem), Generator.get_check(problem)).total
+
+    @staticmethod
+    def solution_set (cf, species=2, workers=None, store=None, key=None):
+        """ Finds every valid counterpoint above a cantus firmus and packs them into a compact, savable set, decoding
+        none of them to notes until they are read.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            workers (int): The number of worker processes, or None to search in this process.
+            store (counterpoint.store.SolutionStore): Where solutions are looked up before searching, or None.
+            key (counterpoint.keys.Key or str): The key to keep the counterpoints in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Returns:
+            counterpoint.solutions.SolutionSet: The valid counterpoints, in the order of `Generator.iter_search`.
+
+        """
+        from counterpoint.solutions import SolutionSet
+        problem = Generator.get_problem(cf, species, key)
+        return SolutionSet.from_paths(problem, Generator.iter_search(problem, workers=workers, store=store))
+
+    @staticmethod
+    def random_counterpoint (cf, species=2, seed=None, key=None):
+        """ Draws one valid counterpoint above a cantus firmus uniformly at random, without enumerating them.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            seed (int): The seed for the random draw, or None for an unseeded draw.
+            key (counterpoint.keys.Key or str): The key to keep the counterpoint in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Returns:
+            tuple of music21.note.GeneralNote: The counterpoint, or None if there is no valid counterpoint.
+
+        """
+        picked = Generator.random_counterpoints(cf, species, 1, seed, key)
+        return picked[0] if picked else None
+
+    @staticmethod
+    def random_counterpoints (cf, species=2, count=1, seed=None, key=None):
+        """ Draws valid counterpoints above a cantus firmus uniformly at random (with replacement), counting once.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            count (int): The number of counterpoints to draw.
+            seed (int or str): The seed for the random draws, or None for unseeded draws.
+            key (counterpoint.keys.Key or str): The key to keep the counterpoints in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Returns:
+            list of tuple of music21.note.GeneralNote: The counterpoints, or an empty list if there is no valid
+                counterpoint.
+
+        """
+        problem = Generator.get_problem(cf, species, key)
+        return [Compact.to_notes(problem, path) for path in Generator.sample_paths(problem, count, seed)[1]]
+
+    @staticmethod
+    def best_counterpoints (cf, species=2, k=1, weights=None, beam_width=None, key=None):
+        """ Finds the highest-scoring valid counterpoints above a cantus firmus without enumerating them all.
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            k (int): The number of counterpoints to find.
+            weights (dict): The feature weights to change from `counterpoint.scoring.WEIGHTS`, or None.
+            beam_width (int): The width of the beam to search with (see `Generator.beam_search`), for long cantus
+                firmi, or None to find the best counterpoints exactly (see `Generator.top_k`).
+            key (counterpoint.keys.Key or str): The key to keep the counterpoints in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Returns:
+            list of tuple: The score and notes of the `k` best counterpoints found, best first.
+
+        """
+        problem = Generator.get_problem(cf, species, key)
+        scorer = Scorer(problem, weights)
+        if beam_width is None:
+            found = Generator.top_k(problem, k, scorer=scorer)
+        else:
+            found = Generator.beam_search(problem, beam_width, k, scorer=scorer)
+        return [(score, Compact.to_notes(problem, path)) for score, path in found]
+
+    @staticmethod
+    def sample_paths (problem, count=1, seed=None, distinct=False):
+        """ Draws valid paths through a problem uniformly at random, counting once.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            count (int): The number of paths to draw.
+            seed (int or str): The seed for the random draws, or None for unseeded draws.
+            distinct (bool): Whether to draw without replacement, so that no path is drawn twice and at most every
+                valid path is drawn (see `counterpoint.counting.SolutionCounter.sample_distinct`).
+
+        Returns:
+            tuple: The number of valid paths, and a list of the candidate indices of each drawn path (empty if there is
+                no valid path).
+
+        """
+        counter = SolutionCounter(Generator.get_domains(problem), Generator.get_check(problem))
+        if counter.total == 0:
+            return 0, []
+        rng = random.Random(seed)
+        if distinct:
+            return counter.total, counter.sample_distinct(count, rng)
+        return counter.total, [counter.sample(rng) for i in range(count)]
+
+    @staticmethod
+    def reservoir_sample (items, k, seed=None):
+        """ Draws `k` items uniformly at random (without replacement) from a stream, holding only the `k` drawn.
+
+        Uses reservoir sampling with geometric skips (Li's algorithm L), so only O(k log(n / k)) random numbers are
+        drawn for a stream of n items, and the items skipped are passed over without being held. The draws depend only on
+        the seed and the order of the items, so a seeded draw from `Generator.iter_search` is the same whatever number of
+        workers produced it.
+
+        Args:
+            items (iterable): The stream to draw from, read once to the end.
+            k (int): The number of items to draw.
+            seed (int or str): The seed for the random draws, or None for unseeded draws.
+
+        Returns:
+            tuple: The number of items in the stream, and a list of the drawn items (all of them if there are no more
+                than `k`), in stream order.
+
+        """
+        tally = itertools.count()
+        stream = zip(items, tally) # Pairs each item with its position, and counts the items read.
+        reservoir = list(itertools.islice(stream, k))
+        if k == 0:
+            for drawn in stream: # Only count the items.
+                pass
+        elif len(reservoir) == k:
+            rng = random.Random(seed)
+            w = math.exp(math.log(1.0 - rng.random()) / k)
+            while True:
+                skip = math.floor(math.log(1.0 - rng.random()) / math.log(1.0 - w)) if w < 1.0 else 0
+                drawn = next(itertools.islice(stream, skip, None), None)
+                if drawn is None:
                     break
-                if Generator.is_special_leap(notebefore, note):
-                    if not Generator.recover(Generator.bigleap(notebefore, note), note, noteafter):
-                        flag=True
-                        break
-            if not flag:
-                if Generator.is_same_note(plist[-2], plist[-1]):
-                    f.write('Repeat note skipping')
-                    f.write(' \n')
-                if Generator.is_parallel_fifth(cf[-2], plist[-3], cf[-1], plist[-1]):
-                    f.write('parallelfifth skipping')
-                    f.write(' \n')
-                if Generator.is_parallel_octave(cf[-2], plist[-3], cf[-1], plist[-1]):
-                    f.write('paralleloctave skipping')
-                    f.write(' \n')
-                if Generator.ifinharmonic(cf[-2],plist[-2]):
-                    if not Generator.approleftstep(plist[-3], plist[-2], plist[-1]):
-                        f.write('not approching by step')
-                        f.write(' \n')
-                if Generator.big_leap_type(plist[-2], plist[-1])==Generator.BigLeapType.BIG_LEAP:
-                    f.write('Leap is too big skipping')
-                    f.write(' \n')
-                if Generator.big_leap_type(plist[-3], plist[-2])==Generator.BigLeapType.BIG_LEAP:
-                    f.write('Leap is too big skipping')
-                    f.write(' \n')
-
-                if Generator.is_same_note(plist[-2], plist[-1]):
-                    flag=True
-                if Generator.is_parallel_fifth(cf[-2], plist[-3], cf[-1], plist[-1]):
-                    flag=True
-                if Generator.is_parallel_octave(cf[-2], plist[-3], cf[-1], plist[-1]):
-                    flag=True
-                if Generator.ifinharmonic(cf[-2],plist[-2]):
-                    if not Generator.approleftstep(plist[-3], plist[-2], plist[-1]):
-                        flag=True
-                if Generator.big_leap_type(plist[-2], plist[-1])==Generator.BigLeapType.BIG_LEAP:
-                    flag=True
-                if Generator.big_leap_type(plist[-3], plist[-2])==Generator.BigLeapType.BIG_LEAP:
-                    flag=True
-
-            if not flag:
-                answer.append(plist)
-
-
-        f.close()
-
-        f = open('test4second', 'w')
-        for an in answer:
-            f.write(str(an))
-            f.write(' \n')
-        f.close()
-        return answer
-
-    @staticmethod
-    def fromlisttostream(answer):
-        print('total possible cpt: '+str(len(answer)))
+                reservoir[rng.randrange(k)] = drawn
+                w *= math.exp(math.log(1.0 - rng.random()) / k)
+        reservoir.sort(key=lambda drawn: drawn[1])
+        return next(tally), [item for item, position in reservoir]
+
+    @staticmethod
+    def select_counterpoints (cf, species=2, k=1, seed=None, workers=None, store=None, key=None):
+        """ Draws valid counterpoints above a cantus firmus uniformly at random (without replacement) from the search
+        stream, holding only the ones drawn (see `Generator.reservoir_sample`).
+
+        Args:
+            cf (list of music21.note.Note): The cantus firmus.
+            species (int): The species of counterpoint (1 or 2).
+            k (int): The number of counterpoints to draw.
+            seed (int or str): The seed for the random draws, or None for unseeded draws. The same seed gives the same
+                counterpoints for any number of workers.
+            workers (int): The number of worker processes, or None to search in this process.
+            store (counterpoint.store.SolutionStore): Where solutions are looked up before searching, or None.
+            key (counterpoint.keys.Key or str): The key to keep the counterpoints in (see
+                `Generator.get_line_problem`), or None to allow chromatic notes.
+
+        Returns:
+            tuple: The number of valid counterpoints, and the notes of each drawn counterpoint, in search order.
+
+        """
+        problem = Generator.get_problem(cf, species, key)
+        total, paths = Generator.reservoir_sample(Generator.iter_search(problem, workers=workers, store=store), k, seed)
+        return total, [Compact.to_notes(problem, path) for path in paths]
+
+    @staticmethod
+    def tostream (notes, stats=None):
+        """ Puts a counterpoint into a music21 stream.
+
+        Args:
+            notes (iterable of music21.note.GeneralNote): The notes of the counterpoint.
+            stats (counterpoint.stats.Stats): Where the time spent building the stream is recorded, or None.
+
+        Returns:
+            music21.stream.Stream: The stream of the notes.
+
+        """
+        import music21
+        if stats is not None:
+            with stats.timer('tostream'):
+                return Generator.tostream(notes)
         cp=music21.stream.Stream()
-        index=randint(0, len(answer))
-        picked=list(answer[index])
-        for notes in picked:
-            cp.append(notes)
+        for note in notes:
+            cp.append(note)
         return cp
 
+    @staticmethod
+    def fromlisttostream(answer, seed=None):
+        picked = Generator.reservoir_sample(answer, 1, seed)[1]
+        return Generator.tostream(picked[0])
+
     @staticmethod
     def combinecfcp(cf, cp):
+        import music21
         sc = music21.stream.Score()
         p1 = music21.stream.Part()
         p1.id = 'part1'
@@ -772,3 +1499,18 @@ class Generator (object):
         sc.insert(0, p1)
         sc.insert(0, p2)
         return sc
+
+    @staticmethod
+    def write_midi (score, path):
+        """ Writes a score to a MIDI file.
+
+        Args:
+            score (music21.stream.Score): The score to write.
+            path (str): The path of the MIDI file.
+
+        """
+        import music21
+        midifile=music21.midi.translate.streamToMidiFile(score)
+        midifile.open(path, 'wb')
+        midifile.write()
+        midifile.close()
@@ -0,0 +1,177 @@
+from counterpoint.compact import Compact, REST, STEPS, STEP_SEMITONES
+
+# The semitones above the tonic of each degree of each mode, in the order modes are preferred when detecting a key.
+MODES = {
+    'ionian': (0, 2, 4, 5, 7, 9, 11),
+    'aeolian': (0, 2, 3, 5, 7, 8, 10),
+    'dorian': (0, 2, 3, 5, 7, 9, 10),
+    'mixolydian': (0, 2, 4, 5, 7, 9, 10),
+    'lydian': (0, 2, 4, 6, 7, 9, 11),
+    'phrygian': (0, 1, 3, 5, 7, 8, 10),
+}
+ALIASES = {'major': 'ionian', 'minor': 'aeolian'}
+
+CADENCE = 3 # The number of positions at the end of a counterpoint that approach the final.
+
+class Key (object):
+    """ A key (or mode): the pitch class of each of the seven diatonic steps, so that a spelled pitch is either in the
+    key or chromatic.
+
+    Attributes:
+        tonic (tuple of int): The pitch class (0 for C) and step (0 for C, see `counterpoint.compact.STEPS`) of the
+            tonic.
+        mode (str): The name of the mode (see `MODES`).
+        pitch_classes (tuple of int): The pitch class of each step, from C to B.
+
+    """
+    __slots__ = ('tonic', 'mode', 'pitch_classes')
+
+    def __init__ (self, pitch_class, step, mode):
+        """ Creates a key.
+
+        Args:
+            pitch_class (int): The pitch class of the tonic (0 for C; taken modulo 12).
+            step (int): The step of the tonic (0 for C; taken modulo 7).
+            mode (str): The name of the mode, or 'major' or 'minor'.
+
+        Raises:
+            ValueError: If the mode is unknown.
+
+        """
+        mode = ALIASES.get(mode.lower(), mode.lower())
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        self.tonic = (pitch_class % 12, step % 7)
+        self.mode = mode
+        pitch_classes = [None] * 7
+        for degree, semitones in enumerate(MODES[mode]):
+            pitch_classes[(self.tonic[1] + degree) % 7] = (self.tonic[0] + semitones) % 12
+        self.pitch_classes = tuple(pitch_classes)
+
+    @staticmethod
+    def from_pitch (midi, diatonic, mode):
+        """ Creates the key of a mode on a compact pitch of any octave.
+        """
+        return Key(midi, diatonic - 1, mode)
+
+    @staticmethod
+    def parse (name):
+        """ Reads a key from its name.
+
+        Args:
+            name (str): The tonic (e.g. 'F#' or 'B-') and mode, separated by a space (e.g. 'D dorian', 'B- major').
+
+        Returns:
+            Key: The key.
+
+        Raises:
+            ValueError: If the name is not a tonic (a step, then only sharps or only flats) and a known mode.
+
+        """
+        parts = name.split()
+        if len(parts) != 2:
+            raise ValueError(f"Expected a tonic and a mode (e.g. 'D dorian'), got '{name}'.")
+        try:
+            if parts[0][-1].isdigit(): # The tonic has no octave.
+                raise ValueError(parts[0])
+            midi, diatonic = Compact.from_name(parts[0] + '4')
+        except ValueError:
+            raise ValueError(f"Unknown tonic: {parts[0]}")
+        return Key.from_pitch(midi, diatonic, parts[1])
+
+    @staticmethod
+    def detect (cf):
+        """ Guesses the key of a cantus firmus.
+
+        The tonic is the final. The mode is the one that holds the most notes of the cantus firmus, and then the one
+        with the fewest sharps or flats in its key signature (so a cantus firmus ending on D with a B natural is dorian,
+        and with a B flat aeolian), and then the first in `MODES`.
+
+        Args:
+            cf (list of tuple): The cantus firmus (see `counterpoint.compact.Compact.line`).
+
+        Returns:
+            Key: The key, or None if the cantus firmus has no notes.
+
+        """
+        notes = [(midi, diatonic) for midi, diatonic, length in cf if midi != REST]
+        if not notes:
+            return None
+        keys = [Key.from_pitch(notes[-1][0], notes[-1][1], mode) for mode in MODES]
+        return min(keys, key=lambda key: (sum(not key.contains(m, d) for m, d in notes), abs(key.signature())))
+
+    @staticmethod
+    def resolve (key, cf):
+        """ Gets the key to restrict the candidates above a cantus firmus to.
+
+        Args:
+            key (Key or str): A key, the name of one (see `Key.parse`), 'auto' to detect it (see `Key.detect`), or
+                None for no key.
+            cf (list of tuple): The cantus firmus (see `counterpoint.compact.Compact.line`).
+
+        Returns:
+            Key: The key, or None.
+
+        """
+        if key is None or isinstance(key, Key):
+            return key
+        return Key.detect(cf) if key == 'auto' else Key.parse(key)
+
+    def contains (self, midi, diatonic):
+        """ Returns true if a compact pitch is in the key. Rests are in every key.
+        """
+        return midi == REST or self.pitch_classes[(diatonic - 1) % 7] == midi % 12
+
+    def signature (self):
+        """ Gets the key signature: the number of sharps, or minus the number of flats.
+        """
+        return sum((pitch_class - STEP_SEMITONES[step] + 6) % 12 - 6 for step, pitch_class in
+            enumerate(self.pitch_classes))
+
+    def transposed (self, semitones, steps):
+        """ Gets this key transposed by an interval of the given semitones and diatonic steps.
+        """
+        return Key(self.tonic[0] + semitones, self.tonic[1] + steps, self.mode)
+
+    def raised (self):
+        """ Gets the pitch class and step of the leading tone (a semitone below the tonic) and of the sixth degree a
+        whole tone below it, as raised at a cadence in the modes where they are not already in the key.
+
+        Returns:
+            list of tuple of int: The (pitch class, step) of the raised degrees.
+
+        """
+        pitch_class, step = self.tonic
+        return [((pitch_class - 1) % 12, (step - 1) % 7), ((pitch_class - 3) % 12, (step - 2) % 7)]
+
+    def restrict (self, candidates, leading_tone=True):
+        """ Drops the candidates outside the key.
+
+        Args:
+            candidates (list of list of tuple): The (MIDI number, diatonic step number, quarter length) candidates for
+                each position (see `Generator.first_species_candidates`).
+            leading_tone (bool): Whether to allow the raised sixth and seventh degrees (see `Key.raised`) at the last
+                `CADENCE` positions, as musica ficta at the cadence.
+
+        Returns:
+            list of list of tuple: The candidates kept at each position, in their order.
+
+        """
+        raised = self.raised() if leading_tone else []
+        restricted = []
+        for j, line in enumerate(candidates):
+            cadence = j >= len(candidates) - CADENCE
+            restricted.append([note for note in line if self.contains(note[0], note[1])
+                or cadence and (note[0] % 12, (note[1] - 1) % 7) in raised])
+        return restricted
+
+    def __eq__ (self, other):
+        return isinstance(other, Key) and (self.tonic, self.mode) == (other.tonic, other.mode)
+
+    def __hash__ (self):
+        return hash((self.tonic, self.mode))
+
+    def __repr__ (self):
+        pitch_class, step = self.tonic
+        alter = (pitch_class - STEP_SEMITONES[step] + 6) % 12 - 6
+        return f"{STEPS[step]}{'#' * alter if alter > 0 else '-' * -alter} {self.mode}"
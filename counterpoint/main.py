@@ -1,12 +1,13 @@
-import music21
 import sys
 import os
 
-from generator import Generator
+from counterpoint.compact import Compact
+from counterpoint.generator import Generator
+from counterpoint.midi import Midi
 
 # Ensure argument list is correct length.
 if len(sys.argv) != 3:
-    print("Usage: python counterpoint.py <input_file> <output_file>")
+    print("Usage: python -m counterpoint.main <input_file> <output_file>")
     sys.exit()
 
 # Check input file exists.
@@ -17,15 +18,20 @@ if not os.path.isfile(path):
 
 # The cantus firmus file loading
 inputnotes = Generator.get_input(path)
-# Get the counterpoints and randomly select one and then make it a stream of music21
-cp=Generator.fromlisttostream(Generator.secondspeciesabove(inputnotes))
+# Count the counterpoints and draw one uniformly at random, without listing them all
+problem=Generator.get_problem(inputnotes, 2)
+total, paths=Generator.sample_paths(problem)
+print('total possible cpt: '+str(total))
+if not paths:
+    print("Error: No counterpoint satisfies the rules for this cantus firmus.")
+    sys.exit()
+picked=Compact.to_notes(problem, paths[0])
+# Make it a stream of music21
+cp=Generator.tostream(picked)
 # Combine the two voice
 score=Generator.combinecfcp(inputnotes,cp)
 # Display the randomly picked counterpoint
 score.show()
 
 # Write the randomly picked answer to a midi file
-midifile=music21.midi.translate.streamToMidiFile(score)
-midifile.open(sys.argv[2], 'wb')
-midifile.write()
-midifile.close()
+Midi.write(sys.argv[2], [Midi.voice(inputnotes), Midi.voice(picked)])
@@ -0,0 +1,174 @@
+import os
+import struct
+import zipfile
+
+from counterpoint.compact import Compact, REST
+
+TICKS_PER_QUARTER = 1024
+VELOCITY = 90
+
+# The tempo track and per-track preamble that `music21.midi.translate.streamToMidiFile` writes for a plain score.
+TEMPO_EVENTS = b'\x00\xff\x51\x03\x07\xa1\x20' + b'\x00\xff\x58\x04\x04\x02\x18\x08' # 120 BPM, 4/4.
+TRACK_PREAMBLE = b'\x00\xff\x03\x00' + b'\x00\xe0\x00\x40' # Empty track name, centred pitch bend.
+END_OF_TRACK = b'\xff\x2f\x00'
+
+class Midi (object):
+    """ Writes Standard MIDI Files straight from (MIDI number, quarter length) sequences, without `music21` streams.
+
+    The bytes written are the same as those of `Generator.write_midi` on the score built by `Generator.combinecfcp`:
+    one tempo track, then one track per voice on channel 1, with a rest (`REST`) written as a gap.
+    """
+
+    @staticmethod
+    def variable_length (value):
+        """ Encodes an int as a MIDI variable-length quantity.
+        """
+        encoded = [value & 0x7f]
+        value >>= 7
+        while value:
+            encoded.append(0x80 | (value & 0x7f))
+            value >>= 7
+        return bytes(reversed(encoded))
+
+    @staticmethod
+    def chunk (kind, data):
+        """ Wraps data in a MIDI chunk of the given kind (b'MThd' or b'MTrk').
+        """
+        return kind + struct.pack('>I', len(data)) + data
+
+    @staticmethod
+    def voice (notes):
+        """ Converts `music21` notes to the (MIDI number, quarter length) pairs written by `Midi`.
+
+        Args:
+            notes (iterable of music21.note.GeneralNote): The notes and rests of a voice.
+
+        Returns:
+            list of tuple: The MIDI number (`REST` for a rest) and quarter length of each note.
+
+        """
+        return [(Compact.from_note(note)[0], note.quarterLength) for note in notes]
+
+    @staticmethod
+    def path_voice (problem, path):
+        """ Gets the (MIDI number, quarter length) pairs of a counterpoint straight from its candidate indices.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem that was searched.
+            path (tuple of int): The index of the chosen candidate at each position.
+
+        Returns:
+            list of tuple: The MIDI number (`REST` for a rest) and quarter length of each note.
+
+        """
+        return [(problem.midi[j][i], problem.lengths[j]) for j, i in enumerate(path)]
+
+    @staticmethod
+    def track (voice):
+        """ Encodes a voice as a MIDI track chunk.
+
+        Args:
+            voice (list of tuple): The MIDI number (`REST` for a rest) and quarter length of each note.
+
+        Returns:
+            bytes: The track chunk.
+
+        """
+        events = [TRACK_PREAMBLE]
+        wait = 0 # Ticks since the last event.
+        for midi, length in voice:
+            ticks = int(round(length * TICKS_PER_QUARTER))
+            if midi == REST:
+                wait += ticks
+                continue
+            events.append(Midi.variable_length(wait) + bytes((0x90, midi, VELOCITY)))
+            events.append(Midi.variable_length(ticks) + bytes((0x80, midi, 0)))
+            wait = 0
+        events.append(Midi.variable_length(wait + TICKS_PER_QUARTER) + END_OF_TRACK)
+        return Midi.chunk(b'MTrk', b''.join(events))
+
+    @staticmethod
+    def tracks_file (tracks):
+        """ Wraps encoded voice tracks, after the tempo track, in a format 1 Standard MIDI File.
+
+        Args:
+            tracks (list of bytes): The track chunks of the voices (see `Midi.track`), top track first.
+
+        Returns:
+            bytes: The MIDI file.
+
+        """
+        header = Midi.chunk(b'MThd', struct.pack('>HHH', 1, len(tracks) + 1, TICKS_PER_QUARTER))
+        tempo = Midi.chunk(b'MTrk', TEMPO_EVENTS + Midi.variable_length(TICKS_PER_QUARTER) + END_OF_TRACK)
+        return header + tempo + b''.join(tracks)
+
+    @staticmethod
+    def file (voices):
+        """ Encodes voices as a format 1 Standard MIDI File.
+
+        Args:
+            voices (list of list of tuple): The (MIDI number, quarter length) pairs of each voice, top track first.
+
+        Returns:
+            bytes: The MIDI file.
+
+        """
+        return Midi.tracks_file([Midi.track(voice) for voice in voices])
+
+    @staticmethod
+    def write (path, voices):
+        """ Writes voices to a MIDI file.
+
+        Args:
+            path (str): The path of the MIDI file.
+            voices (list of list of tuple): The (MIDI number, quarter length) pairs of each voice.
+
+        """
+        with open(path, 'wb') as f:
+            f.write(Midi.file(voices))
+
+    @staticmethod
+    def write_many (directory, name, cf, counterpoints):
+        """ Writes each counterpoint, with the cantus firmus, to its own MIDI file in one pass.
+
+        Args:
+            directory (str): The directory to write to.
+            name (str): The file name prefix; files are named `<name>_<i>.mid`.
+            cf (list of tuple): The (MIDI number, quarter length) pairs of the cantus firmus.
+            counterpoints (iterable of list of tuple): The (MIDI number, quarter length) pairs of each counterpoint.
+
+        Returns:
+            list of str: The paths written.
+
+        The cantus firmus track is encoded once for the whole batch.
+
+        """
+        cf_track = Midi.track(cf)
+        paths = []
+        for i, cp in enumerate(counterpoints):
+            path = os.path.join(directory, f"{name}_{i}.mid")
+            with open(path, 'wb') as f:
+                f.write(Midi.tracks_file([cf_track, Midi.track(cp)]))
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def write_archive (path, name, cf, counterpoints):
+        """ Writes each counterpoint, with the cantus firmus, as a MIDI file `<name>_<i>.mid` inside one zip archive.
+
+        Args:
+            path (str): The path of the archive.
+            name (str): The file name prefix of the entries.
+            cf (list of tuple): The (MIDI number, quarter length) pairs of the cantus firmus.
+            counterpoints (iterable of list of tuple): The (MIDI number, quarter length) pairs of each counterpoint.
+
+        Returns:
+            int: The number of files in the archive.
+
+        """
+        cf_track = Midi.track(cf)
+        count = 0
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for count, cp in enumerate(counterpoints, 1):
+                archive.writestr(f"{name}_{count - 1}.mid", Midi.tracks_file([cf_track, Midi.track(cp)]))
+        return count
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import xml.etree.ElementTree as ElementTree
+import zipfile
+from fractions import Fraction
+
+from counterpoint.cache import LRUCache
+from counterpoint.compact import Compact
+
+ACCIDENTALS = {-2: '--', -1: '-', 0: '', 1: '#', 2: '##'}
+
+# Elements that the fast path does not handle: other voices, chords, tuplets, grace notes, ties and unpitched notes.
+COMPLEX = frozenset(['backup', 'forward', 'chord', 'time-modification', 'grace', 'tie', 'unpitched', 'cue'])
+
+class MusicXML (object):
+    """ Loads monophonic cantus firmi from MusicXML files.
+
+    Simple single-part files are streamed with a pull parser, without importing `music21`; anything else is handed to
+    `music21`. Parsed lines are cached as plain (name with octave, quarter length) pairs keyed by the SHA-256 of the
+    file contents, so loading the same file again skips parsing and builds fresh notes that callers may modify. The
+    cache lives in the process only: separate invocations (e.g. of `counterpoint.batch`, or its worker processes)
+    each parse a file again.
+    """
+
+    cache = LRUCache(256) # Lists of (name with octave, quarter length) keyed by the SHA-256 of the file contents.
+
+    @staticmethod
+    def quarter_length (length):
+        """ Converts an exact quarter length to the form `music21` stores (see `music21.common.opFrac`).
+
+        Args:
+            length (fractions.Fraction): The quarter length.
+
+        Returns:
+            float or fractions.Fraction: A float if `length` is exact in binary, otherwise `length`.
+
+        """
+        return float(length) if length.denominator & (length.denominator - 1) == 0 else length
+
+    @staticmethod
+    def parse_simple (data):
+        """ Parses the notes of a simple single-part MusicXML document with a pull parser.
+
+        Args:
+            data (bytes): The MusicXML document.
+
+        Returns:
+            list of tuple: The (name with octave, quarter length) of each note, skipping rests, or None if the document
+                is not simple enough (see `COMPLEX`) and must be parsed by `music21`.
+
+        """
+        notes = []
+        divisions = None
+        parts = 0
+        try:
+            for event, element in ElementTree.iterparse(io.BytesIO(data), events=('end',)):
+                tag = element.tag
+                if tag in COMPLEX:
+                    return None
+                if tag == 'part':
+                    parts += 1
+                    if parts > 1:
+                        return None
+                elif tag == 'divisions':
+                    divisions = int(element.text)
+                elif tag == 'note':
+                    if element.find('rest') is not None:
+                        element.clear()
+                        continue
+                    pitch, duration = element.find('pitch'), element.find('duration')
+                    if pitch is None or duration is None or divisions is None:
+                        return None
+                    alter = Fraction(pitch.findtext('alter', '0'))
+                    if alter.denominator != 1 or int(alter) not in ACCIDENTALS: # Microtones.
+                        return None
+                    name = pitch.findtext('step') + ACCIDENTALS[int(alter)] + pitch.findtext('octave')
+                    length = Fraction(int(duration.text), divisions)
+                    notes.append((name, MusicXML.quarter_length(length)))
+                    element.clear()
+                elif tag == 'measure':
+                    element.clear()
+        except (ElementTree.ParseError, ValueError, TypeError):
+            return None
+        return notes
+
+    @staticmethod
+    def parse_music21 (data):
+        """ Parses the notes of any MusicXML document with `music21`.
+
+        Args:
+            data (bytes): The MusicXML document.
+
+        Returns:
+            list of tuple: The (name with octave, quarter length) of each note.
+
+        Raises:
+            ValueError: If the document contains chords.
+
+        """
+        import music21
+        score = music21.converter.parseData(data, format='musicxml')
+        notes = list(score.flat.notes) # Flatten piece, get notes iterator.
+        if any(not isinstance(note, music21.note.Note) for note in notes):
+            raise ValueError("A cantus firmus must be a single line of notes, but the file contains chords.")
+        return [(note.nameWithOctave, note.quarterLength) for note in notes]
+
+    @staticmethod
+    def parse (data):
+        """ Parses the notes of a MusicXML document, on the fast path where possible, through the cache.
+
+        Args:
+            data (bytes): The MusicXML document.
+
+        Returns:
+            list of tuple: The (name with octave, quarter length) of each note.
+
+        """
+        def parse ():
+            notes = MusicXML.parse_simple(data)
+            return notes if notes is not None else MusicXML.parse_music21(data)
+
+        return MusicXML.cache.get(hashlib.sha256(data).hexdigest(), parse)
+
+    @staticmethod
+    def read (path):
+        """ Reads the MusicXML document of a plain or compressed (.mxl) MusicXML file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            bytes: The MusicXML document.
+
+        """
+        if not zipfile.is_zipfile(path):
+            with open(path, 'rb') as f:
+                return f.read()
+        with zipfile.ZipFile(path) as archive:
+            container = ElementTree.fromstring(archive.read('META-INF/container.xml'))
+            rootfile = container.find('.//rootfile')
+            return archive.read(rootfile.get('full-path'))
+
+    @staticmethod
+    def load (path):
+        """ Loads the notes of a MusicXML file (plain or compressed).
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            list of music21.note.Note: The notes of the file, newly built on each call.
+
+        """
+        import music21
+        return [music21.note.Note(name, quarterLength=length) for name, length in MusicXML.parse(MusicXML.read(path))]
+
+    @staticmethod
+    def load_line (path):
+        """ Loads the notes of a MusicXML file (plain or compressed) in compact form, without building notes.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            list of tuple: The MIDI number, diatonic step number and quarter length of each note (see
+                `counterpoint.compact.Compact.line`).
+
+        """
+        return [Compact.from_name(name) + (float(length),) for name, length in MusicXML.parse(MusicXML.read(path))]
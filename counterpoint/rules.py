@@ -0,0 +1,321 @@
+from counterpoint.compact import Compact, REST, BIG_LEAP, FIFTH, OCTAVE_UP, OCTAVE_DOWN, TRITONE
+
+SPECIAL_LEAPS = (FIFTH, OCTAVE_UP, OCTAVE_DOWN)
+
+class Rules (object):
+    """ The counterpoint rules, as predicates over a partial path of candidate indices through a compact problem.
+
+    Each predicate is called as `violates(problem, path, j)` once position `j` has been placed, only at the positions
+    where its `Rule` applies, and returns true if the rule is broken there.
+    """
+
+    @staticmethod
+    def repeat_note (problem, path, j):
+        """ The note at `j` repeats the note before it.
+        """
+        midi, diatonic = problem.midi, problem.diatonic
+        return Compact.is_same_note(midi[j - 1][path[j - 1]], diatonic[j - 1][path[j - 1]],
+            midi[j][path[j]], diatonic[j][path[j]])
+
+    @staticmethod
+    def parallel (steps, semitones, problem, path, j):
+        """ The note at `j` and the previous downbeat are both at the given interval above the cantus firmus.
+        """
+        s = problem.species
+        a = j - s
+        midi, diatonic, cfm, cfd = problem.midi, problem.diatonic, problem.cf_midi, problem.cf_diatonic
+        return Compact.is_parallel(steps, semitones,
+            cfm[a // s], cfd[a // s], midi[a][path[a]], diatonic[a][path[a]],
+            cfm[j // s], cfd[j // s], midi[j][path[j]], diatonic[j][path[j]])
+
+    @staticmethod
+    def parallel_fifth (problem, path, j):
+        """ Parallel perfect fifths between the previous downbeat and `j`.
+        """
+        return Rules.parallel(4, 7, problem, path, j)
+
+    @staticmethod
+    def parallel_octave (problem, path, j):
+        """ Parallel perfect octaves between the previous downbeat and `j`.
+        """
+        return Rules.parallel(7, 12, problem, path, j)
+
+    @staticmethod
+    def big_leap (problem, path, j):
+        """ The leap into `j` is too big.
+        """
+        midi = problem.midi
+        return Compact.big_leap_type(midi[j - 1][path[j - 1]], midi[j][path[j]]) == BIG_LEAP
+
+    @staticmethod
+    def leap_recovery (problem, path, j):
+        """ A special leap into `j - 1` is not recovered by the step into `j`.
+        """
+        midi = problem.midi
+        bm = midi[j - 1][path[j - 1]]
+        leap = Compact.big_leap_type(midi[j - 2][path[j - 2]], bm)
+        return leap in SPECIAL_LEAPS and not Compact.recover(leap, bm, midi[j][path[j]])
+
+    @staticmethod
+    def dissonance_approach (problem, path, j):
+        """ A dissonance at `j - 1` is not approached and left by step.
+        """
+        midi = problem.midi
+        bm = midi[j - 1][path[j - 1]]
+        return (Compact.ifinharmonic(problem.cf_midi[(j - 1) // problem.species], bm)
+            and not Compact.approleftstep(midi[j - 2][path[j - 2]], bm, midi[j][path[j]]))
+
+    @staticmethod
+    def cadence_intervals (problem, j):
+        """ Gets the (diatonic steps, semitones) intervals above the cantus firmus allowed at a cadence position.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            j (int): The position.
+
+        Returns:
+            list of tuple of int: The allowed intervals, or None if `j` is not a cadence position.
+
+        """
+        from_end = len(problem.midi) - 1 - j
+        if problem.species == 1:
+            return [(5, 9)] if from_end == 1 else None # Major sixth on the penultimate note.
+        return {2: [(4, 7)], 1: [(5, 8), (5, 9)], 0: [(7, 12)]}.get(from_end) # Fifth, sixth, octave.
+
+    @staticmethod
+    def cadence (problem, path, j):
+        """ A cadence position is not at one of its allowed intervals above the cantus firmus.
+        """
+        c = j // problem.species
+        interval = (problem.diatonic[j][path[j]] - problem.cf_diatonic[c], problem.midi[j][path[j]] - problem.cf_midi[c])
+        return interval not in Rules.cadence_intervals(problem, j)
+
+    @staticmethod
+    def outline_state (problem, path, k):
+        """ Gets the outline automaton state (see `Compact.outline`) after position `k`.
+
+        The state only records the run ending at `k`, so it is found by walking back to the start of that run, and no
+        further than the move that takes its span past `TRITONE`: at most `TRITONE + 1` moves, whatever the length of
+        the path.
+        """
+        midi = problem.midi
+        b = midi[k][path[k]]
+        direction = span = 0
+        while k > 0 and span <= TRITONE:
+            a = midi[k - 1][path[k - 1]]
+            step = 0 if a == REST or b == REST else b - a
+            d = (step > 0) - (step < 0)
+            if d == 0 or (span and d != direction): # The run has no direction, or starts after this move.
+                break
+            direction, span, b, k = d, span + abs(step), a, k - 1
+        return direction, min(span, TRITONE + 1)
+
+    @staticmethod
+    def exposed_tritone (problem, path, j):
+        """ A run of moves in one direction that adds up to exactly six semitones ends at `j - 1`, or at `j` if it is
+        the last position.
+
+        Moves to or from a rest have no direction. Each outline is reported at the first position where it is known,
+        so a path outlines a tritone if and only if this holds at one of its positions (see
+        `counterpoint.vectorized.Vectorized.exposed_tritone_mask`).
+        """
+        if j == 0:
+            return False
+        midi = problem.midi
+        state, exposed = Compact.outline(Rules.outline_state(problem, path, j - 1), midi[j - 1][path[j - 1]],
+            midi[j][path[j]])
+        return exposed or (j == len(midi) - 1 and Compact.outlines_tritone(state))
+
+    @staticmethod
+    def on_downbeat (problem, j):
+        """ Position `j` is a downbeat.
+        """
+        return j % problem.species == 0
+
+    @staticmethod
+    def at_cadence (problem, j):
+        """ Position `j` is a cadence position.
+        """
+        return Rules.cadence_intervals(problem, j) is not None
+
+    @staticmethod
+    def at_end (problem, j):
+        """ Position `j` is the last position.
+        """
+        return j == len(problem.midi) - 1
+
+class Rule (object):
+    """ A declaration of a counterpoint rule.
+
+    Attributes:
+        name (str): The name of the rule, as reported to diagnostics.
+        species (tuple of int): The species the rule applies to.
+        window (int): The number of positions, ending at the one just placed, that the rule reads, or None if it reads
+            the whole path so far.
+        cost (float): The relative cost of one evaluation.
+        violates (callable): The predicate (see `Rules`).
+        where (callable): Called as `where(problem, j)` to further restrict the positions checked, or None.
+        default (bool): Whether the rule is enforced unless rules are chosen explicitly.
+
+    """
+    __slots__ = ('name', 'species', 'window', 'cost', 'violates', 'where', 'default')
+
+    def __init__ (self, name, species, window, cost, violates, where=None, default=True):
+        self.name = name
+        self.species = species
+        self.window = window
+        self.cost = cost
+        self.violates = violates
+        self.where = where
+        self.default = default
+
+    def applies (self, problem, j):
+        """ Returns true if the rule is checked when position `j` of `problem` is placed.
+        """
+        return (problem.species in self.species and (self.window is None or j >= self.window - 1)
+            and (self.where is None or self.where(problem, j)))
+
+    def always_holds (self, problem, j):
+        """ Returns true if the rule reads only position `j` and no candidate there breaks it, so it need not be checked.
+        """
+        if self.window != 1:
+            return False
+        path = [0] * (j + 1)
+        for i in range(len(problem.midi[j])):
+            path[j] = i
+            if self.violates(problem, path, j):
+                return False
+        return True
+
+# Every rule. Costs are relative estimates of one evaluation; rejection rates are measured while searching.
+REGISTRY = [
+    Rule('repeat_note', (1, 2), 2, 1.0, Rules.repeat_note),
+    Rule('parallel_fifth', (1,), 2, 2.0, Rules.parallel_fifth),
+    Rule('parallel_fifth', (2,), 3, 2.0, Rules.parallel_fifth, where=Rules.on_downbeat),
+    Rule('parallel_octave', (1,), 2, 2.0, Rules.parallel_octave),
+    Rule('parallel_octave', (2,), 3, 2.0, Rules.parallel_octave, where=Rules.on_downbeat),
+    # Not enforced by default: the original checks never fired (their helpers returned None or did not exist), so
+    # enabling them drops solutions that the original search returned.
+    Rule('big_leap', (1, 2), 2, 1.0, Rules.big_leap, default=False),
+    Rule('leap_recovery', (1, 2), 3, 1.5, Rules.leap_recovery, default=False),
+    Rule('dissonance_approach', (2,), 3, 1.5, Rules.dissonance_approach),
+    Rule('cadence', (1, 2), 1, 1.0, Rules.cadence, where=Rules.at_cadence),
+    # Reads at most the last `TRITONE + 3` positions, from the second on. Not enforced by default: the original
+    # whole-path check never fired, so enabling it changes the solutions.
+    Rule('exposed_tritone', (1, 2), None, 2.0, Rules.exposed_tritone, default=False),
+]
+
+class RuleSet (object):
+    """ Checks the rules that apply to a problem, cheapest and most selective first.
+
+    An instance is the `check(path, j)` callable used by `Generator.iter_backtrack`. Each applicable rule is evaluated at
+    most once per call. Rules are ordered by their rejection rate per unit cost; while `adaptive`, the rates are
+    measured as the search runs and the order is refreshed every `reorder_every` calls, and after `warmup` calls the
+    order is frozen and counting stops. The order never changes which paths are accepted, only which rule is credited
+    with a rejection. Given a `counterpoint.stats.Stats`, every rule evaluation and search node is also profiled.
+
+    Attributes:
+        rules (list of Rule): The rules being checked.
+        window (int): The number of positions, ending at the one just placed, that the check reads, or None if a rule
+            reads the whole path so far.
+        calls (list of int): The number of evaluations of each rule while adaptive.
+        rejections (list of int): The number of rejections by each rule while adaptive.
+
+    """
+
+    def __init__ (self, problem, rules=None, diagnostics=None, adaptive=True, reorder_every=1024, warmup=1 << 16,
+            stats=None):
+        """ Creates the rule check for a problem.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            rules (list of str): The names of the rules to enforce, or None for every default rule.
+            diagnostics (counterpoint.diagnostics.Diagnostics): Where rejections are recorded, or None.
+            adaptive (bool): Whether to reorder the rules from measured rejection rates.
+            reorder_every (int): The number of calls between reorderings while adaptive.
+            warmup (int): The number of calls after which the order is frozen.
+            stats (counterpoint.stats.Stats): Where rule evaluations and search nodes are profiled, or None.
+
+        """
+        self.problem = problem
+        self.rules = [rule for rule in REGISTRY if problem.species in rule.species
+            and (rule.default if rules is None else rule.name in rules)]
+        windows = [rule.window for rule in self.rules]
+        self.window = None if None in windows else max(windows, default=1)
+        self.diagnostics = diagnostics
+        self.stats = stats
+        self.predicates = [stats.profile(rule.name, rule.violates) if stats is not None else rule.violates
+            for rule in self.rules]
+        self.adaptive = adaptive
+        self.measuring = adaptive or stats is not None # Whether calls go through `measured_check`.
+        self.reorder_every = reorder_every
+        self.warmup = warmup
+        self.count = 0
+        self.calls = [0] * len(self.rules)
+        self.rejections = [0] * len(self.rules)
+        self.order = list(range(len(self.rules)))
+        # The rules to evaluate at each position, leaving out those that cannot fail on the candidates there.
+        self.active = [set(k for k, rule in enumerate(self.rules)
+            if rule.applies(problem, j) and not rule.always_holds(problem, j)) for j in range(len(problem.midi))]
+        self.reorder()
+
+    def score (self, k):
+        """ Gets the expected rejections per unit cost of rule `k`, smoothed so unmeasured rules score 1/2 per cost.
+        """
+        return (self.rejections[k] + 1) / (self.calls[k] + 2) / self.rules[k].cost
+
+    def reorder (self):
+        """ Sorts the rules by score and rebuilds the rules checked at each position.
+        """
+        self.order.sort(key=self.score, reverse=True)
+        self.plan = [[(k, self.predicates[k], self.rules[k].name) for k in self.order if k in active]
+            for j, active in enumerate(self.active)]
+
+    def __call__ (self, path, j):
+        if self.measuring:
+            return self.measured_check(path, j)
+        problem = self.problem
+        for k, violates, name in self.plan[j]:
+            if violates(problem, path, j):
+                if self.diagnostics is not None:
+                    self.diagnostics.reject(name, problem, path, j)
+                return False
+        return True
+
+    def measured_check (self, path, j):
+        """ Checks the rules at position `j` while counting evaluations and rejections per rule (while adaptive) and
+        search nodes (while profiling).
+        """
+        adaptive = self.adaptive
+        if adaptive:
+            self.count += 1
+            if self.count % self.reorder_every == 0:
+                self.reorder()
+                if self.count >= self.warmup:
+                    self.adaptive = False
+                    self.measuring = self.stats is not None
+        problem = self.problem
+        accepted = True
+        for k, violates, name in self.plan[j]:
+            if adaptive:
+                self.calls[k] += 1
+            if violates(problem, path, j):
+                if adaptive:
+                    self.rejections[k] += 1
+                if self.diagnostics is not None:
+                    self.diagnostics.reject(name, problem, path, j)
+                accepted = False
+                break
+        if self.stats is not None:
+            self.stats.visit(j, accepted)
+        return accepted
+
+    def statistics (self):
+        """ Gets the measured evaluations and rejections of each rule, in evaluation order.
+
+        Returns:
+            list of dict: The `name`, `species`, `calls`, `rejections` and `score` of each rule.
+
+        """
+        return [{'name': self.rules[k].name, 'species': self.rules[k].species, 'calls': self.calls[k],
+            'rejections': self.rejections[k], 'score': self.score(k)} for k in self.order]
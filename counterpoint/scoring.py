@@ -0,0 +1,172 @@
+from counterpoint.compact import REST
+
+# The weight of each feature of a counterpoint; penalties have negative weights.
+WEIGHTS = {
+    'step': 2.0, # Each melodic step.
+    'leap': -1.0, # Each melodic leap (a third or more).
+    'contrary': 2.0, # Each move to a new cantus firmus note against the direction of the cantus firmus.
+    'imperfect': 1.0, # Each imperfect consonance (third or sixth, or their compounds) on a downbeat.
+    'monotony': -1.0, # Each downbeat at the same imperfect consonance as the downbeat before it.
+    'climax': 3.0, # The highest note of the line occurs exactly once.
+    'range': -1.0, # Each diatonic step by which the line spans more than a tenth.
+}
+
+# The features decided by a position and the one before it (see `Scorer.features`).
+LOCAL_FEATURES = ['step', 'leap', 'contrary', 'imperfect']
+
+class Scorer (object):
+    """ Scores counterpoints by their melodic and harmonic quality, and bounds the score of partial counterpoints.
+
+    The score is a weighted sum of features (see `WEIGHTS`). It is built up one position at a time by `Scorer.gain`, so
+    a search can score partial paths as it extends them. `Scorer.remaining` bounds the gain still to come after a
+    position from above: it is the best gain through the rest of the domains, taking the features that depend on a
+    position and its predecessor exactly and every other feature at its best, ignoring the rules. It never
+    underestimates, so it can be used to prune a branch-and-bound search without losing the best paths.
+
+    Attributes:
+        problem (counterpoint.compact.Problem): The problem being scored.
+        weights (dict): The weight of each feature.
+
+    """
+
+    def __init__ (self, problem, weights=None):
+        """ Creates the scorer for a problem.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            weights (dict): The weights of the features to change from `WEIGHTS`, or None for the defaults.
+
+        """
+        self.problem = problem
+        self.weights = dict(WEIGHTS)
+        if weights is not None:
+            unknown = set(weights) - set(WEIGHTS)
+            if unknown:
+                raise ValueError(f"Unknown features: {', '.join(sorted(unknown))}")
+            self.weights.update(weights)
+        self.local_weights = [self.weights[name] for name in LOCAL_FEATURES]
+        n = len(problem.midi)
+        species = problem.species
+        # The most `monotony` and the end features can add, at each position and at the end.
+        self.monotony_bound = [max(self.weights['monotony'], 0.0) if j % species == 0 and j >= species else 0.0
+            for j in range(n)]
+        lowest = min((d for candidates in problem.diatonic for d in candidates if d != REST), default=0)
+        highest = max((d for candidates in problem.diatonic for d in candidates if d != REST), default=0)
+        self.end_bound = max(self.weights['climax'], 0.0) + max(self.weights['range'], 0.0) * max(
+            highest - lowest - 9, 0)
+        # `remaining[j][i]` bounds the gain of positions after `j` when candidate `i` is placed at `j`.
+        self.remaining = [None] * n
+        self.remaining[n - 1] = [0.0] * len(problem.midi[n - 1])
+        for j in range(n - 2, -1, -1):
+            after = self.remaining[j + 1]
+            self.remaining[j] = [max(self.local(j + 1, a, b) + after[b] for b in range(len(problem.midi[j + 1])))
+                + self.monotony_bound[j + 1] for a in range(len(problem.midi[j]))]
+
+    def features (self, j, a, b):
+        """ Counts the features decided by placing candidate `b` at position `j` after candidate `a` at `j - 1`.
+
+        Args:
+            j (int): The position.
+            a (int): The candidate index at `j - 1`, or None if `j` is 0.
+            b (int): The candidate index at `j`.
+
+        Returns:
+            list of int: The count of each feature in `LOCAL_FEATURES`.
+
+        """
+        problem = self.problem
+        m, d = problem.midi[j][b], problem.diatonic[j][b]
+        k, downbeat = divmod(j, problem.species)
+        downbeat = downbeat == 0
+        step = leap = contrary = imperfect = 0
+        if m != REST:
+            if a is not None:
+                pm, pd = problem.midi[j - 1][a], problem.diatonic[j - 1][a]
+                if pm != REST:
+                    size = abs(d - pd)
+                    step, leap = size == 1, size >= 2
+                    if downbeat and k > 0:
+                        cf_motion = problem.cf_midi[k] - problem.cf_midi[k - 1]
+                        contrary = (m - pm) * cf_motion < 0
+            if downbeat:
+                imperfect = (d - problem.cf_diatonic[k]) % 7 in (2, 5)
+        return [step, leap, contrary, imperfect]
+
+    def local (self, j, a, b):
+        """ Gets the weighted sum of the features decided by placing candidate `b` at `j` after candidate `a`.
+        """
+        return sum(w * f for w, f in zip(self.local_weights, self.features(j, a, b)))
+
+    def monotony (self, path, j):
+        """ Returns 1 if position `j` is a downbeat at the same imperfect consonance as the downbeat before it, else 0.
+        """
+        problem = self.problem
+        species = problem.species
+        if j % species or j < species:
+            return 0
+        k = j // species
+        d, pd = problem.diatonic[j][path[j]], problem.diatonic[j - species][path[j - species]]
+        if d == REST or pd == REST:
+            return 0
+        interval = d - problem.cf_diatonic[k]
+        return int(interval % 7 in (2, 5) and interval == pd - problem.cf_diatonic[k - 1])
+
+    def end_features (self, path):
+        """ Counts the features of the whole line.
+
+        Returns:
+            dict: The `climax` (1 if the highest note occurs once, else 0) and `range` (the diatonic steps beyond a
+                tenth spanned) features.
+
+        """
+        notes = [self.problem.diatonic[j][i] for j, i in enumerate(path)]
+        notes = [d for d in notes if d != REST]
+        top = max(notes)
+        return {'climax': int(notes.count(top) == 1), 'range': max(top - min(notes) - 9, 0)}
+
+    def gain (self, path, j):
+        """ Gets the score added by position `j` of `path`, including the whole-line features at the last position.
+
+        Args:
+            path (list of int): The candidate indices placed so far.
+            j (int): The position just placed.
+
+        Returns:
+            float: The weighted features decided at `j`.
+
+        """
+        gain = self.local(j, path[j - 1] if j else None, path[j])
+        gain += self.weights['monotony'] * self.monotony(path, j)
+        if j == len(self.problem.midi) - 1:
+            gain += sum(self.weights[name] * count for name, count in self.end_features(path).items())
+        return gain
+
+    def score (self, path):
+        """ Scores a complete path.
+
+        Args:
+            path (tuple of int): The candidate index at each position.
+
+        Returns:
+            float: The score of the counterpoint.
+
+        """
+        return sum(self.gain(path, j) for j in range(len(path)))
+
+    def explain (self, path):
+        """ Counts every feature of a complete path.
+
+        Args:
+            path (tuple of int): The candidate index at each position.
+
+        Returns:
+            dict: The count of each feature in `WEIGHTS`; their weighted sum is `Scorer.score(path)`.
+
+        """
+        counts = dict.fromkeys(WEIGHTS, 0)
+        for j in range(len(path)):
+            for name, count in zip(LOCAL_FEATURES, self.features(j, path[j - 1] if j else None, path[j])):
+                counts[name] += count
+            counts['monotony'] += self.monotony(path, j)
+        counts.update(self.end_features(path))
+        return counts
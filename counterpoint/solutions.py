@@ -0,0 +1,191 @@
+import itertools
+import struct
+import zipfile
+
+import numpy
+
+from counterpoint.compact import Compact, Problem, REST
+
+# The readers of the `.npy` header versions that `numpy.save` writes.
+HEADER_READERS = {(1, 0): numpy.lib.format.read_array_header_1_0, (2, 0): numpy.lib.format.read_array_header_2_0}
+
+class SolutionSet (object):
+    """ A set of counterpoints held as one byte per note: the index of its candidate at each position of the problem.
+
+    A million second species counterpoints above a six note cantus firmus take 11 MB this way, where tuples of
+    `music21` notes would take gigabytes. Counterpoints are only turned back into notes when they are read, one at a
+    time. A set saved to `.npy` or (uncompressed) `.npz` is memory-mapped when loaded, so only the rows read are paged
+    in; a `.npz` file also holds the problem, so it can be loaded on its own.
+
+    Attributes:
+        problem (counterpoint.compact.Problem): The problem the counterpoints were found for.
+        paths (numpy.ndarray): The (N x L) `uint8` candidate indices of the counterpoints, one row each; possibly a
+            `numpy.memmap`.
+
+    """
+
+    def __init__ (self, problem, paths):
+        """ Wraps a matrix of candidate indices.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            paths (numpy.ndarray): The (N x L) candidate indices, L being the number of positions of `problem`.
+
+        Raises:
+            ValueError: If the rows of `paths` do not have one index per position of `problem`.
+
+        """
+        if paths.ndim != 2 or paths.shape[1] != len(problem.midi):
+            raise ValueError(f"Expected paths with {len(problem.midi)} positions, got shape {paths.shape}.")
+        self.problem = problem
+        self.paths = paths
+
+    @staticmethod
+    def from_paths (problem, paths):
+        """ Packs paths of candidate indices (e.g. from `Generator.iter_search`) into a set, without holding them as
+        tuples on the way.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            paths (iterable of tuple of int): The candidate indices of each counterpoint.
+
+        Returns:
+            SolutionSet: The set.
+
+        Raises:
+            ValueError: If a position has more candidates than fit in a byte.
+
+        """
+        if any(len(candidates) > 256 for candidates in problem.midi):
+            raise ValueError("A position has more than 256 candidates.")
+        flat = numpy.fromiter(itertools.chain.from_iterable(paths), dtype=numpy.uint8)
+        return SolutionSet(problem, flat.reshape(-1, len(problem.midi)))
+
+    def __len__ (self):
+        return len(self.paths)
+
+    def __getitem__ (self, index):
+        """ Decodes a counterpoint, or selects some of them.
+
+        Args:
+            index (int, slice or numpy.ndarray): The position of a counterpoint, or a slice, boolean mask or index
+                array of them.
+
+        Returns:
+            tuple of music21.note.GeneralNote or SolutionSet: The notes of the counterpoint at an int position;
+                otherwise a set of the counterpoints selected (a view for a slice).
+
+        """
+        if isinstance(index, (int, numpy.integer)):
+            return Compact.to_notes(self.problem, self.path(index))
+        return SolutionSet(self.problem, self.paths[index])
+
+    def __iter__ (self):
+        for i in range(len(self.paths)):
+            yield self[i]
+
+    def path (self, i):
+        """ Gets the candidate indices of the counterpoint at position `i`.
+        """
+        return tuple(self.paths[i].tolist())
+
+    def pitches (self):
+        """ Gets the pitches of every counterpoint, to query the set with NumPy.
+
+        Returns:
+            tuple of numpy.ndarray: The (N x L) MIDI and diatonic numbers (`REST` for a rest).
+
+        """
+        from counterpoint.vectorized import Vectorized
+        return Vectorized.to_pitches(self.problem, self.paths)
+
+    @property
+    def nbytes (self):
+        """ The bytes taken by the candidate indices.
+        """
+        return self.paths.nbytes
+
+    def save (self, path, compress=False):
+        """ Saves the set.
+
+        Args:
+            path (str): The file to write: a `.npy` file holds only the candidate indices, and a `.npz` file holds the
+                problem too.
+            compress (bool): Whether to compress a `.npz` file; a compressed file cannot be memory-mapped.
+
+        """
+        if path.endswith('.npy'):
+            numpy.save(path, numpy.ascontiguousarray(self.paths))
+            return
+        problem = self.problem
+        width = max((len(candidates) for candidates in problem.midi), default=0)
+
+        def pad (rows):
+            return numpy.array([list(row) + [REST] * (width - len(row)) for row in rows], dtype=numpy.int16)
+
+        save = numpy.savez_compressed if compress else numpy.savez
+        with open(path, 'wb') as f:
+            save(f, paths=numpy.ascontiguousarray(self.paths), species=numpy.array(problem.species),
+                cf_midi=numpy.array(problem.cf_midi, dtype=numpy.int16),
+                cf_diatonic=numpy.array(problem.cf_diatonic, dtype=numpy.int16),
+                midi=pad(problem.midi), diatonic=pad(problem.diatonic),
+                sizes=numpy.array([len(candidates) for candidates in problem.midi], dtype=numpy.int16),
+                lengths=numpy.array(problem.lengths, dtype=numpy.float64))
+
+    @staticmethod
+    def load (path, problem=None, mmap=True):
+        """ Loads a set saved with `SolutionSet.save`.
+
+        Args:
+            path (str): The `.npy` or `.npz` file.
+            problem (counterpoint.compact.Problem): The problem, needed for a `.npy` file; a `.npz` file's own is used.
+            mmap (bool): Whether to memory-map the candidate indices instead of reading them into memory. A compressed
+                `.npz` file is always read.
+
+        Returns:
+            SolutionSet: The set.
+
+        Raises:
+            ValueError: If a `.npy` file is loaded without its problem, or the paths do not fit the problem.
+
+        """
+        if path.endswith('.npy'):
+            if problem is None:
+                raise ValueError("A .npy solution set is loaded with its problem.")
+            return SolutionSet(problem, numpy.load(path, mmap_mode='r' if mmap else None))
+        with numpy.load(path) as archive:
+            sizes = archive['sizes'].tolist()
+            midi, diatonic = archive['midi'].tolist(), archive['diatonic'].tolist()
+            problem = Problem(int(archive['species']), tuple(archive['cf_midi'].tolist()),
+                tuple(archive['cf_diatonic'].tolist()), [tuple(row[:size]) for row, size in zip(midi, sizes)],
+                [tuple(row[:size]) for row, size in zip(diatonic, sizes)], archive['lengths'].tolist())
+            paths = SolutionSet.map_member(path, 'paths.npy') if mmap else None
+            if paths is None:
+                paths = archive['paths']
+        return SolutionSet(problem, paths)
+
+    @staticmethod
+    def map_member (path, name):
+        """ Memory-maps an array stored uncompressed in a `.npz` file.
+
+        Args:
+            path (str): The `.npz` file.
+            name (str): The name of the array's member (e.g. 'paths.npy').
+
+        Returns:
+            numpy.memmap: The read-only array, or None if the member is compressed.
+
+        """
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo(name)
+        if info.compress_type != zipfile.ZIP_STORED:
+            return None
+        with open(path, 'rb') as f:
+            f.seek(info.header_offset + 26) # The name and extra field lengths in the member's local header.
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = numpy.lib.format.read_magic(f)
+            shape, fortran_order, dtype = HEADER_READERS[version](f)
+            offset = f.tell()
+        return numpy.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+            order='F' if fortran_order else 'C')
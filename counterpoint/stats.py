@@ -0,0 +1,173 @@
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+class Stats (object):
+    """ Collects profiling statistics about searches and output building.
+
+    Searches take `stats=None` by default and then pay nothing. Passing a `Stats` counts every rule evaluation and
+    every search node, and times one in `time_every` rule evaluations so that timing stays cheap; rule times are
+    estimated by scaling the sampled times back up. It can also be used as a context manager to time the whole job.
+
+    Attributes:
+        rule_calls (collections.Counter): The number of evaluations of each rule.
+        rule_seconds (collections.Counter): The sampled seconds spent evaluating each rule.
+        visited (collections.Counter): The number of search nodes (placed candidates) checked at each depth.
+        pruned (collections.Counter): The number of those nodes rejected at each depth.
+        sections (collections.defaultdict): The calls and seconds of each timed section (e.g. 'tostream').
+        domains (dict): The number of candidates at each position `before` and `after` the domains were filtered (see
+            `counterpoint.consistency.DomainFilter`), or None if they were not.
+
+    """
+
+    def __init__ (self, time_every=16):
+        """ Creates a statistics sink.
+
+        Args:
+            time_every (int): The sampling interval: every `time_every`-th evaluation of each rule is timed.
+
+        """
+        self.time_every = time_every
+        self.rule_calls = Counter()
+        self.rule_seconds = Counter()
+        self.visited = Counter()
+        self.pruned = Counter()
+        self.sections = defaultdict(lambda: [0, 0.0])
+        self.domains = None
+        self.caches = {}
+        self.started = None
+        self.elapsed = None
+
+    def profile (self, name, violates):
+        """ Wraps a rule predicate to count its evaluations and time a sample of them.
+
+        Args:
+            name (str): The name of the rule.
+            violates (callable): The predicate (see `counterpoint.rules.Rules`).
+
+        Returns:
+            callable: The profiled predicate.
+
+        """
+        calls, seconds, every = self.rule_calls, self.rule_seconds, self.time_every
+        clock = time.perf_counter
+
+        def profiled (problem, path, j):
+            calls[name] += 1
+            if calls[name] % every:
+                return violates(problem, path, j)
+            start = clock()
+            broken = violates(problem, path, j)
+            seconds[name] += clock() - start
+            return broken
+        return profiled
+
+    def visit (self, j, accepted):
+        """ Records that a search node at depth `j` was checked, and whether it was accepted.
+        """
+        self.visited[j] += 1
+        if not accepted:
+            self.pruned[j] += 1
+
+    def record_domains (self, before, after):
+        """ Records the number of candidates at each position before and after the domains were filtered.
+        """
+        self.domains = {'before': list(before), 'after': list(after)}
+
+    @contextmanager
+    def timer (self, section):
+        """ Times a section of work (e.g. building an output stream) as a context manager.
+
+        Args:
+            section (str): The name of the section.
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = self.sections[section]
+            record[0] += 1
+            record[1] += time.perf_counter() - start
+
+    def watch (self, name, cache):
+        """ Starts reporting the hit rate of a cache, counting from its current hits and misses.
+
+        Args:
+            name (str): The name to report the cache under.
+            cache (counterpoint.cache.LRUCache): The cache.
+
+        """
+        if name not in self.caches:
+            info = cache.info()
+            self.caches[name] = (cache, info['hits'], info['misses'])
+
+    def merge (self, stats):
+        """ Adds statistics collected elsewhere (e.g. in a worker process).
+
+        Args:
+            stats (dict): The statistics, as returned by `Stats.as_dict`.
+
+        """
+        for name, rule in stats['rules'].items():
+            self.rule_calls[name] += rule['calls']
+            self.rule_seconds[name] += rule['seconds'] / self.time_every
+        for node in stats['depths']:
+            self.visited[node['depth']] += node['visited']
+            self.pruned[node['depth']] += node['pruned']
+        for section, record in stats['sections'].items():
+            self.sections[section][0] += record['calls']
+            self.sections[section][1] += record['seconds']
+
+    def as_dict (self):
+        """ Gets the statistics.
+
+        Returns:
+            dict: The estimated `seconds` and exact `calls` of each rule under 'rules'; the nodes `visited`, `pruned`
+                and `expanded` at each depth under 'depths'; the `calls` and `seconds` of each timed section under
+                'sections'; the `hits`, `misses` and `hit_rate` of each watched cache under 'caches'; the domain sizes
+                `before` and `after` filtering under 'domains', if recorded; and the 'elapsed' seconds of the enclosing
+                `with` block, if any.
+
+        """
+        caches = {}
+        for name, (cache, hits, misses) in self.caches.items():
+            info = cache.info()
+            hits, misses = info['hits'] - hits, info['misses'] - misses
+            caches[name] = {'hits': hits, 'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else None}
+        return {
+            'rules': dict((name, {'calls': calls, 'seconds': self.rule_seconds[name] * self.time_every})
+                for name, calls in self.rule_calls.items()),
+            'depths': [{'depth': j, 'visited': self.visited[j], 'pruned': self.pruned[j],
+                'expanded': self.visited[j] - self.pruned[j]} for j in sorted(self.visited)],
+            'sections': dict((section, {'calls': calls, 'seconds': seconds})
+                for section, (calls, seconds) in self.sections.items()),
+            'caches': caches,
+            'domains': self.domains,
+            'elapsed': self.elapsed,
+        }
+
+    def to_json (self, path=None):
+        """ Exports the statistics as JSON.
+
+        Args:
+            path (str): The file to write to, or None to only return the JSON.
+
+        Returns:
+            str: The statistics (see `Stats.as_dict`) as JSON.
+
+        """
+        text = json.dumps(self.as_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def __enter__ (self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
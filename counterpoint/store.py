@@ -0,0 +1,150 @@
+import hashlib
+import inspect
+import sqlite3
+import time
+import zlib
+
+import numpy
+
+from counterpoint import compact, rules
+
+class SolutionStore (object):
+    """ A persistent cache of the valid counterpoints of search problems, in an sqlite database.
+
+    Entries are keyed by a hash of the problem (its species, cantus firmus and candidate pitches, so any change to how
+    candidates are built gives a new key) in its canonical transposition, so transposed cantus firmi share an entry.
+    They are stored as compressed candidate index paths, with the version of the rules that produced them (a hash of
+    the source of `counterpoint.rules` and `counterpoint.compact`); entries from other versions are never returned, and
+    are the first to be evicted, so checkouts with different rules can share a store. The database runs in write-ahead
+    logging mode, so any number of processes can read while one writes; reads only record when an entry was used as a
+    best-effort write, at most every `touch_every` seconds per entry and without waiting for the write lock. When the
+    stored paths exceed `max_bytes`, entries from other versions and then the least recently used ones are evicted.
+    """
+
+    def __init__ (self, path, max_bytes=1 << 28, timeout=30.0, touch_every=60.0):
+        """ Opens (or creates) a solution store.
+
+        Args:
+            path (str): The sqlite database file.
+            max_bytes (int): The most bytes of compressed paths to keep. Larger solution sets are not stored.
+            timeout (float): The seconds to wait for another process's write to finish.
+            touch_every (float): The seconds after which a read records again that an entry was used.
+
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.touch_every = touch_every
+        self.version = SolutionStore.rules_version()
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, version TEXT NOT NULL, '
+            'length INTEGER NOT NULL, count INTEGER NOT NULL, paths BLOB NOT NULL, size INTEGER NOT NULL, '
+            'used REAL NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)')
+
+    @staticmethod
+    def rules_version ():
+        """ Gets the version of the rule definitions, which changes whenever their source does.
+
+        Returns:
+            str: A hash of the source of the rule modules.
+
+        """
+        source = ''.join(inspect.getsource(module) for module in [rules, compact])
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def key (problem):
+        """ Gets the key of a problem.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+
+        Returns:
+            str: A hash of the species, cantus firmus, candidate pitches and lengths of `problem`, transposed to its
+                canonical key.
+
+        """
+        problem = problem.canonical() # Transpositions share an entry.
+        text = repr((problem.species, problem.cf_midi, problem.cf_diatonic, problem.midi, problem.diatonic,
+            problem.lengths))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get (self, problem):
+        """ Looks up the valid paths through a problem.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+
+        Returns:
+            list of tuple of int: The candidate indices of each valid path, in `itertools.product` order, or None if the
+                problem is not stored.
+
+        """
+        key = SolutionStore.key(problem)
+        row = self.connection.execute('SELECT length, paths, used FROM solutions WHERE key = ? AND version = ?',
+            (key, self.version)).fetchone()
+        if row is None:
+            return None
+        length, blob, used = row
+        now = time.time()
+        if now - used >= self.touch_every:
+            self.connection.execute('PRAGMA busy_timeout = 0') # Recency is only a hint: never wait for a writer.
+            try:
+                self.connection.execute('UPDATE solutions SET used = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError: # Another process is writing.
+                pass
+            finally:
+                self.connection.execute(f'PRAGMA busy_timeout = {int(self.timeout * 1000)}')
+        paths = numpy.frombuffer(zlib.decompress(blob), dtype=numpy.uint8).reshape(-1, length)
+        return [tuple(path) for path in paths.tolist()]
+
+    def put (self, problem, paths):
+        """ Stores the valid paths through a problem, evicting the least recently used entries if over the size cap.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            paths (list of tuple of int): The candidate indices of each valid path, in `itertools.product` order.
+
+        Returns:
+            bool: True if the paths were stored, False if they alone exceed the size cap.
+
+        """
+        length = len(problem.midi)
+        blob = zlib.compress(numpy.array(paths, dtype=numpy.uint8).reshape(-1, length).tobytes(), 1)
+        if len(blob) > self.max_bytes:
+            return False
+        with self.connection:
+            self.connection.execute('BEGIN IMMEDIATE')
+            self.connection.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (SolutionStore.key(problem), self.version, length, len(paths), blob, len(blob), time.time()))
+            total = self.connection.execute('SELECT SUM(size) FROM solutions').fetchone()[0]
+            for key, size in self.connection.execute('SELECT key, size FROM solutions ORDER BY version = ?, used',
+                    (self.version,)).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.connection.execute('DELETE FROM solutions WHERE key = ?', (key,))
+                total -= size
+        return True
+
+    def info (self):
+        """ Gets the store statistics.
+
+        Returns:
+            dict: The number of `entries`, their total `size` in bytes and `max_bytes`.
+
+        """
+        entries, size = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM solutions').fetchone()
+        return {'entries': entries, 'size': size, 'max_bytes': self.max_bytes}
+
+    def close (self):
+        """ Closes the database connection.
+        """
+        self.connection.close()
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc_info):
+        self.close()
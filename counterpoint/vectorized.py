@@ -0,0 +1,229 @@
+import itertools
+import numpy
+
+from counterpoint.compact import REST, NOT_BIG_LEAP, BIG_LEAP, FIFTH, OCTAVE_UP, OCTAVE_DOWN, LEAP_TYPES
+from counterpoint.rules import REGISTRY
+
+OFFSET = 128 # Differences between MIDI numbers (or `REST`) lie in [-128, 128]; tables are indexed by difference + 128.
+
+LEAP_TABLE = numpy.full(2 * OFFSET + 1, NOT_BIG_LEAP, dtype=numpy.int8) # Big leap type of each difference.
+for leap, leap_type in LEAP_TYPES.items():
+    LEAP_TABLE[leap + OFFSET] = leap_type
+
+DISSONANT = numpy.zeros(2 * OFFSET + 1, dtype=bool) # Whether each absolute difference is dissonant.
+DISSONANT[[1, 2, 6, 10, 11]] = True
+
+RULES = ['repeat_note', 'parallel_fifth', 'parallel_octave', 'big_leap', 'leap_recovery', 'dissonance_approach',
+    'exposed_tritone']
+# The rules with a mask that are enforced unless rules are chosen explicitly (see `counterpoint.rules.REGISTRY`).
+DEFAULT_RULES = [name for name in RULES if any(rule.default for rule in REGISTRY if rule.name == name)]
+
+class Vectorized (object):
+    """ Validates whole batches of candidate counterpoints at once with NumPy.
+
+    A batch is an (N x L) matrix of candidate indices into a `counterpoint.compact.Problem`, one row per counterpoint.
+    Each rule in `RULES` is evaluated as a boolean mask over the rows. Masks agree exactly with the scalar checks of
+    the same rules (the cadence rule always holds on the candidates, so it needs none). `DEFAULT_RULES` are enforced
+    unless rules are chosen; the opt-in rules (e.g. `exposed_tritone`) are enforced when named.
+    """
+
+    @staticmethod
+    def pitch_tables (problem):
+        """ Gets the candidate pitches of a problem as tables indexed by position and candidate index.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+
+        Returns:
+            tuple of numpy.ndarray: The (L x D) MIDI and diatonic tables, padded with `REST`.
+
+        """
+        width = max(len(candidates) for candidates in problem.midi)
+        midi = numpy.full((len(problem.midi), width), REST, dtype=numpy.int16)
+        diatonic = numpy.full((len(problem.midi), width), REST, dtype=numpy.int16)
+        for j, (m, d) in enumerate(zip(problem.midi, problem.diatonic)):
+            midi[j, :len(m)] = m
+            diatonic[j, :len(d)] = d
+        return midi, diatonic
+
+    @staticmethod
+    def to_pitches (problem, paths, tables=None):
+        """ Converts a batch of candidate index paths to matrices of pitches.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            paths (numpy.ndarray): The (N x L) candidate indices.
+            tables (tuple of numpy.ndarray): The result of `Vectorized.pitch_tables`, if already computed.
+
+        Returns:
+            tuple of numpy.ndarray: The (N x L) MIDI and diatonic numbers.
+
+        """
+        midi, diatonic = tables if tables is not None else Vectorized.pitch_tables(problem)
+        positions = numpy.arange(paths.shape[1])
+        return midi[positions, paths], diatonic[positions, paths]
+
+    @staticmethod
+    def rule_masks (problem, midi, diatonic):
+        """ Evaluates every rule over a batch of counterpoints.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            midi (numpy.ndarray): The (N x L) MIDI numbers of the counterpoints.
+            diatonic (numpy.ndarray): The (N x L) diatonic numbers of the counterpoints.
+
+        Returns:
+            dict: For each rule name in `RULES`, an (N,) mask that is true where the counterpoint breaks the rule.
+
+        """
+        midi = midi.astype(numpy.int16)
+        diatonic = diatonic.astype(numpy.int16)
+        n, length = midi.shape
+        cf = numpy.array(problem.cf_indices())
+        cf_midi = numpy.array(problem.cf_midi, dtype=numpy.int16)[cf]
+        cf_diatonic = numpy.array(problem.cf_diatonic, dtype=numpy.int16)[cf]
+
+        rest = midi == REST
+        steps = midi[:, 1:] - midi[:, :-1] # Melodic step into each position from the one before.
+        leaps = LEAP_TABLE[steps + OFFSET]
+        leaps[rest[:, 1:] | rest[:, :-1]] = NOT_BIG_LEAP
+        masks = {}
+
+        masks['repeat_note'] = ((steps == 0) & (diatonic[:, 1:] == diatonic[:, :-1])).any(axis=1)
+
+        # Harmonic intervals over the cantus firmus, compared between consecutive downbeats.
+        harmonic_midi = midi - cf_midi
+        harmonic_diatonic = diatonic - cf_diatonic
+        downbeats = numpy.arange(0, length, problem.species)
+        for name, (generic, semitones) in [('parallel_fifth', (4, 7)), ('parallel_octave', (7, 12))]:
+            at = (harmonic_diatonic == generic) & (harmonic_midi == semitones) & ~rest
+            masks[name] = (at[:, downbeats[:-1]] & at[:, downbeats[1:]]).any(axis=1)
+
+        masks['big_leap'] = (leaps == BIG_LEAP).any(axis=1)
+
+        # A special leap into position i must be recovered by the step out of it.
+        special, after = leaps[:, :-1], steps[:, 1:]
+        recovered = (((special == FIFTH) & (after > -6) & (after < 0))
+            | ((special == OCTAVE_UP) & (after > -12) & (after < 0))
+            | ((special == OCTAVE_DOWN) & (after > 0) & (after < 12)))
+        masks['leap_recovery'] = (numpy.isin(special, [FIFTH, OCTAVE_UP, OCTAVE_DOWN]) & ~recovered).any(axis=1)
+
+        if problem.species == 2:
+            # A dissonance at position i (1 <= i <= L - 2) must be approached and left by step.
+            by_step = (numpy.abs(steps) == 1) | (numpy.abs(steps) == 2)
+            dissonant = DISSONANT[numpy.abs(harmonic_midi[:, 1:-1])]
+            approached = ~rest[:, :-2] & by_step[:, :-1] & by_step[:, 1:]
+            masks['dissonance_approach'] = (dissonant & ~approached).any(axis=1)
+        else:
+            masks['dissonance_approach'] = numpy.zeros(n, dtype=bool)
+
+        masks['exposed_tritone'] = Vectorized.exposed_tritone_mask(midi)
+        return masks
+
+    @staticmethod
+    def exposed_tritone_mask (midi):
+        """ Finds the counterpoints that outline a tritone.
+
+        The line is split into runs of steps in one direction (steps to or from a rest have no direction). A run whose
+        steps add up to exactly six semitones outlines a tritone.
+
+        Args:
+            midi (numpy.ndarray): The (N x L) MIDI numbers of the counterpoints.
+
+        Returns:
+            numpy.ndarray: An (N,) mask that is true where a tritone is outlined.
+
+        """
+        midi = midi.astype(numpy.int16)
+        rest = midi == REST
+        steps = midi[:, 1:] - midi[:, :-1]
+        steps[rest[:, 1:] | rest[:, :-1]] = 0
+        directions = numpy.sign(steps)
+        n, width = steps.shape
+        if width == 0:
+            return numpy.zeros(n, dtype=bool)
+
+        # Cumulative magnitude since the start of each run: a cumulative sum, less its value where the run began.
+        starts = numpy.ones((n, width), dtype=bool)
+        starts[:, 1:] = directions[:, 1:] != directions[:, :-1]
+        ends = numpy.ones((n, width), dtype=bool)
+        ends[:, :-1] = starts[:, 1:]
+        totals = numpy.zeros((n, width + 1), dtype=numpy.int32)
+        totals[:, 1:] = numpy.cumsum(numpy.abs(steps), axis=1)
+        run_start = numpy.maximum.accumulate(numpy.where(starts, numpy.arange(width), 0), axis=1)
+        spans = totals[:, 1:] - numpy.take_along_axis(totals, run_start, axis=1)
+        return (ends & (directions != 0) & (spans == 6)).any(axis=1)
+
+    @staticmethod
+    def validate (problem, paths, rules=DEFAULT_RULES, tables=None):
+        """ Decides which counterpoints in a batch satisfy every rule.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            paths (numpy.ndarray): The (N x L) candidate indices of the counterpoints.
+            rules (list of str): The rules to enforce, from `RULES`.
+            tables (tuple of numpy.ndarray): The result of `Vectorized.pitch_tables`, if already computed.
+
+        Returns:
+            numpy.ndarray: An (N,) mask that is true where the counterpoint is accepted.
+
+        Raises:
+            ValueError: If a rule has no mask.
+
+        """
+        unknown = [rule for rule in rules if rule not in RULES]
+        if unknown:
+            raise ValueError(f"Unsupported rules: {', '.join(unknown)} (supported: {', '.join(RULES)})")
+        midi, diatonic = Vectorized.to_pitches(problem, paths, tables)
+        masks = Vectorized.rule_masks(problem, midi, diatonic)
+        accepted = numpy.ones(len(paths), dtype=bool)
+        for rule in rules:
+            accepted &= ~masks[rule]
+        return accepted
+
+    @staticmethod
+    def iter_batches (problem, batch_size=1 << 16):
+        """ Enumerates every path through a problem in batches, in `itertools.product` order.
+
+        The longest suffix of positions whose combinations fit in `batch_size` is enumerated once as a block; each batch
+        is that block under one combination of the remaining prefix positions.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            batch_size (int): The most rows in a batch (a single block may exceed it if one domain is larger).
+
+        Yields:
+            numpy.ndarray: Each (N x L) batch of candidate indices.
+
+        """
+        sizes = [len(candidates) for candidates in problem.midi]
+        split, block = len(sizes), 1
+        while split > 0 and block * sizes[split - 1] <= batch_size:
+            split -= 1
+            block *= sizes[split]
+        if split == len(sizes): # Even the last domain alone is larger than a batch.
+            split -= 1
+        suffix = numpy.indices(sizes[split:], dtype=numpy.uint8).reshape(len(sizes) - split, -1).T
+        for prefix in itertools.product(*[range(size) for size in sizes[:split]]):
+            batch = numpy.empty((len(suffix), len(sizes)), dtype=numpy.uint8)
+            batch[:, :split] = prefix
+            batch[:, split:] = suffix
+            yield batch
+
+    @staticmethod
+    def iter_valid_paths (problem, rules=DEFAULT_RULES, batch_size=1 << 16):
+        """ Yields every path through a problem that satisfies the rules, validating in batches.
+
+        Args:
+            problem (counterpoint.compact.Problem): The problem.
+            rules (list of str): The rules to enforce, from `RULES`.
+            batch_size (int): The number of paths validated at once.
+
+        Yields:
+            tuple of int: The candidate indices of each accepted path, in `itertools.product` order.
+
+        """
+        tables = Vectorized.pitch_tables(problem)
+        for batch in Vectorized.iter_batches(problem, batch_size):
+            for path in batch[Vectorized.validate(problem, batch, rules, tables)].tolist():
+                yield tuple(path)
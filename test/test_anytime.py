@@ -0,0 +1,101 @@
+import itertools
+import json
+import threading
+import unittest
+import music21
+
+from counterpoint.anytime import CancellationToken, SearchState
+from counterpoint.generator import Generator
+
+class TestAnytime (unittest.TestCase):
+    """ Tests for interruptible searches.
+    """
+
+    def setUp (self):
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'G4', 'E4', 'D4']]
+        self.problem = Generator.get_problem(self.cf, 1)
+        self.expected = list(Generator.iter_search(self.problem))
+
+    def test_uninterrupted_search_is_exhaustive (self):
+        state = SearchState()
+        self.assertEqual(self.expected, list(Generator.iter_search(self.problem, state=state)))
+        self.assertTrue(state.exhaustive)
+        self.assertEqual(1.0, state.coverage)
+        self.assertIsNone(state.frontier)
+        self.assertEqual(len(self.expected), state.found)
+
+    def test_resume_from_saved_frontier (self):
+        state = SearchState()
+        found, coverages = [], []
+        while not state.exhaustive:
+            check = Generator.get_check(self.problem)
+            found += list(Generator.iter_interruptible(self.problem.domains(), check, state, check_every=8,
+                token=StopAfter(5)))
+            coverages.append(state.coverage)
+            state = SearchState.from_dict(json.loads(json.dumps(state.as_dict())))
+        self.assertGreater(len(coverages), 2)
+        self.assertEqual(sorted(coverages), coverages)
+        self.assertEqual(self.expected, found)
+
+    def test_resume_after_caller_stops_reading (self):
+        state = SearchState()
+        found = list(itertools.islice(Generator.iter_search(self.problem, state=state), 10))
+        self.assertFalse(state.exhaustive)
+        self.assertGreater(state.coverage, 0.0)
+        found += list(Generator.iter_search(self.problem, state=state))
+        self.assertEqual(self.expected, found)
+        self.assertRaises(ValueError, list, Generator.iter_search(Generator.get_problem(self.cf, 2),
+            state=SearchState.from_dict(dict(state.as_dict(), exhaustive=False, frontier=[0]))))
+
+    def test_cancellation_and_budget (self):
+        token = CancellationToken()
+        token.cancel()
+        state = SearchState()
+        self.assertEqual([], Generator.firstspeciesabove(self.cf, token=token, state=state))
+        self.assertEqual((0,), state.frontier)
+        self.assertEqual(0.0, state.coverage)
+        token = CancellationToken()
+        timer = threading.Timer(0.05, token.cancel)
+        timer.start()
+        state = SearchState()
+        found = Generator.secondspeciesabove(self.cf, budget=5.0, token=token, state=state)
+        timer.join()
+        self.assertFalse(state.exhaustive)
+        self.assertEqual(state.found, len(found))
+        self.assertLess(state.coverage, 1.0)
+
+    def test_resumed_budget_makes_progress (self):
+        problem = Generator.get_problem(self.cf[1:], 2)
+        expected = list(Generator.iter_search(problem))
+        state, found, calls = SearchState(), [], 0
+        while not state.exhaustive:
+            found += list(Generator.iter_search(problem, budget=0.0, state=state))
+            calls += 1
+        self.assertGreater(calls, 1)
+        self.assertEqual(expected, found)
+
+    def test_empty_domain (self):
+        cf = [music21.note.Note(name, quarterLength=4) for name in ['C4', 'C#4']]
+        token = CancellationToken()
+        token.cancel()
+        state = SearchState()
+        self.assertEqual([], Generator.firstspeciesabove(cf, token=token, state=state))
+        self.assertTrue(state.exhaustive)
+        self.assertEqual(1.0, state.as_dict()['coverage'])
+        state = SearchState.from_dict({'frontier': [0], 'exhaustive': False, 'nodes': 0, 'found': 0, 'sizes': [3, 0]})
+        self.assertEqual(1.0, state.coverage)
+
+class StopAfter (object):
+    """ A stand-in cancellation token that is cancelled after it is checked a number of times.
+    """
+
+    def __init__ (self, checks):
+        self.checks = checks
+
+    @property
+    def cancelled (self):
+        self.checks -= 1
+        return self.checks < 0
+
+if __name__ == '__main__':
+    unittest.main()
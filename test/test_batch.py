@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from counterpoint.batch import Batch, main
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+class TestBatch (unittest.TestCase):
+    """ Tests for the `Batch` class.
+    """
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+        self.inputs = os.path.join(self.directory, 'inputs')
+        shutil.copytree(EXAMPLES, self.inputs)
+        with open(os.path.join(self.inputs, 'broken.xml'), 'w') as f:
+            f.write('<score-partwise')
+
+    def tearDown (self):
+        shutil.rmtree(self.directory)
+
+    def test_bad_file_does_not_abort_batch (self):
+        paths = Batch.find_inputs(self.inputs)
+        self.assertEqual(['3_note.xml', '6_note.xml', 'broken.xml'], [os.path.basename(path) for path in paths])
+        output = os.path.join(self.directory, 'output')
+        summaries = list(Batch.run(paths, output, species=2, solutions=2, workers=2, seed=3))
+        self.assertEqual(paths, [summary['input'] for summary in summaries])
+        self.assertEqual([None, None], [summary['error'] for summary in summaries[:2]])
+        self.assertIsNotNone(summaries[2]['error'])
+        self.assertEqual(23, summaries[0]['found'])
+        for summary in summaries[:2]:
+            self.assertEqual(2, len(summary['outputs']))
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in summary['outputs']))
+
+    def test_simple_files_do_not_import_music21 (self):
+        script = ("import sys; from counterpoint.batch import Batch; "
+            f"summary = Batch.process({os.path.join(self.inputs, '6_note.xml')!r}, {self.directory!r}, seed=1); "
+            "print(summary['error'], len(summary['outputs']), 'music21' in sys.modules)")
+        output = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(EXAMPLES),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout.split()
+        self.assertEqual(['None', '1', 'False'], output)
+
+    def test_draws_distinct_counterpoints (self):
+        summary = Batch.process(os.path.join(self.inputs, '3_note.xml'), self.directory, 2, 30, 1)
+        self.assertEqual(23, summary['found'])
+        self.assertEqual(23, len(summary['outputs']))
+        contents = set()
+        for path in summary['outputs']:
+            with open(path, 'rb') as f:
+                contents.add(f.read())
+        self.assertEqual(23, len(contents))
+
+    def test_output_names (self):
+        paths = [os.path.join('a', 'x.xml'), os.path.join('b', 'x.xml'), os.path.join('b', 'y.xml')]
+        self.assertEqual(['a_x', 'b_x', 'y'], Batch.output_names(paths))
+        self.assertEqual(['x', 'y'], Batch.output_names(paths[1:]))
+        with self.assertRaises(ValueError):
+            Batch.output_names([os.path.join('a_b', 'x.xml'), os.path.join('a', 'b', 'x.xml')])
+
+    def test_key (self):
+        path = os.path.join(self.inputs, '6_note.xml')
+        every = Batch.process(path, self.directory, seed=1)
+        kept = Batch.process(path, self.directory, seed=1, key='auto')
+        self.assertEqual([None, None], [every['error'], kept['error']])
+        self.assertLess(kept['found'], every['found'])
+        path = os.path.join(self.inputs, '3_note.xml') # No second species counterpoint stays in D dorian.
+        self.assertIn('stays in the key of D dorian', Batch.process(path, self.directory, key='auto')['error'])
+        self.assertIn('Unknown mode', Batch.process(path, self.directory, key='C hypodorian')['error'])
+        output = os.path.join(self.directory, 'output')
+        self.assertEqual(1, main([self.inputs, output, '--key', 'Dx major']))
+        self.assertFalse(os.path.exists(output))
+
+    def test_glob_source (self):
+        paths = Batch.find_inputs(os.path.join(self.inputs, '*_note.xml'))
+        self.assertEqual(2, len(paths))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from counterpoint.benchmark import Benchmark, KEYS
+from counterpoint.compact import Compact
+
+class TestBenchmark (unittest.TestCase):
+    """ Tests for the `Benchmark` class.
+    """
+
+    def test_synthetic_cantus_firmus (self):
+        for length in range(4, 17):
+            tonic, mode = KEYS[length % len(KEYS)]
+            cf = Benchmark.synthetic_cantus_firmus(length, tonic, mode)
+            self.assertEqual(length, len(cf))
+            self.assertEqual(tonic, cf[0].nameWithOctave)
+            self.assertEqual(tonic, cf[-1].nameWithOctave)
+            midi = [Compact.from_note(note)[0] for note in cf]
+            self.assertTrue(all(a != b for a, b in zip(midi, midi[1:])))
+        self.assertEqual([note.nameWithOctave for note in Benchmark.synthetic_cantus_firmus(8)],
+            [note.nameWithOctave for note in Benchmark.synthetic_cantus_firmus(8)])
+
+    def test_engines_agree (self):
+        totals = set()
+        for engine in ['list', 'iter', 'vectorized', 'count']:
+            result = Benchmark.run_case({'engine': engine, 'species': 1, 'length': 5, 'tonic': 'C4', 'mode': 'major',
+                'limit': 100000, 'budget': 10.0, 'workers': 1})
+            self.assertNotIn('skipped', result)
+            self.assertGreater(result['peak_rss_kb'], 0)
+            totals.add(result['solutions'])
+        self.assertEqual(1, len(totals))
+
+    def test_startup_does_not_import_music21 (self):
+        for result in Benchmark.startup(repeats=1):
+            self.assertTrue(result['allowed'] or not result['music21'], result['module'])
+            self.assertGreater(result['seconds'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
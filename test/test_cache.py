@@ -0,0 +1,23 @@
+import unittest
+
+from counterpoint.cache import LRUCache
+
+class TestLRUCache (unittest.TestCase):
+    """ Tests for the `LRUCache` class.
+    """
+
+    def test_counts_hits_and_misses (self):
+        cache = LRUCache(2)
+        self.assertEqual(1, cache.get('a', lambda: 1))
+        self.assertEqual(1, cache.get('a', lambda: 2))
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2}, cache.info())
+
+    def test_evicts_least_recently_used (self):
+        cache = LRUCache(2)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 1) # `b` is now the least recently used.
+        cache.get('c', lambda: 3)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('a', lambda: None))
+        self.assertEqual(None, cache.get('b', lambda: None))
@@ -0,0 +1,55 @@
+import itertools
+import unittest
+import music21
+
+from counterpoint.compact import Compact, BIG_LEAP, FIFTH, OCTAVE_UP, OCTAVE_DOWN, NOT_BIG_LEAP
+from counterpoint.generator import Generator
+
+NAMES = ['B#3', 'C4', 'C#4', 'D-4', 'D4', 'E4', 'F4', 'F#4', 'G4', 'A-4', 'A4', 'B-4', 'B4', 'C5', 'D5', 'G5', 'C6']
+
+LEAP_TYPES = {
+    Generator.BigLeapType.NOT_BIG_LEAP: NOT_BIG_LEAP,
+    Generator.BigLeapType.BIG_LEAP: BIG_LEAP,
+    Generator.BigLeapType.FIFTH: FIFTH,
+    Generator.BigLeapType.OCTAVE_UP: OCTAVE_UP,
+    Generator.BigLeapType.OCTAVE_DOWN: OCTAVE_DOWN,
+}
+
+class TestCompact (unittest.TestCase):
+    """ Tests for the `Compact` class.
+    """
+
+    def test_round_trip (self):
+        for name in NAMES:
+            note = music21.note.Note(name, quarterLength=2)
+            self.assertEqual(note, Compact.to_note(*Compact.from_note(note), 2))
+        self.assertTrue(Compact.to_note(*Compact.from_note(music21.note.Rest()), 2).isRest)
+
+    def test_names_and_intervals_match_music21 (self):
+        for name in NAMES:
+            note = music21.note.Note(name)
+            self.assertEqual(Compact.from_note(note), Compact.from_name(name))
+            for interval in ['p1', 'm2', 'A4', 'p5', 'M6', 'M7', 'p8', 'M9']:
+                self.assertEqual(Compact.from_note(Generator.get_above_note(note, interval)),
+                    Compact.above(*Compact.from_name(name), interval))
+        self.assertRaises(ValueError, Compact.interval, 'M5')
+        for name in ['Dx4', 'D#-4', 'H4', 'C', '']:
+            self.assertRaises(ValueError, Compact.from_name, name)
+
+    def test_rules_match_generator (self):
+        notes = [music21.note.Note(name) for name in NAMES]
+        pitches = [Compact.from_note(note) for note in notes]
+        for (x, (xm, xd)), (y, (ym, yd)) in itertools.product(zip(notes, pitches), repeat=2):
+            self.assertEqual(Generator.is_same_note(x, y), Compact.is_same_note(xm, xd, ym, yd))
+            self.assertEqual(Generator.is_interval('P5', x, y), Compact.is_parallel_fifth(xm, xd, ym, yd, xm, xd, ym, yd))
+            self.assertEqual(Generator.is_interval('P8', x, y), Compact.is_parallel_octave(xm, xd, ym, yd, xm, xd, ym, yd))
+            self.assertEqual(LEAP_TYPES[Generator.big_leap_type(x, y)], Compact.big_leap_type(xm, ym))
+            self.assertEqual(Generator.ifinharmonic(x, y), Compact.ifinharmonic(xm, ym))
+            for leap in LEAP_TYPES:
+                self.assertEqual(Generator.recover(leap, x, y), Compact.recover(LEAP_TYPES[leap], xm, ym))
+
+    def test_approleftstep_matches_generator (self):
+        notes = [music21.note.Note(name) for name in NAMES[:10]]
+        for b, n, a in itertools.product(notes, repeat=3):
+            self.assertEqual(Generator.approleftstep(b, n, a),
+                Compact.approleftstep(Compact.from_note(b)[0], Compact.from_note(n)[0], Compact.from_note(a)[0]))
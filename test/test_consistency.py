@@ -0,0 +1,41 @@
+import unittest
+import music21
+
+from counterpoint.consistency import DomainFilter
+from counterpoint.generator import Generator
+
+def ends_on (value):
+    """ A rule check that counts up by one and must end on `value`.
+    """
+    def check (path, j):
+        return (j == 0 or path[j] == path[j - 1] + 1) and (j < 3 or path[j] == value)
+    return check
+
+class TestDomainFilter (unittest.TestCase):
+    """ Tests for the `DomainFilter` class.
+    """
+
+    def test_keeps_exactly_what_paths_use (self):
+        domains = DomainFilter([range(6)] * 4, ends_on(4))
+        self.assertEqual([[1], [2], [3], [4]], domains.domains)
+        self.assertEqual([6, 6, 6, 6], domains.before)
+        self.assertEqual([1, 1, 1, 1], domains.after)
+        self.assertTrue(domains.consistent)
+
+    def test_proves_there_is_no_solution (self):
+        domains = DomainFilter([range(6)] * 4, ends_on(2))
+        self.assertEqual([[], [], [], []], domains.domains)
+        self.assertFalse(domains.consistent)
+
+    def test_search_is_unchanged (self):
+        cf = [music21.note.Note(name, quarterLength=4) for name in ['C4', 'E4', 'D4', 'C4']]
+        for species in [1, 2]:
+            problem = Generator.get_problem(cf, species)
+            domains = Generator.get_domains(problem)
+            self.assertLess(sum(map(len, domains)), sum(map(len, problem.domains())))
+            expected = Generator.backtrack(problem.domains(), Generator.get_check(problem))
+            self.assertEqual(expected, Generator.backtrack(domains, Generator.get_check(problem)))
+            self.assertEqual(expected, list(Generator.iter_search(problem)))
+
+if __name__ == '__main__':
+    unittest.main()
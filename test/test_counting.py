@@ -0,0 +1,63 @@
+import collections
+import itertools
+import random
+import unittest
+
+from counterpoint.compact import Compact
+from counterpoint.consistency import DomainFilter
+from counterpoint.counting import SolutionCounter
+from counterpoint.generator import Generator
+from counterpoint.rules import REGISTRY, RuleSet
+
+def no_repeats (path, j):
+    """ A rule check that rejects the same value twice in a row.
+    """
+    return j == 0 or path[j] != path[j - 1]
+
+class TestSolutionCounter (unittest.TestCase):
+    """ Tests for the `SolutionCounter` class.
+    """
+
+    def test_counts_valid_paths (self):
+        counter = SolutionCounter([range(3)] * 4, no_repeats)
+        self.assertEqual(3 * 2 * 2 * 2, counter.total)
+
+    def test_sample_is_uniform (self):
+        counter = SolutionCounter([range(3)] * 3, no_repeats)
+        rng = random.Random(0)
+        draws = collections.Counter(counter.sample(rng) for _ in range(12000))
+        self.assertEqual(counter.total, len(draws))
+        self.assertTrue(all(800 < n < 1200 for n in draws.values()))
+
+    def test_path_follows_search_order (self):
+        counter = SolutionCounter([range(3)] * 3, no_repeats)
+        expected = [path for path in itertools.product(range(3), repeat=3) if path[0] != path[1] != path[2]]
+        self.assertEqual(expected, [counter.path(i) for i in range(counter.total)])
+        with self.assertRaises(IndexError):
+            counter.path(counter.total)
+
+    def test_sample_distinct (self):
+        counter = SolutionCounter([range(3)] * 3, no_repeats)
+        drawn = counter.sample_distinct(5, random.Random(1))
+        self.assertEqual(5, len(set(drawn)))
+        self.assertEqual(sorted(drawn), drawn)
+        self.assertEqual(counter.total, len(counter.sample_distinct(100)))
+
+    def test_no_solutions (self):
+        counter = SolutionCounter([range(1)] * 2, no_repeats)
+        self.assertEqual(0, counter.total)
+        self.assertEqual(None, counter.sample())
+        self.assertEqual([], counter.sample_distinct(3))
+
+    def test_rejects_checks_reading_further_back (self):
+        cf = [Compact.from_name(name) + (4.0,) for name in ['D4', 'F4', 'E4', 'D4']]
+        problem = Generator.get_line_problem(cf, 2)
+        self.assertEqual(3, RuleSet(problem).window)
+        check = RuleSet(problem, [rule.name for rule in REGISTRY])
+        self.assertIsNone(check.window)
+        for search in [lambda: SolutionCounter(problem.domains(), check),
+                lambda: DomainFilter(problem.domains(), check),
+                lambda: Generator.beam_search(problem, 1 << 20, 3, check=check)]:
+            with self.assertRaisesRegex(ValueError, 'exposed_tritone'):
+                search()
+        self.assertTrue(Generator.top_k(problem, 3, check=check))
@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import unittest
+import music21
+
+from counterpoint.diagnostics import Diagnostics
+from counterpoint.generator import Generator
+
+class TestDiagnostics (unittest.TestCase):
+    """ Tests for the `Diagnostics` class.
+    """
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'E4', 'D4']]
+
+    def tearDown (self):
+        shutil.rmtree(self.directory)
+
+    def test_counts_rejections_per_rule (self):
+        diagnostics = Diagnostics()
+        solutions = Generator.secondspeciesabove(self.cf, diagnostics)
+        self.assertEqual(solutions, list(Generator.iter_second_species(self.cf)))
+        self.assertGreater(diagnostics.rejections['repeat_note'], 0)
+        self.assertGreater(diagnostics.rejections['dissonance_approach'], 0)
+
+    def test_writes_sampled_trace (self):
+        path = os.path.join(self.directory, 'trace.tsv')
+        with Diagnostics(trace_path=path, trace_every=10) as diagnostics:
+            list(Generator.iter_second_species(self.cf, diagnostics))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(sum(n // 10 for n in diagnostics.rejections.values()), len(lines))
+        self.assertIn(lines[0].split('\t')[0], diagnostics.rejections)
+
+    def test_worker_counts_are_merged (self):
+        expected = Diagnostics()
+        list(Generator.iter_second_species(self.cf, expected))
+        actual = Diagnostics()
+        list(Generator.iter_second_species(self.cf, actual, workers=2))
+        # Adaptive rule ordering can credit a rejection to a different rule, but never changes how many there are.
+        self.assertEqual(sum(expected.rejections.values()), sum(actual.rejections.values()))
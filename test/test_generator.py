@@ -1,8 +1,32 @@
+import hashlib
+import itertools
+import time
 import unittest
+from unittest import mock
 import music21
 
+from counterpoint.compact import Compact
+from counterpoint.diagnostics import Diagnostics
 from counterpoint.generator import Generator
 
+def make_cantus_firmus (names):
+    """ Builds a whole-note cantus firmus from a list of pitch names (e.g. 'C4').
+    """
+    return [music21.note.Note(name, quarterLength=4) for name in names]
+
+def slow_subtree (problem, prefix, count_rejections=False, profile=False, domains=None):
+    """ Searches a subtree like `Generator.search_subtree`, taking seconds for all but the first.
+    """
+    if any(prefix):
+        time.sleep(5)
+    return [prefix + (0,) * (len(problem.midi) - len(prefix))], {}, None
+
+# The number and SHA-256 of the second species counterpoints returned by the original product-and-filter search.
+BASELINE = {
+    ('C4', 'E4', 'D4', 'C4'): (2206, '52277df94200948146b2eae40c487cbb0b4c69ddf63b84c198f684b5f1079dfa'),
+    ('D4', 'F4', 'E4', 'D4'): (2282, '7308fd7c151aabf0dc8a674cb86da4c1c71d840bf70e38100c463c026a9d6a77'),
+}
+
 class TestGenerator (unittest.TestCase):
     """ Tests for the `Generator` class.
     """
@@ -12,8 +36,133 @@ class TestGenerator (unittest.TestCase):
         actual = Generator.get_above_note(music21.note.Note('C'), 'm3')
         self.assertEqual(expected, actual)
 
+    def test_get_above_note_is_cached (self):
+        Generator.above_note_cache.clear()
+        first = Generator.get_above_note(music21.note.Note('C4'), 'm3')
+        first.quarterLength = 2 # Must not leak into the cache.
+        second = Generator.get_above_note(music21.note.Note('C4'), 'm3')
+        self.assertEqual(music21.note.Note('E-4'), second)
+        self.assertEqual(1, Generator.above_note_cache.hits)
+        self.assertEqual(1, Generator.above_note_cache.misses)
+
     def test_get_half_steps (self):
         expected = 4
         actual = Generator.get_half_steps(music21.note.Note('C'), music21.note.Note('E'))
         self.assertEqual(expected, actual)
-        
+
+    def test_big_leap_type (self):
+        c4 = music21.note.Note('C4')
+        self.assertEqual(Generator.BigLeapType.BIG_LEAP, Generator.big_leap_type(c4, music21.note.Note('A4')))
+        self.assertEqual(Generator.BigLeapType.OCTAVE_UP, Generator.big_leap_type(c4, music21.note.Note('C5')))
+        self.assertEqual(Generator.BigLeapType.NOT_BIG_LEAP, Generator.big_leap_type(c4, music21.note.Note('G4')))
+
+    def test_is_exposed_tritone (self):
+        self.assertTrue(Generator.is_exposed_tritone(make_cantus_firmus(['F4', 'G4', 'A4', 'B4', 'A4'])))
+        self.assertTrue(Generator.is_exposed_tritone(make_cantus_firmus(['A4', 'F4', 'G4', 'A4', 'B4'])))
+        self.assertFalse(Generator.is_exposed_tritone(make_cantus_firmus(['F4', 'G4', 'A4', 'B4', 'C5'])))
+        broken = make_cantus_firmus(['F4', 'A4']) + [music21.note.Rest()] + make_cantus_firmus(['B4'])
+        self.assertFalse(Generator.is_exposed_tritone(broken))
+
+    def test_candidates_match_note_domains (self):
+        for names in [['D4', 'F4', 'E4', 'D4'], ['F#4', 'B-3', 'C#5', 'E-4', 'G4', 'F#4']]:
+            cf = make_cantus_firmus(names)
+            for species, domains in [(1, Generator.first_species_domains), (2, Generator.second_species_domains)]:
+                expected = Compact.from_domains(species, cf, domains(cf))
+                actual = Generator.get_line_problem(Compact.line(cf), species)
+                self.assertEqual(expected.midi, actual.midi)
+                self.assertEqual(expected.diatonic, actual.diatonic)
+                self.assertEqual(expected.lengths, actual.lengths)
+
+    def test_backtrack_matches_product (self):
+        cf = make_cantus_firmus(['C4', 'E4', 'D4', 'C4'])
+        for problem in [Generator.first_species_problem(cf), Generator.second_species_problem(cf)]:
+            check = Generator.get_check(problem, Diagnostics())
+            domains = problem.domains()
+            expected = [path for path in itertools.product(*domains)
+                if all(check(list(path), j) for j in range(len(path)))]
+            self.assertEqual(expected, Generator.backtrack(domains, check))
+
+    def test_matches_baseline_output (self):
+        for names, (count, digest) in BASELINE.items():
+            cps = Generator.secondspeciesabove(make_cantus_firmus(names))
+            text = '\n'.join(' '.join(note.nameWithOctave if note.isNote else 'r' for note in cp) for cp in cps)
+            self.assertEqual((count, digest), (len(cps), hashlib.sha256(text.encode()).hexdigest()))
+            problem = Generator.second_species_problem(make_cantus_firmus(names))
+            rules = ['repeat_note', 'parallel_fifth', 'parallel_octave', 'dissonance_approach', 'cadence', 'big_leap',
+                'leap_recovery']
+            self.assertLess(len(Generator.backtrack(problem.domains(), Generator.get_check(problem, rules=rules))),
+                count) # The leap rules are opt-in: they drop some of the original counterpoints.
+
+    def test_iter_second_species_streams (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'E4', 'D4'])
+        problem = Generator.second_species_problem(cf)
+        expected = [Compact.to_notes(problem, path) for path in
+            Generator.backtrack(problem.domains(), Generator.get_check(problem))]
+        solutions = Generator.iter_second_species(cf)
+        self.assertEqual(expected[:3], list(itertools.islice(solutions, 3)))
+        self.assertEqual(expected[3:], list(solutions))
+
+    def test_count_counterpoints_matches_enumeration (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'G4', 'E4', 'D4'])
+        for species in [1, 2]:
+            problem = Generator.get_problem(cf, species)
+            expected = len(Generator.backtrack(problem.domains(), Generator.get_check(problem)))
+            self.assertEqual(expected, Generator.count_counterpoints(cf, species))
+
+    def test_random_counterpoint_is_seeded_and_valid (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'E4', 'D4'])
+        picked = Generator.random_counterpoint(cf, 2, seed=7)
+        self.assertEqual(picked, Generator.random_counterpoint(cf, 2, seed=7))
+        self.assertIn(picked, list(Generator.iter_second_species(cf)))
+
+    def test_reservoir_sample (self):
+        total, picked = Generator.reservoir_sample(iter(range(1000)), 5, seed='a')
+        self.assertEqual(1000, total)
+        self.assertEqual((total, picked), Generator.reservoir_sample(range(1000), 5, seed='a'))
+        self.assertEqual(sorted(set(picked)), picked)
+        self.assertEqual((3, [0, 1, 2]), Generator.reservoir_sample(range(3), 5, seed=1))
+        self.assertEqual((3, []), Generator.reservoir_sample(range(3), 0, seed=1))
+
+    def test_selection_does_not_depend_on_workers (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'G4', 'E4', 'D4'])
+        total, picked = Generator.select_counterpoints(cf, 2, k=3, seed=11)
+        self.assertEqual(Generator.count_counterpoints(cf, 2), total)
+        self.assertEqual((total, picked), Generator.select_counterpoints(cf, 2, k=3, seed=11, workers=2))
+        problem = Generator.get_problem(cf, 2)
+        paths = Generator.reservoir_sample(Generator.iter_search(problem), 3, seed=11)[1]
+        self.assertEqual([Compact.to_notes(problem, path) for path in paths], picked)
+        self.assertTrue(set(paths) <= set(Generator.iter_search(problem)))
+
+    def test_parallel_search_matches_single_process (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'G4', 'E4', 'D4'])
+        problem = Generator.second_species_problem(cf)
+        expected = list(Generator.iter_search(problem))
+        self.assertEqual(expected, list(Generator.iter_search(problem, workers=2)))
+        self.assertEqual(expected[:5], list(itertools.islice(Generator.iter_parallel(problem, 2, depth=2), 5)))
+
+    def test_parallel_search_stops_early (self):
+        problem = Generator.second_species_problem(make_cantus_firmus(['D4', 'F4', 'G4', 'E4', 'D4']))
+        with mock.patch.object(Generator, 'search_subtree', slow_subtree):
+            paths = Generator.iter_parallel(problem, 2, depth=1)
+            self.assertEqual((0,) * len(problem.midi), next(paths))
+            start = time.perf_counter()
+            paths.close() # The other subtrees are still running or queued.
+            self.assertLess(time.perf_counter() - start, 2.5)
+
+    def test_transposed_cantus_firmi_share_problems (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'E4', 'D4'])
+        transposed = [note.transpose('A4') for note in cf] # G#4 B4 A#4 G#4: every spelling must follow.
+        Generator.problem_cache.clear()
+        for species in (1, 2):
+            expected = Generator.second_species_problem(transposed) if species == 2 else \
+                Generator.first_species_problem(transposed)
+            Generator.get_problem(cf, species)
+            actual = Generator.get_problem(transposed, species)
+            self.assertEqual(expected.midi, actual.midi)
+            self.assertEqual(expected.diatonic, actual.diatonic)
+        self.assertEqual(2, Generator.problem_cache.hits)
+        def name (note):
+            return note.nameWithOctave if note.isNote else 'rest'
+        expected = [[name(note.transpose('A4') if note.isNote else note) for note in cp]
+            for cp in Generator.secondspeciesabove(cf)]
+        self.assertEqual(expected, [[name(note) for note in cp] for cp in Generator.secondspeciesabove(transposed)])
@@ -0,0 +1,70 @@
+import unittest
+import music21
+
+from counterpoint.compact import Compact, REST
+from counterpoint.generator import Generator
+from counterpoint.keys import Key
+
+class TestKey (unittest.TestCase):
+    """ Tests for the `Key` class.
+    """
+
+    def setUp (self):
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'G4', 'E4', 'D4']]
+
+    def test_parse (self):
+        self.assertEqual(Key.parse('C ionian'), Key.parse('C major'))
+        self.assertEqual(-2, Key.parse('B- major').signature())
+        self.assertEqual(3, Key.parse('F# minor').signature())
+        self.assertEqual('B- ionian', repr(Key.parse('B- major')))
+        for name in ['D', 'D dorian mode', 'H dorian', 'D hypodorian', 'Dx major', 'D#b major', 'D4 major']:
+            with self.assertRaises(ValueError):
+                Key.parse(name)
+
+    def test_detect (self):
+        self.assertEqual(Key.parse('D dorian'), Key.detect(Compact.line(self.cf)))
+        cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'B-4', 'A4', 'E4', 'D4']]
+        self.assertEqual(Key.parse('D aeolian'), Key.detect(Compact.line(cf)))
+        self.assertIsNone(Key.detect([]))
+
+    def test_restrict (self):
+        key = Key.parse('D dorian')
+        b, c, sharp, flat = [Compact.from_name(name) + (4.0,) for name in ['B3', 'C4', 'C#4', 'D-4']]
+        candidates = [[b, c, sharp, flat]] * 4
+        self.assertEqual([[b, c]] + [[b, c, sharp]] * 3, key.restrict(candidates))
+        self.assertEqual([[b, c]] * 4, key.restrict(candidates, False))
+
+    def test_counterpoints_stay_in_the_key (self):
+        cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'E4', 'D4']]
+        every = Generator.secondspeciesabove(cf)
+        kept = Generator.secondspeciesabove(cf, key='auto')
+        self.assertLess(0, len(kept))
+        self.assertLess(len(kept), len(every))
+        names = [tuple(note.nameWithOctave for note in cp if note.isNote) for cp in every]
+        self.assertTrue(set(tuple(note.nameWithOctave for note in cp if note.isNote) for cp in kept) <= set(names))
+        key = Key.parse('D dorian')
+        for cp in kept:
+            notes = [Compact.from_note(note) for note in cp if note.isNote]
+            self.assertTrue(all(key.contains(m, d) for m, d in notes[:-2]))
+
+    def test_transposed_cantus_firmus (self):
+        up = [music21.note.Note(name, quarterLength=4) for name in ['E4', 'G4', 'A4', 'F#4', 'E4']]
+        problem = Generator.get_problem(self.cf, 2, 'auto')
+        self.assertIsNot(problem, Generator.get_problem(self.cf, 2))
+        self.assertEqual(problem.midi, Generator.get_problem(self.cf, 2, 'D dorian').midi)
+        transposed = Generator.get_problem(up, 2, 'E dorian')
+        self.assertEqual([[m if m == REST else m + 2 for m in line] for line in problem.midi],
+            [list(line) for line in transposed.midi])
+        with self.assertRaises(ValueError):
+            Generator.get_problem(self.cf, 2, 'F# major')
+
+    def test_no_counterpoint_in_the_key (self):
+        cf = [music21.note.Note(name, quarterLength=4) for name in ['A3', 'C4', 'B3', 'D4', 'C#4', 'A3']]
+        for species in [1, 2]:
+            self.assertLess(0, Generator.count_counterpoints(cf, species))
+            for leading_tone in [True, False]:
+                with self.assertRaisesRegex(ValueError, 'A aeolian.*raised sixth and seventh'):
+                    Generator.get_problem(cf, species, 'auto', leading_tone)
+
+if __name__ == '__main__':
+    unittest.main()
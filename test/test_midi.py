@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import music21
+
+from counterpoint.compact import REST
+from counterpoint.generator import Generator
+from counterpoint.midi import Midi
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+class TestMidi (unittest.TestCase):
+    """ Tests for the `Midi` class.
+    """
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+        self.cf = Generator.get_input(os.path.join(EXAMPLES, '3_note.xml'))
+
+    def tearDown (self):
+        shutil.rmtree(self.directory)
+
+    def test_variable_length (self):
+        self.assertEqual(b'\x00', Midi.variable_length(0))
+        self.assertEqual(b'\x7f', Midi.variable_length(127))
+        self.assertEqual(b'\x81\x00', Midi.variable_length(128))
+        self.assertEqual(b'\x90\x00', Midi.variable_length(2048))
+
+    def test_same_bytes_as_music21 (self):
+        for species in [1, 2]:
+            for cp in Generator.random_counterpoints(self.cf, species, 5, seed=1):
+                score = Generator.combinecfcp(self.cf, Generator.tostream(cp))
+                expected = music21.midi.translate.streamToMidiFile(score).writestr()
+                self.assertEqual(expected, Midi.file([Midi.voice(self.cf), Midi.voice(cp)]))
+
+    def test_path_voice (self):
+        problem = Generator.get_problem(self.cf, 2)
+        path = next(Generator.iter_search(problem))
+        voice = Midi.path_voice(problem, path)
+        self.assertEqual((REST, 2.0), voice[0])
+        first = Generator.secondspeciesabove(self.cf)[0]
+        self.assertEqual([(note.pitch.midi, note.quarterLength) for note in first[1:]], voice[1:])
+
+    def test_bulk_modes (self):
+        cf = Midi.voice(self.cf)
+        cps = [Midi.voice(cp) for cp in Generator.random_counterpoints(self.cf, 1, 3, seed=2)]
+        paths = Midi.write_many(self.directory, 'cf', cf, cps)
+        self.assertEqual(['cf_0.mid', 'cf_1.mid', 'cf_2.mid'], [os.path.basename(path) for path in paths])
+        archive = os.path.join(self.directory, 'cf.zip')
+        self.assertEqual(3, Midi.write_archive(archive, 'cf', cf, cps))
+        with zipfile.ZipFile(archive) as z:
+            for path, cp in zip(paths, cps):
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(), z.read(os.path.basename(path)))
+                self.assertEqual(Midi.file([cf, cp]), z.read(os.path.basename(path)))
+
+if __name__ == '__main__':
+    unittest.main()
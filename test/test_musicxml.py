@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from fractions import Fraction
+import music21
+
+from counterpoint.musicxml import MusicXML
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples')
+
+class TestMusicXML (unittest.TestCase):
+    """ Tests for the `MusicXML` class.
+    """
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown (self):
+        shutil.rmtree(self.directory)
+
+    def write (self, stream, name, fmt='musicxml'):
+        path = os.path.join(self.directory, name)
+        stream.write(fmt, path)
+        return path
+
+    def test_load_line (self):
+        path = os.path.join(EXAMPLES, '6_note.xml')
+        expected = [(int(note.pitch.ps), note.pitch.diatonicNoteNum, float(note.quarterLength))
+            for note in MusicXML.load(path)]
+        self.assertEqual(expected, MusicXML.load_line(path))
+
+    def test_fast_path_matches_music21 (self):
+        for name in ['3_note.xml', '6_note.xml']:
+            data = MusicXML.read(os.path.join(EXAMPLES, name))
+            self.assertIsNotNone(MusicXML.parse_simple(data))
+            self.assertEqual(MusicXML.parse_music21(data), MusicXML.parse_simple(data))
+
+    def test_accidentals_and_compressed_files (self):
+        stream = music21.stream.Stream([music21.note.Note('F#4', quarterLength=2), music21.note.Rest(),
+            music21.note.Note('B-3', quarterLength=0.5), music21.note.Note('E--5', quarterLength=0.5)])
+        data = MusicXML.read(self.write(stream, 'accidentals.xml'))
+        expected = [('F#4', 2.0), ('B-3', 0.5), ('E--5', 0.5)]
+        self.assertEqual(expected, MusicXML.parse_simple(data))
+        self.assertEqual(expected, MusicXML.parse_music21(data))
+        notes = MusicXML.load(self.write(stream, 'accidentals.mxl', 'mxl'))
+        self.assertEqual(expected, [(note.nameWithOctave, note.quarterLength) for note in notes])
+
+    def test_complex_files_fall_back_to_music21 (self):
+        tuplets = music21.stream.Stream([music21.note.Note(name, quarterLength=1/3) for name in ['C4', 'D4', 'E4']])
+        data = MusicXML.read(self.write(tuplets, 'tuplets.xml'))
+        self.assertIsNone(MusicXML.parse_simple(data))
+        self.assertEqual([('C4', Fraction(1, 3)), ('D4', Fraction(1, 3)), ('E4', Fraction(1, 3))], MusicXML.parse(data))
+        chords = music21.stream.Stream([music21.chord.Chord(['C4', 'E4'])])
+        with self.assertRaises(ValueError):
+            MusicXML.load(self.write(chords, 'chords.xml'))
+
+    def test_parsed_input_is_cached_by_content (self):
+        path = os.path.join(EXAMPLES, '3_note.xml')
+        copy = os.path.join(self.directory, 'copy.xml')
+        shutil.copy(path, copy)
+        MusicXML.cache.clear()
+        first = MusicXML.load(path)
+        first[0].quarterLength = 1 # Must not leak into the cache.
+        second = MusicXML.load(copy)
+        self.assertEqual(1, MusicXML.cache.hits)
+        self.assertEqual(4.0, second[0].quarterLength)
+
+if __name__ == '__main__':
+    unittest.main()
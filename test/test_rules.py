@@ -0,0 +1,57 @@
+import itertools
+import random
+import unittest
+import numpy
+import music21
+
+from counterpoint.compact import Problem
+from counterpoint.generator import Generator
+from counterpoint.rules import REGISTRY, RuleSet, Rules
+from counterpoint.vectorized import Vectorized
+
+class TestRuleSet (unittest.TestCase):
+    """ Tests for the rule registry and the `RuleSet` class.
+    """
+
+    def setUp (self):
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'G4', 'E4', 'D4']]
+
+    def test_rule_order_does_not_change_solutions (self):
+        problem = Generator.second_species_problem(self.cf)
+        expected = Generator.backtrack(problem.domains(), RuleSet(problem, adaptive=False))
+        rules = RuleSet(problem, reorder_every=16, warmup=1 << 30)
+        self.assertEqual(expected, Generator.backtrack(problem.domains(), rules))
+        scores = [rule['score'] for rule in rules.statistics()]
+        self.assertEqual(sorted(scores, reverse=True), scores)
+
+    def test_each_rule_is_declared_for_its_species (self):
+        for species in [1, 2]:
+            problem = Generator.get_problem(self.cf, species)
+            names = [rule.name for rule in RuleSet(problem).rules]
+            self.assertEqual(len(set(names)), len(names))
+            self.assertEqual('dissonance_approach' in names, species == 2)
+            self.assertNotIn('exposed_tritone', names)
+
+    def test_fewer_rules_accept_more (self):
+        problem = Generator.first_species_problem(self.cf)
+        all_rules = Generator.backtrack(problem.domains(), RuleSet(problem))
+        some_rules = Generator.backtrack(problem.domains(), RuleSet(problem, rules=['repeat_note']))
+        self.assertTrue(set(all_rules) < set(some_rules))
+
+    def test_exposed_tritone_matches_vectorized (self):
+        rng = random.Random(0)
+        lines = numpy.array([[60 + rng.randrange(-7, 8) for _ in range(8)] for _ in range(500)])
+        problem = Problem(1, (48,) * 8, (26,) * 8, [tuple(range(128))] * 8, [tuple(range(128))] * 8, [4.0] * 8)
+        expected = Vectorized.exposed_tritone_mask(lines).tolist()
+        self.assertEqual(expected, [any(Rules.exposed_tritone(problem, line, j) for j in range(8))
+            for line in lines.tolist()])
+
+    def test_exposed_tritone_prunes_search (self):
+        problem = Generator.first_species_problem(self.cf)
+        rules = [rule.name for rule in RuleSet(problem).rules]
+        paths = Generator.backtrack(problem.domains(), RuleSet(problem, rules=rules + ['exposed_tritone']))
+        unpruned = numpy.array(Generator.backtrack(problem.domains(), RuleSet(problem)))
+        midi, diatonic = Vectorized.to_pitches(problem, unpruned)
+        expected = unpruned[~Vectorized.exposed_tritone_mask(midi)]
+        self.assertEqual([tuple(path) for path in expected.tolist()], paths)
+        self.assertLess(len(paths), len(unpruned))
@@ -0,0 +1,66 @@
+import unittest
+import music21
+
+from counterpoint.benchmark import Benchmark
+from counterpoint.generator import Generator
+from counterpoint.scoring import Scorer, WEIGHTS
+
+class TestScoring (unittest.TestCase):
+    """ Tests for the `Scorer` class and `Generator.top_k`.
+    """
+
+    def setUp (self):
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'E4', 'D4']]
+
+    def ranked (self, problem, scorer):
+        paths = Generator.backtrack(problem.domains(), Generator.get_check(problem))
+        return sorted(((scorer.score(path), path) for path in paths), key=lambda result: (-result[0], result[1]))
+
+    def test_explain_matches_score (self):
+        problem = Generator.get_problem(self.cf, 2)
+        scorer = Scorer(problem)
+        for score, path in self.ranked(problem, scorer)[::50]:
+            counts = scorer.explain(path)
+            self.assertEqual(score, sum(WEIGHTS[name] * count for name, count in counts.items()))
+
+    def test_bound_is_admissible (self):
+        problem = Generator.get_problem(self.cf, 1)
+        scorer = Scorer(problem)
+        for score, path in self.ranked(problem, scorer):
+            for j in range(len(path)):
+                prefix = sum(scorer.gain(path, i) for i in range(j + 1))
+                self.assertLessEqual(score, prefix + scorer.remaining[j][path[j]] + scorer.end_bound)
+
+    def test_top_k_matches_exhaustive_ranking (self):
+        for species, weights in [(1, None), (2, None), (2, {'leap': 1.0, 'monotony': 2.0, 'range': 0.5})]:
+            problem = Generator.get_problem(self.cf, species)
+            scorer = Scorer(problem, weights)
+            expected = self.ranked(problem, scorer)
+            for k in [1, 7, 40]:
+                self.assertEqual(expected[:k], Generator.top_k(problem, k, scorer=scorer))
+
+    def test_unbounded_beam_is_exact (self):
+        for species in [1, 2]:
+            problem = Generator.get_problem(self.cf, species)
+            self.assertEqual(Generator.top_k(problem, 5), Generator.beam_search(problem, 1 << 20, 5))
+
+    def test_beam_search_on_long_cantus_firmus (self):
+        cf = Benchmark.synthetic_cantus_firmus(24, 'D4', 'dorian')
+        problem = Generator.get_problem(cf, 2)
+        found = Generator.beam_search(problem, 8, k=3)
+        self.assertEqual(3, len(found))
+        check = Generator.get_check(problem)
+        for score, path in found:
+            self.assertTrue(all(check(list(path), j) for j in range(len(path))))
+            self.assertEqual(Scorer(problem).score(path), score)
+        self.assertEqual(3, len(Generator.best_counterpoints(cf, 2, k=3, beam_width=8)))
+
+    def test_best_counterpoints (self):
+        best = Generator.best_counterpoints(self.cf, 2, k=3)
+        self.assertEqual(3, len(best))
+        self.assertEqual(sorted(best, key=lambda result: -result[0]), best)
+        self.assertIn(best[0][1], Generator.secondspeciesabove(self.cf))
+        self.assertRaises(ValueError, Scorer, Generator.get_problem(self.cf, 2), {'unison': 1.0})
+
+if __name__ == '__main__':
+    unittest.main()
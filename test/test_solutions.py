@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import music21
+
+from counterpoint.generator import Generator
+from counterpoint.solutions import SolutionSet
+
+class TestSolutionSet (unittest.TestCase):
+    """ Tests for the `SolutionSet` class.
+    """
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'E4', 'D4']]
+        self.solutions = Generator.solution_set(self.cf, species=2)
+
+    def tearDown (self):
+        shutil.rmtree(self.directory)
+
+    def test_decodes_lazily_to_the_same_notes (self):
+        expected = Generator.secondspeciesabove(self.cf)
+        self.assertEqual(len(expected), len(self.solutions))
+        self.assertEqual(numpy.uint8, self.solutions.paths.dtype)
+        self.assertEqual(len(expected) * (len(self.cf) * 2 - 1), self.solutions.nbytes)
+        self.assertEqual(expected[5], self.solutions[5])
+        self.assertEqual(expected, list(self.solutions))
+
+    def test_save_and_load (self):
+        for name, compress in [('set.npz', False), ('set.npz', True), ('set.npy', False)]:
+            path = os.path.join(self.directory, name)
+            self.solutions.save(path, compress)
+            loaded = SolutionSet.load(path, self.solutions.problem)
+            self.assertEqual(not compress, isinstance(loaded.paths, numpy.memmap))
+            self.assertTrue(numpy.array_equal(self.solutions.paths, loaded.paths))
+            self.assertEqual(self.solutions[-1], loaded[-1])
+        with self.assertRaises(ValueError):
+            SolutionSet.load(os.path.join(self.directory, 'set.npy'))
+
+    def test_query (self):
+        midi, diatonic = self.solutions.pitches()
+        climbing = self.solutions[midi[:, -1] > midi[:, 1]]
+        self.assertEqual(int((midi[:, -1] > midi[:, 1]).sum()), len(climbing))
+        self.assertTrue(all(cp[-1].pitch.midi > cp[1].pitch.midi for cp in climbing))
+        self.assertEqual(self.solutions[3], self.solutions[2:5][1])
+
+if __name__ == '__main__':
+    unittest.main()
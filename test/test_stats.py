@@ -0,0 +1,52 @@
+import json
+import unittest
+import music21
+
+from counterpoint.cache import LRUCache
+from counterpoint.generator import Generator
+from counterpoint.stats import Stats
+
+class TestStats (unittest.TestCase):
+    """ Tests for the `Stats` class.
+    """
+
+    def setUp (self):
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'E4', 'D4']]
+
+    def test_profiles_rules_and_nodes (self):
+        with Stats(time_every=4) as stats:
+            solutions = Generator.secondspeciesabove(self.cf, stats=stats)
+        self.assertEqual(solutions, Generator.secondspeciesabove(self.cf))
+        report = stats.as_dict()
+        last = report['depths'][-1]
+        self.assertEqual(len(solutions), last['expanded'])
+        self.assertEqual(len(self.cf) * 2 - 1, len(report['depths']))
+        self.assertGreater(report['rules']['repeat_note']['calls'], 0)
+        self.assertGreater(report['rules']['repeat_note']['seconds'], 0)
+        self.assertIn('problem', report['caches'])
+        self.assertEqual([4, 13, 7, 13, 1, 2, 1], report['domains']['before'])
+        self.assertTrue(all(0 < a <= b for a, b in zip(report['domains']['after'], report['domains']['before'])))
+        self.assertGreater(report['elapsed'], 0)
+        self.assertEqual(report, json.loads(stats.to_json()))
+
+    def test_worker_statistics_are_merged (self):
+        expected = Stats()
+        list(Generator.iter_second_species(self.cf, stats=expected))
+        actual = Stats()
+        list(Generator.iter_second_species(self.cf, workers=2, stats=actual))
+        self.assertEqual(expected.as_dict()['depths'], actual.as_dict()['depths'])
+
+    def test_times_sections_and_caches (self):
+        stats = Stats()
+        cache = LRUCache(4)
+        stats.watch('squares', cache)
+        for x in [1, 2, 1, 1]:
+            cache.get(x, lambda: x * x)
+        stream = Generator.tostream(Generator.secondspeciesabove(self.cf)[0], stats)
+        report = stats.as_dict()
+        self.assertEqual({'hits': 2, 'misses': 2, 'hit_rate': 0.5}, report['caches']['squares'])
+        self.assertEqual(1, report['sections']['tostream']['calls'])
+        self.assertEqual(len(self.cf) * 2 - 1, len(stream))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+import music21
+
+from counterpoint.anytime import SearchState
+from counterpoint.generator import Generator
+from counterpoint.store import SolutionStore
+
+class TestSolutionStore (unittest.TestCase):
+    """ Tests for the `SolutionStore` class.
+    """
+
+    def setUp (self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'solutions.db')
+        self.cf = [music21.note.Note(name, quarterLength=4) for name in ['D4', 'F4', 'E4', 'D4']]
+
+    def tearDown (self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_returns_searched_solutions (self):
+        problem = Generator.second_species_problem(self.cf)
+        expected = list(Generator.iter_search(problem))
+        with SolutionStore(self.path) as store:
+            self.assertIsNone(store.get(problem))
+            self.assertEqual(expected, list(Generator.iter_search(problem, store=store)))
+            self.assertEqual(1, store.info()['entries'])
+        with SolutionStore(self.path) as store: # Another connection, as another process would open.
+            self.assertEqual(expected, store.get(problem))
+            self.assertEqual(Generator.secondspeciesabove(self.cf), Generator.secondspeciesabove(self.cf, store=store))
+
+    def test_interruptible_hit_skips_the_budget (self):
+        problem = Generator.second_species_problem(self.cf)
+        expected = list(Generator.iter_search(problem))
+        with SolutionStore(self.path) as store:
+            state = SearchState()
+            self.assertLess(len(list(Generator.iter_search(problem, store=store, budget=0.0, state=state))),
+                len(expected))
+            self.assertFalse(state.stored)
+            store.put(problem, expected)
+            state = SearchState()
+            self.assertEqual(expected, list(Generator.iter_search(problem, store=store, budget=0.0, state=state)))
+            self.assertTrue(state.exhaustive and state.stored)
+            self.assertEqual((0, len(expected)), (state.nodes, state.found))
+            self.assertTrue(SearchState.from_dict(state.as_dict()).stored)
+
+    def test_transpositions_share_entries (self):
+        transposed = [note.transpose('-m3') for note in self.cf]
+        with SolutionStore(self.path) as store:
+            expected = Generator.firstspeciesabove(transposed)
+            Generator.firstspeciesabove(self.cf, store=store)
+            self.assertEqual(expected, Generator.firstspeciesabove(transposed, store=store))
+            self.assertEqual(1, store.info()['entries'])
+
+    def test_early_stop_stores_nothing (self):
+        problem = Generator.first_species_problem(self.cf)
+        with SolutionStore(self.path) as store:
+            next(Generator.iter_search(problem, store=store))
+            self.assertIsNone(store.get(problem))
+
+    def test_evicts_least_recently_used (self):
+        first = Generator.first_species_problem(self.cf)
+        second = Generator.second_species_problem(self.cf)
+        with SolutionStore(self.path) as store:
+            store.put(first, list(Generator.iter_search(first)))
+            size = store.info()['size']
+        with SolutionStore(self.path, max_bytes=size + 1) as store:
+            store.put(second, [(0,) * len(second.midi)])
+            self.assertIsNone(store.get(first))
+            self.assertEqual([(0,) * len(second.midi)], store.get(second))
+
+    def test_rule_changes_invalidate_entries (self):
+        problem = Generator.first_species_problem(self.cf)
+        with SolutionStore(self.path) as store:
+            store.put(problem, list(Generator.iter_search(problem)))
+            store.connection.execute("UPDATE solutions SET version = 'old'")
+        with SolutionStore(self.path) as store: # Kept for the checkout that wrote it, but never returned.
+            self.assertIsNone(store.get(problem))
+            self.assertEqual(1, store.info()['entries'])
+            store.connection.execute('UPDATE solutions SET used = ?', (time.time() + 60,))
+            size = store.info()['size']
+        second = Generator.second_species_problem(self.cf)
+        with SolutionStore(self.path, max_bytes=size + 1) as store: # Evicted first, however recently used.
+            store.put(second, [(0,) * len(second.midi)])
+            self.assertEqual(1, store.info()['entries'])
+            self.assertEqual([(0,) * len(second.midi)], store.get(second))
+
+    def test_reads_do_not_wait_for_writers (self):
+        problem = Generator.first_species_problem(self.cf)
+        expected = list(Generator.iter_search(problem))
+        with SolutionStore(self.path) as store:
+            store.put(problem, expected)
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            writer.execute('BEGIN IMMEDIATE')
+            with SolutionStore(self.path, timeout=10.0, touch_every=0.0) as store:
+                start = time.perf_counter()
+                self.assertEqual(expected, store.get(problem))
+                self.assertLess(time.perf_counter() - start, 5.0)
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
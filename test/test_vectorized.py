@@ -0,0 +1,46 @@
+import itertools
+import unittest
+import numpy
+import music21
+
+from counterpoint.compact import Compact
+from counterpoint.generator import Generator
+from counterpoint.vectorized import DEFAULT_RULES, RULES, Vectorized
+
+def make_cantus_firmus (names):
+    """ Builds a whole-note cantus firmus from a list of pitch names (e.g. 'C4').
+    """
+    return [music21.note.Note(name, quarterLength=4) for name in names]
+
+class TestVectorized (unittest.TestCase):
+    """ Tests for the `Vectorized` class.
+    """
+
+    def test_validate_matches_scalar_checks (self):
+        cf = make_cantus_firmus(['D4', 'F4', 'E4', 'D4'])
+        for problem in [Generator.first_species_problem(cf), Generator.second_species_problem(cf)]:
+            paths = list(itertools.product(*problem.domains()))
+            for scalar, rules in [(None, DEFAULT_RULES), (RULES + ['cadence'], RULES)]: # The cadence needs no mask.
+                check = Generator.get_check(problem, rules=scalar)
+                expected = [all(check(list(path), j) for j in range(len(path))) for path in paths]
+                self.assertEqual(expected, Vectorized.validate(problem, numpy.array(paths), rules).tolist())
+        problem = Generator.second_species_problem(cf)
+        with_tritone = Vectorized.validate(problem, numpy.array(paths), DEFAULT_RULES + ['exposed_tritone'])
+        self.assertLess(with_tritone.sum(), Vectorized.validate(problem, numpy.array(paths)).sum())
+
+    def test_iter_valid_paths_matches_backtrack (self):
+        cf = make_cantus_firmus(['C4', 'E4', 'D4', 'C4'])
+        problem = Generator.second_species_problem(cf)
+        expected = Generator.backtrack(problem.domains(), Generator.get_check(problem))
+        self.assertEqual(expected, list(Vectorized.iter_valid_paths(problem, batch_size=100)))
+        with self.assertRaisesRegex(ValueError, 'Unsupported rules: cadence'):
+            Vectorized.validate(problem, numpy.array(expected), rules=['cadence'])
+
+    def test_exposed_tritone_mask (self):
+        lines = [
+            ['F4', 'G4', 'A4', 'B4', 'A4'], # Rises a tritone, then turns.
+            ['F4', 'G4', 'A4', 'B4', 'C5'], # Passes through the tritone to a fifth.
+            ['C4', 'D4', 'C4', 'D4', 'C4'],
+        ]
+        midi = numpy.array([[Compact.from_note(music21.note.Note(name))[0] for name in line] for line in lines])
+        self.assertEqual([True, False, False], Vectorized.exposed_tritone_mask(midi).tolist())